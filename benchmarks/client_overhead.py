@@ -0,0 +1,93 @@
+"""
+About
+=====
+
+Measure the per-call overhead of `GrafanaClient` request runners, using a
+local stub transport, so that no network I/O is involved.
+
+It compares the legacy dynamic request runner, which built a new closure and
+passed authentication, verification, and timeout settings on each call, with
+the precomputed per-verb methods, and the cached dynamic attribute fallback.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.client_overhead
+    python -m benchmarks.client_overhead --calls 50000
+"""
+
+import argparse
+import asyncio
+import timeit
+
+from grafana_client.client import AsyncGrafanaClient, GrafanaClient
+
+from .stub import mount_stub
+
+
+def legacy_runner(client: GrafanaClient, item: str):
+    """
+    Replicate the request runner before per-verb methods have been introduced.
+    """
+
+    def __request_runner(url, json=None, data=None, params=None, headers=None, accept_empty_json=False):
+        __url = f"{client.url}{url}"
+        client._ensure_valid_json_arg(json)
+        r = client.s.request(
+            item.lower(),
+            __url,
+            json=json,
+            data=data,
+            params=params,
+            headers=headers,
+            auth=client.auth,
+            verify=client.verify,
+            timeout=client.timeout,
+        )
+        return client._extract_from_response(r, accept_empty_json)
+
+    return __request_runner
+
+
+def report(label: str, seconds: float, calls: int):
+    print(f"{label:<40} {seconds / calls * 1e6:8.2f} µs/call")
+
+
+def run_sync(calls: int):
+    client = GrafanaClient(("admin", "admin"), host="localhost", port=3000)
+    mount_stub(client, {"uid": "foo", "title": "Foo"})
+
+    report(
+        "sync legacy closure per call", timeit.timeit(lambda: legacy_runner(client, "GET")("/foo"), number=calls), calls
+    )
+    report("sync cached dynamic runner (GET)", timeit.timeit(lambda: client.GET("/foo"), number=calls), calls)
+    report("sync per-verb method (get)", timeit.timeit(lambda: client.get("/foo"), number=calls), calls)
+
+
+def run_async(calls: int):
+    client = AsyncGrafanaClient(("admin", "admin"), host="localhost", port=3000)
+    mount_stub(client, {"uid": "foo", "title": "Foo"})
+
+    async def loop(runner):
+        for _ in range(calls):
+            await runner("/foo")
+
+    for label, runner in [
+        ("async cached dynamic runner (GET)", lambda url: client.GET(url)),
+        ("async per-verb method (get)", client.get),
+    ]:
+        report(label, timeit.timeit(lambda runner=runner: asyncio.run(loop(runner)), number=1), calls)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+    run_sync(args.calls)
+    run_async(args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+About
+=====
+
+Measure decoding of `/ds/query` data frames into rows of Python objects,
+like consumers have been doing, compared with the columnar decoder of
+`grafana_client.frames`, into NumPy arrays, and pyarrow tables.
+
+The response contains one million points by default, with a share of `null`
+values, `NaN` and `+Inf` values using the `entities` side channel, and
+sub-millisecond timestamps using the `nanos` side channel.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.frame_decoding
+    python -m benchmarks.frame_decoding --points 1000000 --series 4 --repeat 5
+"""
+
+import argparse
+import datetime
+import time
+
+from grafana_client.codec import get_codec
+from grafana_client.frames import decode_results
+
+
+def make_response(points: int, series: int):
+    start = 1700000000000
+    size = points // series
+    frames = []
+    for number in range(series):
+        values = [None if i % 100 == 0 else (i * 7 % 1000) / 10 for i in range(size)]
+        frames.append(
+            {
+                "schema": {
+                    "refId": "A",
+                    "fields": [
+                        {"name": "Time", "type": "time", "typeInfo": {"frame": "time.Time"}},
+                        {
+                            "name": "Value",
+                            "type": "number",
+                            "typeInfo": {"frame": "float64", "nullable": True},
+                            "labels": {"instance": f"host-{number}"},
+                        },
+                    ],
+                },
+                "data": {
+                    "values": [[start + i * 15000 for i in range(size)], values],
+                    "entities": [None, {"NaN": list(range(0, size, 1000)), "Inf": list(range(500, size, 1000))}],
+                    "nanos": [[i % 1000 * 1000 for i in range(size)], None],
+                },
+            }
+        )
+    return {"results": {"A": {"status": 200, "frames": frames}}}
+
+
+def decode_rows(response):
+    """
+    Convert data frames to rows of Python objects, the way consumers did before.
+    """
+    rows = []
+    for result in response["results"].values():
+        for frame in result["frames"]:
+            timestamps, values = frame["data"]["values"]
+            for timestamp, value in zip(timestamps, values):
+                rows.append((datetime.datetime.fromtimestamp(timestamp / 1000, tz=datetime.timezone.utc), value))
+    return rows
+
+
+def measure(label: str, func, repeat: int):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    print(f"{label:<30} {min(durations) * 1e3:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--series", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    codec = get_codec()
+    data = codec.dumps(make_response(args.points, args.series))
+    response = codec.loads(data)
+    print(f"Data frames with {args.points} points, {len(data) / 1024 / 1024:.1f} MiB, decoded using {codec.name}\n")
+
+    measure("rows: Python objects", lambda: decode_rows(response), args.repeat)
+    measure("columns: NumPy", lambda: decode_results(response), args.repeat)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print(f"{'columns: pyarrow':<30} not installed")
+    else:
+        measure("columns: pyarrow", lambda: decode_results(response, backend="arrow"), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+About
+=====
+
+Measure payload size and latency of liveness probes against a local mock
+server, emulating a big instance with many data sources and plugins:
+Fetching `/frontend/settings` on each probe, like `health.check()` did
+before, compared with `health.check()` probing `/api/health`, and merging
+it into the cached build information.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.health_probe
+    python -m benchmarks.health_probe --datasources 2000 --plugins 300 --repeat 500
+"""
+
+import argparse
+import json
+import time
+
+from grafana_client import GrafanaApi
+
+from .stub import MockGrafanaServer
+
+
+def make_settings(datasources: int, plugins: int):
+    return {
+        "buildInfo": {
+            "version": "11.0.0",
+            "commit": "83b9528bce",
+            "edition": "Open Source",
+            "env": "production",
+            "hideVersion": False,
+        },
+        "datasources": {
+            f"datasource-{i}": {
+                "id": i,
+                "uid": f"uid-{i}",
+                "type": "prometheus",
+                "name": f"datasource-{i}",
+                "meta": {"id": "prometheus", "name": "Prometheus", "info": {"description": "Prometheus" * 10}},
+                "url": "/api/datasources/proxy/uid/uid-{i}",
+                "jsonData": {"httpMethod": "POST", "timeInterval": "15s"},
+            }
+            for i in range(datasources)
+        },
+        "panels": {
+            f"panel-{i}": {
+                "id": f"panel-{i}",
+                "name": f"Panel {i}",
+                "info": {"description": "Panel plugin " * 10, "version": "1.0.0"},
+                "module": f"public/plugins/panel-{i}/module.js",
+            }
+            for i in range(plugins)
+        },
+        "featureToggles": {f"feature{i}": bool(i % 2) for i in range(100)},
+    }
+
+
+def measure(label: str, func, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / repeat * 1e3:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--datasources", type=int, default=1000)
+    parser.add_argument("--plugins", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    settings = json.dumps(make_settings(args.datasources, args.plugins)).encode("utf-8")
+    health = json.dumps({"commit": "83b9528bce", "database": "ok", "version": "11.0.0"}).encode("utf-8")
+    print(f"/api/frontend/settings: {len(settings) / 1024:10.1f} KiB")
+    print(f"/api/health:            {len(health) / 1024:10.3f} KiB\n")
+
+    def payload(path: str) -> bytes:
+        return health if path.endswith("/health") else settings
+
+    with MockGrafanaServer(payload=payload) as server:
+        grafana = GrafanaApi(host="127.0.0.1", port=server.port, timeout=60)
+        grafana.health.check()
+        measure("probe: /api/frontend/settings", grafana.health.frontend_settings, args.repeat)
+        measure("probe: health.check()", grafana.health.check, args.repeat)
+        measure(
+            "probe: health.check(fields=['version'])", lambda: grafana.health.check(fields=["version"]), args.repeat
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+About
+=====
+
+Measure encoding and decoding performance of the available JSON codecs, using
+realistic payloads: A large dashboard JSON model, and a `/ds/query` response
+with data frames.
+
+Decoding is also compared with `niquests.Response.json()`, which has been used
+before codecs have been introduced.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.json_codec
+    python -m benchmarks.json_codec --panels 200 --points 50000 --repeat 20
+"""
+
+import argparse
+import io
+import timeit
+
+import niquests
+
+from grafana_client.client import GrafanaClient
+from grafana_client.codec import CODECS, JsonCodec
+
+
+def make_dashboard(panels: int):
+    return {
+        "dashboard": {
+            "uid": "benchmark",
+            "title": "Benchmark",
+            "tags": ["benchmark", "production"],
+            "timezone": "browser",
+            "schemaVersion": 39,
+            "templating": {"list": [{"name": "host", "type": "query", "query": "label_values(up, instance)"}]},
+            "panels": [
+                {
+                    "id": i,
+                    "type": "timeseries",
+                    "title": f"Panel {i}",
+                    "gridPos": {"h": 8, "w": 12, "x": (i % 2) * 12, "y": (i // 2) * 8},
+                    "datasource": {"type": "prometheus", "uid": "prometheus"},
+                    "targets": [
+                        {"refId": ref, "expr": f'rate(http_requests_total{{instance="$host", code="{ref}"}}[5m])'}
+                        for ref in "ABC"
+                    ],
+                    "fieldConfig": {
+                        "defaults": {
+                            "unit": "reqps",
+                            "thresholds": {
+                                "mode": "absolute",
+                                "steps": [{"color": "green", "value": None}, {"color": "red", "value": 80.5}],
+                            },
+                        },
+                        "overrides": [],
+                    },
+                    "options": {
+                        "legend": {"displayMode": "table", "placement": "bottom"},
+                        "tooltip": {"mode": "multi"},
+                    },
+                }
+                for i in range(panels)
+            ],
+        },
+        "meta": {"folderUid": "folder", "canEdit": True, "version": 42},
+    }
+
+
+def make_frames(points: int):
+    start = 1700000000000
+    return {
+        "results": {
+            "A": {
+                "status": 200,
+                "frames": [
+                    {
+                        "schema": {
+                            "refId": "A",
+                            "fields": [
+                                {"name": "Time", "type": "time", "typeInfo": {"frame": "time.Time"}},
+                                {"name": "Value", "type": "number", "labels": {"instance": f"host-{series}"}},
+                            ],
+                        },
+                        "data": {
+                            "values": [
+                                [start + i * 15000 for i in range(points)],
+                                [(i * 7 % 1000) / 10 for i in range(points)],
+                            ]
+                        },
+                    }
+                    for series in range(4)
+                ],
+            }
+        }
+    }
+
+
+def make_response(payload: bytes) -> niquests.Response:
+    response = niquests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response.raw = io.BytesIO(payload)
+    response._content = payload
+    response.encoding = "utf-8"
+    return response
+
+
+def available_codecs():
+    for name, codec_class in CODECS.items():
+        try:
+            yield codec_class()
+        except ImportError:
+            print(f"{name:<40} not installed")
+
+
+def report(label: str, seconds: float, repeat: int):
+    print(f"{label:<40} {seconds / repeat * 1e3:8.2f} ms")
+
+
+def run(title: str, document, repeat: int):
+    data = JsonCodec().dumps(document)
+    print(f"\n{title}, {len(data) / 1024:.0f} KiB")
+    response = make_response(data)
+    report("decode: niquests Response.json()", timeit.timeit(response.json, number=repeat), repeat)
+    for codec in available_codecs():
+        client = GrafanaClient(None, json_codec=codec)
+        report(f"encode: {codec.name}", timeit.timeit(lambda: codec.dumps(document), number=repeat), repeat)  # noqa: B023
+        report(f"decode: {codec.name}", timeit.timeit(lambda: codec.loads(data), number=repeat), repeat)  # noqa: B023
+        report(
+            f"extract response: {codec.name}",
+            timeit.timeit(lambda: client._extract_from_response(response, False), number=repeat),  # noqa: B023
+            repeat,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--panels", type=int, default=100)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    run(f"Dashboard with {args.panels} panels", make_dashboard(args.panels), args.repeat)
+    run(f"Data frames with 4 x {args.points} points", make_frames(args.points), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
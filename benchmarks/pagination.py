@@ -0,0 +1,62 @@
+"""
+About
+=====
+
+Measure the duration of listing many users with `users.search_users()`,
+walking pages one after another, and fetching them concurrently, against a
+local mock server with artificial latency.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.pagination
+    python -m benchmarks.pagination --users 200000 --perpage 1000 --latency 0.02 --concurrency 4 16
+"""
+
+import argparse
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from grafana_client import GrafanaApi
+
+from .stub import MockGrafanaServer
+
+
+def report(label: str, seconds: float, users: int, requests: int):
+    print(f"{label:<24} {users:8d} users  {requests:5d} requests  {seconds:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--perpage", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Server latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 10])
+    args = parser.parse_args()
+
+    def payload(path: str):
+        query = parse_qs(urlsplit(path).query)
+        page = int(query["page"][0])
+        perpage = int(query["perpage"][0])
+        users = [
+            {"id": i, "login": f"user-{i}", "email": f"user-{i}@example.org", "name": f"User {i}"}
+            for i in range((page - 1) * perpage, min(page * perpage, args.users))
+        ]
+        return {"totalCount": args.users, "users": users, "page": page, "perPage": perpage}
+
+    with MockGrafanaServer(latency=args.latency, payload=payload) as server:
+        grafana = GrafanaApi(
+            auth=None, host="127.0.0.1", port=server.port, protocol="http", session_pool_size=max(args.concurrency)
+        )
+        for concurrency in [0, *args.concurrency]:
+            server.request_count = 0
+            start = time.perf_counter()
+            users = grafana.users.search_users(perpage=args.perpage, concurrency=concurrency)
+            label = f"concurrency={concurrency}" if concurrency else "sequential"
+            report(label, time.perf_counter() - start, len(users), server.request_count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+About
+=====
+
+Measure the throughput of fetching many dashboards with the synchronous
+`GrafanaApi`, running serially, and running on a thread pool using
+`GrafanaApi.parallel()`, against a local mock server with artificial latency.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.parallel_throughput
+    python -m benchmarks.parallel_throughput --requests 200 --latency 0.02 --workers 4 16
+"""
+
+import argparse
+import time
+
+from grafana_client import GrafanaApi
+
+from .stub import MockGrafanaServer
+
+
+def report(label: str, seconds: float, requests: int):
+    print(f"{label:<40} {requests / seconds:8.1f} requests/s  {seconds:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="Server latency in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 10, 20])
+    args = parser.parse_args()
+
+    uids = [f"uid-{i}" for i in range(args.requests)]
+    with MockGrafanaServer(latency=args.latency) as server:
+        grafana = GrafanaApi(
+            auth=None, host="127.0.0.1", port=server.port, protocol="http", session_pool_size=max(args.workers)
+        )
+
+        start = time.perf_counter()
+        for uid in uids:
+            grafana.dashboard.get_dashboard(uid)
+        report("serial", time.perf_counter() - start, args.requests)
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            with grafana.parallel(max_workers=workers) as pool:
+                pool.map(grafana.dashboard.get_dashboard, uids)
+            report(f"parallel, {workers} workers", time.perf_counter() - start, args.requests)
+
+
+if __name__ == "__main__":
+    main()
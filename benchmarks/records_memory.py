@@ -0,0 +1,78 @@
+"""
+About
+=====
+
+Measure the memory retained by 100k search hits, decoded into plain
+dictionaries, and into compact `SearchHit` records with interned strings,
+using `tracemalloc`.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.records_memory
+    python -m benchmarks.records_memory --items 500000 --folders 1000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from grafana_client.records import SearchHit, decode_records
+
+TAGS = ["production", "staging", "team-a", "team-b", "kubernetes", "database", "network", "slo"]
+
+
+def make_payload(items: int, folders: int) -> bytes:
+    return json.dumps(
+        [
+            {
+                "id": i,
+                "uid": f"uid-{i:08d}",
+                "title": f"Dashboard {i}",
+                "uri": f"db/dashboard-{i}",
+                "url": f"/d/uid-{i:08d}/dashboard-{i}",
+                "slug": "",
+                "type": "dash-db",
+                "tags": [TAGS[i % len(TAGS)], TAGS[(i // 3) % len(TAGS)]],
+                "isStarred": False,
+                "folderId": i % folders,
+                "folderUid": f"folder-{i % folders}",
+                "folderTitle": f"Folder {i % folders}",
+                "folderUrl": f"/dashboards/f/folder-{i % folders}/",
+                "sortMeta": 0,
+            }
+            for i in range(items)
+        ]
+    ).encode("utf-8")
+
+
+def measure(label: str, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<10} {len(result):8d} items  {current / 1024 / 1024:8.1f} MiB retained  "
+        f"{peak / 1024 / 1024:8.1f} MiB peak  {elapsed:6.2f} s"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--folders", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = make_payload(args.items, args.folders)
+    measure("dicts", lambda: json.loads(payload))
+    measure("records", lambda: decode_records(SearchHit, json.loads(payload)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+About
+=====
+
+Measure the duration of decoding JSON arrays incrementally, using
+`iter_json_array`, in chunks like received by `stream=True`, compared with
+decoding them as a whole, using `json.loads`.
+
+Arrays of a few very large items, like dashboard JSON models, guard against
+regressions of the incremental parser's linear complexity: Each item must be
+decoded once, when it is complete, and not again with each chunk.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.streaming_items
+    python -m benchmarks.streaming_items --panels 30000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+
+from grafana_client.client import STREAM_CHUNK_SIZE
+from grafana_client.streaming import iter_json_array
+
+from .json_codec import make_dashboard
+
+
+def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def measure(label: str, func, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        count = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<28} {count:8d} items  {elapsed * 1e3:9.1f} ms")
+
+
+def run(title: str, items, repeat: int):
+    data = json.dumps(items).encode("utf-8")
+    print(f"\n{title}, {len(data) / 1024 / 1024:.1f} MiB")
+    measure("json.loads", lambda: len(json.loads(data)), repeat)
+    measure("iter_json_array", lambda: sum(1 for _ in iter_json_array(chunked(data, STREAM_CHUNK_SIZE))), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--panels", type=int, default=15000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    dashboard = make_dashboard(args.panels)
+    run(f"2 dashboards with {args.panels} panels", [dashboard, dashboard], args.repeat)
+    small = make_dashboard(10)
+    run(f"{args.panels // 5} dashboards with 10 panels", [small] * (args.panels // 5), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+About
+=====
+
+Measure peak memory and duration of decoding a large `/search` response,
+buffered, and streamed using `search_dashboards(stream=True)`, and of
+paging through the results using `iter_dashboards()`, against a local
+mock server.
+
+
+Synopsis
+========
+::
+
+    python -m benchmarks.streaming_memory
+    python -m benchmarks.streaming_memory --items 100000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from urllib.parse import parse_qs, urlsplit
+
+from grafana_client import GrafanaApi
+from grafana_client.elements.search import SEARCH_LIMIT
+from grafana_client.pagination import ramp_sizes
+
+from .stub import MockGrafanaServer
+
+
+def measure(label: str, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<20} {count:8d} items  {peak / 1024 / 1024:8.1f} MiB peak  {elapsed:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50000)
+    args = parser.parse_args()
+
+    hits = [
+        {
+            "id": i,
+            "uid": f"uid-{i}",
+            "title": f"Dashboard {i}",
+            "uri": f"db/dashboard-{i}",
+            "url": f"/d/uid-{i}/dashboard-{i}",
+            "type": "dash-db",
+            "tags": ["production", "team-a"],
+            "isStarred": False,
+            "folderUid": "folder",
+            "folderTitle": "Folder",
+        }
+        for i in range(args.items)
+    ]
+    results = json.dumps(hits).encode("utf-8")
+    # Encode pages upfront, so the mock server does not allocate memory while measuring.
+    pages = {
+        (limit, page): json.dumps(hits[(page - 1) * limit : page * limit]).encode("utf-8")
+        for limit in ramp_sizes(SEARCH_LIMIT, 1000)
+        for page in range(1, args.items // limit + 2)
+    }
+
+    def payload(path: str):
+        query = parse_qs(urlsplit(path).query)
+        if "page" not in query:
+            return results
+        return pages[(int(query["limit"][0]), int(query["page"][0]))]
+
+    with MockGrafanaServer(payload=payload) as server:
+        grafana = GrafanaApi(host="127.0.0.1", port=server.port, timeout=60)
+
+        def buffered():
+            return sum(1 for _ in grafana.search.search_dashboards())
+
+        def streamed():
+            return sum(1 for _ in grafana.search.search_dashboards(stream=True))
+
+        def paged():
+            return sum(1 for _ in grafana.search.iter_dashboards())
+
+        measure("buffered", buffered)
+        measure("streamed", streamed)
+        measure("paged", paged)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+About
+=====
+
+Local stub transports for running benchmarks without a Grafana instance.
+
+- `StubAdapter` and `AsyncStubAdapter` are mounted into a `niquests` session,
+  and answer each request with a canned response, without touching the network.
+  They are suitable to measure the per-call overhead of the client itself.
+- `MockGrafanaServer` is a threaded HTTP server on localhost, which answers each
+  request after an artificial latency. It is suitable to measure throughput of
+  concurrent requests over real connections.
+"""
+
+import io
+import json
+import threading
+import time
+import typing as t
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import niquests
+from niquests.adapters import AsyncBaseAdapter, BaseAdapter
+from niquests.structures import CaseInsensitiveDict
+
+Payload = t.Union[bytes, t.Dict, t.List, t.Callable[[niquests.PreparedRequest], t.Any]]
+
+
+def make_response(request: niquests.PreparedRequest, payload: Payload, status_code: int = 200) -> niquests.Response:
+    """
+    Build a `niquests.Response` object from a static or computed payload.
+    """
+    if callable(payload):
+        payload = payload(request)
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload).encode("utf-8")
+    response = niquests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    response._content = payload
+    response._content_consumed = True
+    response.raw = io.BytesIO(payload)
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class StubAdapter(BaseAdapter):
+    """
+    A synchronous transport adapter which responds with a canned payload.
+    """
+
+    def __init__(self, payload: Payload = b"{}"):
+        super().__init__()
+        self.payload = payload
+        self.request_count = 0
+
+    def send(self, request, **kwargs):  # noqa: ARG002
+        self.request_count += 1
+        return make_response(request, self.payload)
+
+    def close(self):
+        pass
+
+
+class AsyncStubAdapter(AsyncBaseAdapter):
+    """
+    An asynchronous transport adapter which responds with a canned payload.
+    """
+
+    def __init__(self, payload: Payload = b"{}"):
+        super().__init__()
+        self.payload = payload
+        self.request_count = 0
+
+    async def send(self, request, **kwargs):  # noqa: ARG002
+        self.request_count += 1
+        return make_response(request, self.payload)
+
+    async def close(self):
+        pass
+
+
+def mount_stub(client, payload: Payload = b"{}"):
+    """
+    Mount a stub adapter into the session of a `GrafanaClient` or `AsyncGrafanaClient`.
+    """
+    if isinstance(client.s, niquests.AsyncSession):
+        adapter = AsyncStubAdapter(payload)
+    else:
+        adapter = StubAdapter(payload)
+    client.s.mount("http://", adapter)
+    client.s.mount("https://", adapter)
+    return adapter
+
+
+class MockGrafanaServer:
+    """
+    A threaded HTTP server on localhost, answering all requests with a JSON
+    document, after waiting for `latency` seconds. Use it as a context manager.
+
+    `payload` computes the response from the request path, either as JSON
+    serializable value, or as pre-encoded bytes.
+    """
+
+    def __init__(self, latency: float = 0.0, payload: t.Optional[t.Callable[[str], t.Any]] = None):
+        self.latency = latency
+        self.payload = payload or (lambda path: {"dashboard": {"uid": path.rsplit("/", 1)[-1]}})
+        self.request_count = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Avoid delayed ACK stalls on small responses, written in multiple segments.
+            disable_nagle_algorithm = True
+
+            def handle_request(self):
+                server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.payload(self.path)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+            def log_message(self, format, *args):  # noqa: A002
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -11,7 +11,7 @@ Synopsis
 ::
 
     source .venv/bin/activate
-    python examples/folders-dashboard.py | jq
+    python examples/async-folders-dashboard.py | jq
 """
 
 import asyncio
@@ -22,12 +22,6 @@ from time import perf_counter
 from grafana_client import AsyncGrafanaApi
 
 
-async def fetch_dashboard(grafana, uid):
-    print(f"## Dashboard with UID {uid} at play.grafana.org", file=sys.stderr)
-    dashboard = await grafana.dashboard.get_dashboard(uid)
-    print(json.dumps(dashboard, indent=2))
-
-
 async def main():
     before = perf_counter()
     # Connect to public Grafana instance of Grafana Labs fame.
@@ -37,15 +31,17 @@ async def main():
     folders = await grafana.folder.get_all_folders()
     print(json.dumps(folders, indent=2))
 
-    tasks = []
+    uids = [folder["uid"] for folder in folders if folder["id"] > 0][:4]
 
-    for folder in folders:
-        if folder["id"] > 0:
-            tasks.append(fetch_dashboard(grafana, folder["uid"]))
-            if len(tasks) == 4:
-                break
+    # Fetch dashboards concurrently, bounded by the session pool size,
+    # and process results in completion order.
+    async for item in grafana.map((grafana.dashboard.get_dashboard, uid) for uid in uids):
+        print(f"## Dashboard with UID {uids[item.index]} at play.grafana.org", file=sys.stderr)
+        if item.ok:
+            print(json.dumps(item.value, indent=2))
+        else:
+            print(f"ERROR: {item.error}", file=sys.stderr)
 
-    await asyncio.gather(*tasks)
     print(f"## Completed in {perf_counter() - before}s", file=sys.stderr)
 
 
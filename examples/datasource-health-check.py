@@ -13,7 +13,6 @@ import niquests
 from verlib2 import Version
 
 from grafana_client import GrafanaApi
-from grafana_client.model import DatasourceHealthResponse
 from grafana_client.util import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -39,26 +38,15 @@ def run(grafana: GrafanaApi):
 
     success = True
     statistics = {"ok": 0, "error": 0, "fatal": 0, "unknown": 0}
-    for datasource in datasources:
-        logger.info(f"Discovered datasource with uid={datasource['uid']} and type={datasource['type']}")
-
-        # Invoke the health check.
-        try:
-            health_info = grafana.datasource.health_inquiry(datasource_uid=datasource["uid"])
-            if health_info.success:
-                statistics["ok"] += 1
-            else:
-                if health_info.status == "FATAL":
-                    statistics["fatal"] += 1
-                else:
-                    statistics["error"] += 1
-        except NotImplementedError as ex:
-            message = f"{ex.__class__.__name__}: {ex}"
-            health_info = DatasourceHealthResponse(
-                uid=datasource["uid"], type=datasource["type"], success=False, status="UNKNOWN", message=message
-            )
-            statistics["unknown"] += 1
-            logger.exception(message)
+
+    # Invoke the health checks concurrently, and process the outcomes as they complete.
+    for health_info in grafana.datasource.health_sweep(datasources=datasources):
+        if health_info.success:
+            statistics["ok"] += 1
+        elif health_info.status in ["FATAL", "UNKNOWN"]:
+            statistics[health_info.status.lower()] += 1
+        else:
+            statistics["error"] += 1
 
         # Display the outcome and terminate program based on success state.
         print(json.dumps(health_info.asdict_compact(), indent=2))
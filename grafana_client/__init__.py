@@ -4,7 +4,16 @@ except ModuleNotFoundError:  # pragma: no cover
     from importlib_metadata import PackageNotFoundError, version
 
 from .api import AsyncGrafanaApi, GrafanaApi  # noqa:E402,F401
+from .breaker import CircuitBreaker  # noqa:E402,F401
+from .cache import CacheRule, ResponseCache  # noqa:E402,F401
+from .capabilities import Capabilities  # noqa:E402,F401
 from .client import HeaderAuth, TokenAuth  # noqa:E402,F401
+from .codec import JsonCodec  # noqa:E402,F401
+from .connection import ConnectionOptions  # noqa:E402,F401
+from .index import DatasourceIndex  # noqa:E402,F401
+from .querycache import QueryResultCache  # noqa:E402,F401
+from .ratelimit import RateLimit, RateLimiter  # noqa:E402,F401
+from .retry import RetryPolicy  # noqa:E402,F401
 
 __appname__ = "grafana-client"
 
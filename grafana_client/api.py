@@ -1,7 +1,7 @@
 import logging
 import os
 import warnings
-from typing import Tuple, Union
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
 from urllib.parse import parse_qs, urlparse
 
 import niquests
@@ -9,7 +9,13 @@ import niquests.auth
 from urllib3.exceptions import InsecureRequestWarning
 from verlib2 import Version
 
+from .batch import Batch
+from .cache import CacheRule, ResponseCache
+from .capabilities import Capabilities, CapabilityRegistry
 from .client import DEFAULT_SESSION_POOL_SIZE, DEFAULT_TIMEOUT, AsyncGrafanaClient, GrafanaClient
+from .codec import JsonCodec
+from .concurrency import ParallelExecutor, TaskResult, TaskSpec, agather_bounded, amap_bounded
+from .connection import ConnectionOptions
 from .elements import (
     Admin,
     Alerting,
@@ -56,12 +62,18 @@ from .elements._async import (
     AsyncUser,
     AsyncUsers,
 )
+from .ratelimit import RateLimit, RateLimiter
+from .retry import RetryPolicy
 from .util import as_bool
 
 logger = logging.getLogger(__name__)
 
 
-class GrafanaApi:
+class BaseGrafanaApi:
+    """
+    The API shared by `GrafanaApi` and `AsyncGrafanaApi`.
+    """
+
     def __init__(
         self,
         auth=None,
@@ -74,6 +86,12 @@ class GrafanaApi:
         user_agent: str = None,
         organization_id: int = None,
         session_pool_size=DEFAULT_SESSION_POOL_SIZE,
+        retry: Union[RetryPolicy, int, bool, None] = None,
+        rate_limit: Union[RateLimiter, RateLimit, List[RateLimit], None] = None,
+        connection: Union[ConnectionOptions, Dict[str, Any], None] = None,
+        json_codec: Union[JsonCodec, str, None] = None,
+        cache: Union[ResponseCache, CacheRule, List[CacheRule], bool, None] = None,
+        capabilities_ttl: Optional[float] = None,
     ):
         self.client = GrafanaClient(
             auth,
@@ -86,6 +104,11 @@ class GrafanaApi:
             user_agent=user_agent,
             organization_id=organization_id,
             session_pool_size=session_pool_size,
+            retry=retry,
+            rate_limit=rate_limit,
+            connection=connection,
+            json_codec=json_codec,
+            cache=cache,
         )
         self.url = None
         self.admin = Admin(self.client)
@@ -109,26 +132,39 @@ class GrafanaApi:
         self.plugin = Plugin(self.client)
         self.serviceaccount = ServiceAccount(self.client)
         self.libraryelement = LibraryElement(self.client, self)
+        self.capability_registry = CapabilityRegistry(ttl=capabilities_ttl)
         self._grafana_info = None
 
     def connect(self):
         try:
-            self._grafana_info = self.health.check()
+            self.refresh_capabilities()
         except niquests.exceptions.ConnectionError as ex:
             logger.critical(f"Unable to connect to Grafana at {self.url or self.client.url_host}: {ex}")
             raise
         logger.info(f"Connected to Grafana at {self.url}: {self._grafana_info}")
         return self._grafana_info
 
+    def refresh_capabilities(self) -> Capabilities:
+        """
+        Probe the version, edition, and feature toggles of the Grafana instance.
+        """
+        capabilities = self.capability_registry.update(self.health.frontend_settings())
+        self._grafana_info = capabilities.build_info
+        return capabilities
+
+    @property
+    def capabilities(self) -> Capabilities:
+        """
+        Return the capabilities of the Grafana instance, probing them on first use, or when expired.
+        """
+        capabilities = self.capability_registry.get()
+        if capabilities is None:
+            capabilities = self.refresh_capabilities()
+        return capabilities
+
     @property
     def version(self) -> str:
-        if not self._grafana_info:
-            self._grafana_info = self.health.check()
-        version = self._grafana_info.get("version", None)
-        if version:
-            version = str(version).rsplit("-")[0]
-        logger.info(f"Inquired Grafana version: {version}")
-        return version
+        return self.capabilities.version
 
     def get_version(self) -> Version:
         return Version(self.version)
@@ -139,12 +175,32 @@ class GrafanaApi:
         url: str = None,
         credential: Union[str, Tuple[str, str], niquests.auth.AuthBase] = None,
         timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        retry: Union[RetryPolicy, int, bool, None] = None,
+        rate_limit: Union[RateLimiter, RateLimit, List[RateLimit], None] = None,
+        connection: Union[ConnectionOptions, Dict[str, Any], None] = None,
+        json_codec: Union[JsonCodec, str, None] = None,
+        cache: Union[ResponseCache, CacheRule, List[CacheRule], bool, None] = None,
+        capabilities_ttl: Optional[float] = None,
     ):
         """
         Factory method to create a `GrafanaApi` instance from a URL.
 
         Accepts an optional credential, which is either an authentication
         token, or a tuple of (username, password).
+
+        Accepts an optional retry policy, which is either a `RetryPolicy`
+        instance, or the maximum number of attempts.
+
+        Accepts optional `ConnectionOptions`, either as instance, or as dictionary.
+
+        Accepts an optional JSON codec, either as `JsonCodec` instance, or by name,
+        like `json`, `orjson`, or `msgspec`.
+
+        Accepts an optional response cache, either as `ResponseCache` instance,
+        as list of `CacheRule` items, or `True` for using the default rules.
+
+        Accepts an optional time-to-live in seconds for the detected capabilities
+        of the Grafana instance, like its version. By default, they never expire.
         """
 
         # Sanity checks and defaults.
@@ -174,13 +230,23 @@ class GrafanaApi:
             url_path_prefix=url.path.lstrip("/"),
             verify=verify,
             timeout=timeout,
+            retry=retry,
+            rate_limit=rate_limit,
+            connection=connection,
+            json_codec=json_codec,
+            cache=cache,
+            capabilities_ttl=capabilities_ttl,
         )
         grafana.url = original_url
 
         return grafana
 
     @classmethod
-    def from_env(cls, timeout: Union[float, Tuple[float, float]] = None):
+    def from_env(
+        cls,
+        timeout: Union[float, Tuple[float, float]] = None,
+        retry: Union[RetryPolicy, int, bool, None] = None,
+    ):
         """
         Factory method to create a `GrafanaApi` instance from environment variables.
         """
@@ -194,12 +260,65 @@ class GrafanaApi:
                     )
         if timeout is None:
             timeout = DEFAULT_TIMEOUT
+        if retry is None and "GRAFANA_RETRIES" in os.environ:
+            try:
+                retry = int(os.environ["GRAFANA_RETRIES"])
+            except Exception as ex:
+                raise ValueError(
+                    f"Unable to parse invalid `int` value from `GRAFANA_RETRIES` environment variable: {ex}"
+                )
         return cls.from_url(
-            url=os.environ.get("GRAFANA_URL"), credential=os.environ.get("GRAFANA_TOKEN"), timeout=timeout
+            url=os.environ.get("GRAFANA_URL"),
+            credential=os.environ.get("GRAFANA_TOKEN"),
+            timeout=timeout,
+            retry=retry,
         )
 
 
-class AsyncGrafanaApi(GrafanaApi):
+class GrafanaApi(BaseGrafanaApi):
+    """
+    The synchronous API, additionally supporting batches of lazy requests, and running API calls on a thread pool.
+    """
+
+    def batch(self) -> Batch:
+        """
+        Return a context manager, within which API calls return lazy `BatchHandle` objects,
+        which are resolved together when the block exits. The requests are submitted over
+        a multiplexed session, so many of them can be in flight on a single HTTP/2 or
+        HTTP/3 connection.
+
+        Example::
+
+            with grafana.batch():
+                handles = [grafana.dashboard.get_dashboard(uid) for uid in uids]
+            dashboards = [handle.result() for handle in handles]
+        """
+        return self.client.batch()
+
+    def parallel(self, max_workers: Optional[int] = None) -> ParallelExecutor:
+        """
+        Return a thread pool executor for running many API calls in parallel.
+
+        The number of workers defaults to the session pool size, so that each
+        worker can use its own connection.
+
+        Example::
+
+            with grafana.parallel(max_workers=8) as pool:
+                dashboards = pool.map(grafana.dashboard.get_dashboard, uids)
+        """
+        pool_size = self.client.session_pool_size
+        if max_workers is None:
+            max_workers = pool_size
+        elif max_workers > pool_size:
+            logger.warning(
+                f"Number of workers ({max_workers}) exceeds session pool size ({pool_size}), "
+                f"surplus connections will not be reused"
+            )
+        return ParallelExecutor(max_workers=max_workers)
+
+
+class AsyncGrafanaApi(BaseGrafanaApi):
     def __init__(
         self,
         auth=None,
@@ -211,6 +330,13 @@ class AsyncGrafanaApi(GrafanaApi):
         timeout=DEFAULT_TIMEOUT,
         user_agent: str = None,
         organization_id: int = None,
+        session_pool_size=DEFAULT_SESSION_POOL_SIZE,
+        retry: Union[RetryPolicy, int, bool, None] = None,
+        rate_limit: Union[RateLimiter, RateLimit, List[RateLimit], None] = None,
+        connection: Union[ConnectionOptions, Dict[str, Any], None] = None,
+        json_codec: Union[JsonCodec, str, None] = None,
+        cache: Union[ResponseCache, CacheRule, List[CacheRule], bool, None] = None,
+        capabilities_ttl: Optional[float] = None,
     ):
         self.client = AsyncGrafanaClient(
             auth,
@@ -222,6 +348,12 @@ class AsyncGrafanaApi(GrafanaApi):
             timeout=timeout,
             user_agent=user_agent,
             organization_id=organization_id,
+            session_pool_size=session_pool_size,
+            retry=retry,
+            rate_limit=rate_limit,
+            connection=connection,
+            json_codec=json_codec,
+            cache=cache,
         )
         self.url = None
         self.admin = AsyncAdmin(self.client)
@@ -245,22 +377,61 @@ class AsyncGrafanaApi(GrafanaApi):
         self.plugin = AsyncPlugin(self.client)
         self.serviceaccount = AsyncServiceAccount(self.client)
         self.libraryelement = AsyncLibraryElement(self.client, self)
+        self.capability_registry = CapabilityRegistry(ttl=capabilities_ttl)
 
         self._grafana_info = None
 
     async def connect(self):
         try:
-            self._grafana_info = await self.health.check()
+            await self.refresh_capabilities()
         except niquests.exceptions.ConnectionError as ex:  # pragma: no cover
             logger.critical(f"Unable to connect to Grafana at {self.url or self.client.url_host}: {ex}")
             raise
         logger.info(f"Connected to Grafana at {self.url}: {self._grafana_info}")
         return self._grafana_info
 
+    async def refresh_capabilities(self) -> Capabilities:
+        capabilities = self.capability_registry.update(await self.health.frontend_settings())
+        self._grafana_info = capabilities.build_info
+        return capabilities
+
+    @property
+    async def capabilities(self) -> Capabilities:
+        capabilities = self.capability_registry.get()
+        if capabilities is None:
+            capabilities = await self.refresh_capabilities()
+        return capabilities
+
     @property
     async def version(self):
-        if not self._grafana_info:
-            self._grafana_info = await self.health.check()
-        version = self._grafana_info["version"]
-        logger.info(f"Inquired Grafana version: {version}")
-        return version
+        return (await self.capabilities).version
+
+    def map(self, tasks: Iterable[TaskSpec], concurrency: Optional[int] = None) -> AsyncIterator[TaskResult]:
+        """
+        Run many API calls concurrently, and stream their results in completion order.
+
+        Tasks are either coroutine factories, or tuples of `(method, args)`. At most
+        `concurrency` calls will be in flight, defaulting to the session pool size.
+        Each result is a `TaskResult`, carrying either a `value`, or an `error`.
+
+        Example::
+
+            async for item in grafana.map((grafana.dashboard.get_dashboard, uid) for uid in uids):
+                if item.ok:
+                    print(item.index, item.value)
+        """
+        return amap_bounded(tasks, concurrency or self.client.session_pool_size)
+
+    async def gather_bounded(
+        self, tasks: Iterable[TaskSpec], concurrency: Optional[int] = None, return_exceptions: bool = True
+    ) -> List:
+        """
+        Run many API calls concurrently, and return their results in input order.
+
+        By default, exceptions are returned in place of results, like `asyncio.gather` does
+        with `return_exceptions=True`. Otherwise, the first error is raised, and all pending
+        calls are cancelled.
+        """
+        return await agather_bounded(
+            tasks, concurrency or self.client.session_pool_size, return_exceptions=return_exceptions
+        )
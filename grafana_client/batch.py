@@ -0,0 +1,173 @@
+"""
+About
+=====
+Submit many requests at once over a multiplexed HTTP session, and resolve
+them together, so that a synchronous program gets near-async throughput over
+a single HTTP/2 or HTTP/3 connection.
+
+Within a `Batch`, request runners like `GrafanaClient.GET` return a
+`BatchHandle` instead of the decoded response. All handles are resolved when
+the batch exits, each one mapping HTTP errors to `GrafanaException` types
+individually.
+
+Requests within a batch are not retried. Element methods which post-process
+responses can not be used within a batch, because the response is not
+available at that time.
+
+Each thread submits its batches over its own multiplexed session. A
+`request_timeout` applies to requests submitted within its block. Rate limits
+apply when submitting requests, but the `max_in_flight` bound of a
+`RateLimit` does not, because responses are only awaited when the batch
+resolves.
+"""
+
+import functools
+import logging
+import typing as t
+
+import niquests
+from niquests import RequestException
+
+if t.TYPE_CHECKING:
+    from .client import GrafanaClient
+
+logger = logging.getLogger(__name__)
+
+_PENDING = object()
+
+
+class BatchHandle:
+    """
+    A lazy handle on the response of a request submitted within a batch.
+    """
+
+    def __init__(self, method: str, url: str, resolver: t.Callable[[], t.Any]):
+        self.method = method
+        self.url = url
+        self._resolver = resolver
+        self._value: t.Any = _PENDING
+        self._error: t.Optional[BaseException] = None
+
+    def __repr__(self):
+        state = "pending" if not self.done else "failed" if self._error is not None else "resolved"
+        return f"<BatchHandle {self.method.upper()} {self.url} [{state}]>"
+
+    @property
+    def done(self) -> bool:
+        return self._value is not _PENDING or self._error is not None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def error(self) -> t.Optional[BaseException]:
+        self.resolve()
+        return self._error
+
+    def resolve(self):
+        if self.done:
+            return
+        try:
+            self._value = self._resolver()
+        except Exception as ex:
+            self._error = ex
+
+    def result(self) -> t.Any:
+        """
+        Return the decoded response, or raise the mapped `GrafanaException`.
+        """
+        self.resolve()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class Batch:
+    """
+    A context manager collecting requests into lazy handles, resolving them on exit.
+
+    Obtain it by `GrafanaApi.batch()`::
+
+        with grafana.batch():
+            handles = [grafana.dashboard.get_dashboard(uid) for uid in uids]
+        dashboards = [handle.result() for handle in handles]
+    """
+
+    def __init__(self, client: "GrafanaClient"):
+        self.client = client
+        self.handles: t.List[BatchHandle] = []
+        self.previous: t.Optional["Batch"] = None
+        self._session: t.Optional[niquests.Session] = None
+
+    def __enter__(self):
+        self.client._enter_batch(self)
+        return self
+
+    def __exit__(self, *args):
+        self.client._exit_batch(self)
+        self.resolve()
+
+    @property
+    def session(self) -> niquests.Session:
+        if self._session is None:
+            self._session = self.client._multiplexed_session()
+        return self._session
+
+    def submit(
+        self, method, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, timeout=None
+    ):
+        """
+        Submit a request without waiting for its response, and return a `BatchHandle`.
+
+        `timeout` overrides the timeout of the session, like `request_timeout` does.
+        """
+        self.client._ensure_valid_json_arg(json)
+        try:
+            with self.client._limit(method, url):
+                response = self.session.request(
+                    method,
+                    self.client.url + url,
+                    json=json,
+                    data=data,
+                    params=params,
+                    headers=headers,
+                    verify=self.client.verify,
+                    timeout=timeout,
+                )
+        except RequestException as ex:
+            # Defer the error to the handle.
+            response = ex
+        handle = BatchHandle(
+            method, url, functools.partial(self.client._extract_batch_response, response, accept_empty_json)
+        )
+        self.handles.append(handle)
+        return handle
+
+    def resolve(self):
+        """
+        Wait for all responses, and resolve all handles.
+        """
+        if not self.handles:
+            return
+        try:
+            self.session.gather()
+        except RequestException as ex:
+            # Errors are raised by the individual handles.
+            logger.debug(f"Resolving batch failed: {ex}")
+        cache = self.client.cache
+        for handle in self.handles:
+            handle.resolve()
+            if cache is not None and handle.method != "get":
+                cache.invalidate(handle.url)
+
+    def results(self, return_exceptions: bool = True) -> t.List[t.Any]:
+        """
+        Return the values of all handles in submission order.
+
+        With `return_exceptions`, errors are returned in place of the values.
+        Otherwise, the first error is raised.
+        """
+        if not return_exceptions:
+            return [handle.result() for handle in self.handles]
+        return [handle.result() if handle.ok else handle.error for handle in self.handles]
@@ -0,0 +1,326 @@
+"""
+About
+=====
+An optional circuit breaker per data source, fed by query failures and
+health check results, in order to fail fast instead of waiting for the full
+timeout of requests to data sources which are down.
+
+- Each data source has its own circuit, keyed by its uid. Queries by id
+  resolve the uid once, using the data source index when enabled. Outcomes of
+  queries are kept within a rolling window of `window` seconds.
+- When at least `min_calls` outcomes are within the window, and the share of
+  failures reaches `failure_ratio`, the circuit opens. Queries then raise
+  `CircuitOpenError` immediately, without sending a request.
+- After `reset_timeout` seconds, the circuit becomes half-open, and lets
+  `half_open_calls` trial queries pass. A successful trial closes the circuit,
+  a failed one opens it again.
+- Successful health checks close the circuit, failed ones count as failures.
+  Health checks are never blocked by an open circuit.
+
+Server errors, timeouts, and connection errors count as failures. Other
+errors, like `400 Bad Request`, prove the data source is reachable.
+
+The breaker keeps a compact ring buffer of recent health check results per
+data source, for inspecting trends, and exporting them.
+
+Enable it on the `Datasource` element::
+
+    grafana.datasource.breaker = CircuitBreaker(window=60, failure_ratio=0.5, reset_timeout=30)
+    grafana.datasource.breaker.state("h8KkCLt7z")
+    grafana.datasource.breaker.history.export()
+"""
+
+import collections
+import contextlib
+import contextvars
+import threading
+import time
+import typing as t
+
+import niquests
+
+from .client import GrafanaException, GrafanaServerError, GrafanaTimeoutError
+
+if t.TYPE_CHECKING:
+    from .model import DatasourceHealthResponse
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+FAILURES: t.Tuple[t.Type[BaseException], ...] = (
+    GrafanaServerError,
+    GrafanaTimeoutError,
+    niquests.exceptions.ConnectionError,
+    niquests.exceptions.Timeout,
+)
+
+# Set while running health checks, which must pass open circuits.
+_probing: contextvars.ContextVar = contextvars.ContextVar("grafana_client_probing", default=False)
+
+
+@contextlib.contextmanager
+def probe():
+    """
+    Let requests within the block pass open circuits, without recording their outcomes.
+    """
+    token = _probing.set(True)
+    try:
+        yield
+    finally:
+        _probing.reset(token)
+
+
+class CircuitOpenError(GrafanaException):
+    """
+    Raised instead of sending a request to a data source whose circuit is open.
+    """
+
+    def __init__(self, key: str, retry_after: float):
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(503, None, f"Circuit open for data source '{key}', retry after {retry_after:.1f} seconds")
+
+
+class HealthRecord(t.NamedTuple):
+    """
+    A compact record of a health check result.
+    """
+
+    timestamp: float
+    status: str
+    success: bool
+    duration: t.Optional[float]
+    message: t.Optional[str]
+
+
+class HealthHistory:
+    """
+    Keep the most recent `size` health check results per data source, in ring buffers.
+    """
+
+    def __init__(self, size: int = 64, clock: t.Callable[[], float] = time.time):
+        if size < 1:
+            raise ValueError("History size must be at least 1")
+        self.size = size
+        self.clock = clock
+        self.records: t.Dict[str, t.Deque[HealthRecord]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, health: "DatasourceHealthResponse") -> HealthRecord:
+        record = HealthRecord(
+            timestamp=self.clock(),
+            status=health.status,
+            success=health.success,
+            duration=health.duration,
+            message=health.message,
+        )
+        with self.lock:
+            if health.uid not in self.records:
+                self.records[health.uid] = collections.deque(maxlen=self.size)
+            self.records[health.uid].append(record)
+        return record
+
+    def get(self, uid: str) -> t.List[HealthRecord]:
+        """
+        Return the recent health check results of a data source, oldest first.
+        """
+        with self.lock:
+            return list(self.records.get(uid, ()))
+
+    def latest(self, uid: str) -> t.Optional[HealthRecord]:
+        with self.lock:
+            records = self.records.get(uid)
+            return records[-1] if records else None
+
+    def success_ratio(self, uid: str) -> t.Optional[float]:
+        records = self.get(uid)
+        if not records:
+            return None
+        return sum(record.success for record in records) / len(records)
+
+    def export(self) -> t.Dict[str, t.List[t.Dict[str, t.Any]]]:
+        """
+        Return all recent health check results by data source uid, as dictionaries.
+        """
+        with self.lock:
+            return {uid: [record._asdict() for record in records] for uid, records in self.records.items()}
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+
+class Circuit:
+    """
+    The state of the circuit of a single data source.
+    """
+
+    def __init__(self):
+        self.state = CLOSED
+        self.outcomes: t.Deque[t.Tuple[float, bool]] = collections.deque()
+        self.opened_at = 0.0
+        self.trials = 0
+
+
+class CircuitBreaker:
+    """
+    A thread-safe circuit breaker, with one circuit per data source.
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        min_calls: int = 5,
+        failure_ratio: float = 0.5,
+        reset_timeout: float = 30.0,
+        half_open_calls: int = 1,
+        history_size: int = 64,
+        failures: t.Tuple[t.Type[BaseException], ...] = FAILURES,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        if window <= 0:
+            raise ValueError("Window must be positive")
+        if min_calls < 1:
+            raise ValueError("Minimum number of calls must be at least 1")
+        if not 0 < failure_ratio <= 1:
+            raise ValueError("Failure ratio must be within (0, 1]")
+        if half_open_calls < 1:
+            raise ValueError("Number of half-open calls must be at least 1")
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.failures = failures
+        self.clock = clock
+        self.history = HealthHistory(size=history_size)
+        self.circuits: t.Dict[str, Circuit] = {}
+        self.lock = threading.Lock()
+
+    def state(self, key: t.Union[str, int]) -> str:
+        """
+        Return the state of the circuit of a data source, one of `closed`, `open`, or `half-open`.
+        """
+        with self.lock:
+            circuit = self.circuits.get(str(key))
+            if circuit is None:
+                return CLOSED
+            self._expire(circuit)
+            return circuit.state
+
+    def before(self, key: t.Union[str, int]):
+        """
+        Admit a request to a data source, or raise `CircuitOpenError`.
+        """
+        key = str(key)
+        with self.lock:
+            circuit = self.circuits.setdefault(key, Circuit())
+            self._expire(circuit)
+            if circuit.state == CLOSED:
+                return
+            if circuit.state == HALF_OPEN and circuit.trials < self.half_open_calls:
+                circuit.trials += 1
+                return
+            retry_after = max(circuit.opened_at + self.reset_timeout - self.clock(), 0.0)
+        raise CircuitOpenError(key, retry_after)
+
+    def record_success(self, key: t.Union[str, int]):
+        with self.lock:
+            circuit = self.circuits.setdefault(str(key), Circuit())
+            if circuit.state == CLOSED:
+                self._add(circuit, True)
+            else:
+                self._close(circuit)
+
+    def record_failure(self, key: t.Union[str, int]):
+        with self.lock:
+            circuit = self.circuits.setdefault(str(key), Circuit())
+            if circuit.state == HALF_OPEN:
+                self._open(circuit)
+                return
+            self._add(circuit, False)
+            failures = sum(1 for _, ok in circuit.outcomes if not ok)
+            if (
+                circuit.state == CLOSED
+                and len(circuit.outcomes) >= self.min_calls
+                and failures >= self.failure_ratio * len(circuit.outcomes)
+            ):
+                self._open(circuit)
+
+    def record_health(self, health: "DatasourceHealthResponse"):
+        """
+        Record a health check result in the history, and feed it to the circuit of its data source.
+
+        Results with status `UNKNOWN`, of data sources not supported by health checks, are only recorded.
+        """
+        self.history.record(health)
+        if health.success:
+            self.record_success(health.uid)
+        elif health.status != "UNKNOWN":
+            self.record_failure(health.uid)
+
+    @contextlib.contextmanager
+    def guard(self, key: t.Union[str, int]):
+        """
+        Admit a request to a data source, and record its outcome.
+        """
+        if _probing.get():
+            yield
+            return
+        self.before(key)
+        try:
+            yield
+        except self.failures:
+            self.record_failure(key)
+            raise
+        except Exception:
+            self.record_success(key)
+            raise
+        except BaseException:
+            self._release(key)
+            raise
+        else:
+            self.record_success(key)
+
+    def reset(self, key: t.Union[str, int, None] = None):
+        """
+        Close the circuit of a data source, or all circuits.
+        """
+        with self.lock:
+            if key is None:
+                self.circuits.clear()
+            else:
+                self.circuits.pop(str(key), None)
+
+    def states(self) -> t.Dict[str, str]:
+        with self.lock:
+            for circuit in self.circuits.values():
+                self._expire(circuit)
+            return {key: circuit.state for key, circuit in self.circuits.items()}
+
+    def _add(self, circuit: Circuit, ok: bool):
+        now = self.clock()
+        circuit.outcomes.append((now, ok))
+        while circuit.outcomes and circuit.outcomes[0][0] <= now - self.window:
+            circuit.outcomes.popleft()
+
+    def _expire(self, circuit: Circuit):
+        if circuit.state == OPEN and self.clock() >= circuit.opened_at + self.reset_timeout:
+            circuit.state = HALF_OPEN
+            circuit.trials = 0
+
+    def _open(self, circuit: Circuit):
+        circuit.state = OPEN
+        circuit.opened_at = self.clock()
+        circuit.outcomes.clear()
+
+    def _close(self, circuit: Circuit):
+        circuit.state = CLOSED
+        circuit.outcomes.clear()
+
+    def _release(self, key: str):
+        with self.lock:
+            circuit = self.circuits.get(str(key))
+            if circuit is not None and circuit.state == HALF_OPEN and circuit.trials > 0:
+                circuit.trials -= 1
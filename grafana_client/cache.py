@@ -0,0 +1,322 @@
+"""
+About
+=====
+An optional response cache for read-heavy Grafana HTTP API endpoints.
+
+The cache is configured by `CacheRule` items, each one applying a time-to-live
+to API paths starting with a prefix, like `/frontend/settings`, or
+`/dashboards/uid/`. Rules not applying to `subpaths` only match the prefix,
+and paths extending it by a single segment, so `/datasources/uid/` matches
+`/datasources/uid/foo`, but not `/datasources/uid/foo/health`. Only successful
+JSON responses to `GET` requests with a non-empty body are cached, as raw bytes,
+so callers always receive a fresh copy of the decoded document.
+
+- Entries are evicted in least-recently-used order, when exceeding the maximum
+  number of entries, or the maximum number of bytes.
+- When an expired entry carries an `ETag`, it is revalidated using an
+  `If-None-Match` request header. When the server responds with
+  `304 Not Modified`, the entry is refreshed without transferring the body.
+- Write requests, like `POST`, `PUT`, `PATCH`, and `DELETE`, invalidate all
+  entries of the rules they match, by default all entries below the same
+  top-level API path, like `/dashboards`, both when sending the request, and
+  after receiving its response. Responses to `GET` requests in flight while
+  entries were invalidated are not stored. Requests using `POST` for reading,
+  like queries through the data source proxy, don't invalidate any entries.
+"""
+
+import collections
+import dataclasses
+import threading
+import time
+import typing as t
+from urllib.parse import urlencode
+
+# API paths accepting `POST` requests for reading.
+READ_ONLY_PATHS = ("/datasources/proxy/", "/ds/query")
+
+
+def resource_root(path: str) -> str:
+    """
+    Return the top-level segment of an API path, like `/dashboards` for `/dashboards/uid/foo`.
+    """
+    return "/" + path.lstrip("/").split("?", 1)[0].split("/", 1)[0]
+
+
+def read_only_write(path: str) -> bool:
+    """
+    Whether a write request to the given API path only reads, like a query through the data source proxy.
+    """
+    path = path.split("?", 1)[0]
+    return path.startswith(READ_ONLY_PATHS) or "/resources/" in path
+
+
+@dataclasses.dataclass
+class CacheRule:
+    """
+    Cache successful `GET` responses for API paths starting with `path_prefix`, for `ttl` seconds.
+
+    Without `subpaths`, the rule only applies to `path_prefix` itself, and to paths extending
+    it by a single segment, but not to nested paths below them.
+
+    `invalidated_by` is a collection of API path prefixes. Write requests to any of them invalidate
+    all entries of this rule. It defaults to the top-level segment of `path_prefix`.
+    """
+
+    path_prefix: str
+    ttl: float = 60.0
+    invalidated_by: t.Optional[t.Collection[str]] = None
+    subpaths: bool = True
+
+    def __post_init__(self):
+        if self.ttl < 0:
+            raise ValueError("Time-to-live must not be negative")
+        if self.invalidated_by is None:
+            self.invalidated_by = (resource_root(self.path_prefix),)
+        else:
+            self.invalidated_by = tuple(self.invalidated_by)
+
+    def matches(self, path: str) -> bool:
+        path = path.split("?", 1)[0]
+        if not path.startswith(self.path_prefix):
+            return False
+        return self.subpaths or "/" not in path[len(self.path_prefix) :].lstrip("/")
+
+    def invalidated_by_write(self, path: str) -> bool:
+        return any(path.startswith(prefix) for prefix in self.invalidated_by)
+
+
+DEFAULT_CACHE_RULES = [
+    # `/frontend/settings` is not cached, so capability probes and health checks see upgrades right away.
+    # Listings and lookups, but neither health checks, metrics, nor proxied requests below them.
+    CacheRule("/datasources", ttl=60, subpaths=False),
+    CacheRule("/datasources/uid/", ttl=60, subpaths=False),
+    CacheRule("/datasources/name/", ttl=60, subpaths=False),
+    CacheRule("/datasources/id/", ttl=60, subpaths=False),
+    CacheRule("/plugins", ttl=300, subpaths=False),
+    CacheRule("/folders", ttl=60),
+    CacheRule("/dashboards/uid/", ttl=30, invalidated_by=["/dashboards", "/folders"]),
+]
+
+
+@dataclasses.dataclass
+class CacheEntry:
+    rule: CacheRule
+    content: bytes
+    etag: t.Optional[str]
+    expires: float
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+
+@dataclasses.dataclass
+class CacheLookup:
+    """
+    The outcome of looking up a request in the cache.
+
+    `entry` is the cached entry, if any, and `fresh` tells whether it can be used without revalidation.
+    `generation` is the invalidation generation of the cache at lookup time.
+    """
+
+    key: str
+    rule: CacheRule
+    entry: t.Optional[CacheEntry] = None
+    fresh: bool = False
+    generation: int = 0
+
+    def request_headers(self) -> t.Optional[t.Dict[str, str]]:
+        if self.entry is not None and self.entry.etag:
+            return {"If-None-Match": self.entry.etag}
+        return None
+
+
+@dataclasses.dataclass
+class CacheStatistics:
+    """
+    Counters about cache usage.
+
+    - `hits` counts requests answered from the cache, including revalidated ones.
+    - `misses` counts cacheable requests which needed a full response from the server.
+    - `revalidated` counts expired entries confirmed by a `304 Not Modified` response.
+    - `evictions` counts entries removed to make room for new ones.
+    - `invalidations` counts entries removed because of write requests.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def asdict(self):
+        return dataclasses.asdict(self)
+
+
+class ResponseCache:
+    """
+    A thread-safe LRU cache for API responses, bounded by number of entries and bytes.
+
+    Example::
+
+        ResponseCache(
+            rules=[CacheRule("/frontend/settings", ttl=600), CacheRule("/search", ttl=10)],
+            max_entries=1000,
+            max_bytes=64 * 1024 * 1024,
+        )
+    """
+
+    def __init__(
+        self,
+        rules: t.Optional[t.Iterable[CacheRule]] = None,
+        max_entries: int = 512,
+        max_bytes: int = 32 * 1024 * 1024,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        self.rules = list(rules) if rules is not None else list(DEFAULT_CACHE_RULES)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.entries: "collections.OrderedDict[str, CacheEntry]" = collections.OrderedDict()
+        self.size = 0
+        self.stats = CacheStatistics()
+        self.lock = threading.Lock()
+        # Incremented by each write request invalidating any rule.
+        self.generation = 0
+
+    @classmethod
+    def from_value(
+        cls, value: t.Union["ResponseCache", CacheRule, t.Iterable[CacheRule], bool, None]
+    ) -> t.Optional["ResponseCache"]:
+        """
+        Accept a `ResponseCache` instance, a single `CacheRule`, or a list of rules.
+        `True` enables the cache with the default rules.
+        """
+        if value is None or value is False:
+            return None
+        if value is True:
+            return cls()
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, CacheRule):
+            return cls([value])
+        return cls(value)
+
+    @staticmethod
+    def make_key(path: str, params=None) -> str:
+        if not params:
+            return path
+        return f"{path}{'&' if '?' in path else '?'}{urlencode(params, doseq=True)}"
+
+    def lookup(self, path: str, params=None, headers=None) -> t.Optional[CacheLookup]:
+        """
+        Look up a `GET` request. Return `None` when the request is not cacheable.
+
+        Requests with custom headers are not cacheable, because the response may depend on them.
+        """
+        if headers:
+            return None
+        rule = next((rule for rule in self.rules if rule.matches(path)), None)
+        if rule is None:
+            return None
+        key = self.make_key(path, params)
+        with self.lock:
+            generation = self.generation
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return CacheLookup(key=key, rule=rule, generation=generation)
+            self.entries.move_to_end(key)
+            if entry.expires > self.clock():
+                self.stats.hits += 1
+                return CacheLookup(key=key, rule=rule, entry=entry, fresh=True, generation=generation)
+            if not entry.etag:
+                self._remove(key)
+                self.stats.misses += 1
+                return CacheLookup(key=key, rule=rule, generation=generation)
+        return CacheLookup(key=key, rule=rule, entry=entry, generation=generation)
+
+    def update(self, lookup: CacheLookup, response) -> t.Optional[CacheEntry]:
+        """
+        Update the cache from the server response to a looked up request.
+
+        Return the cached entry, when the response confirmed it with `304 Not Modified`.
+
+        When a write request invalidated entries since the lookup, the response may
+        predate the write, so the cache is not updated.
+        """
+        if response.status_code == 304 and lookup.entry is not None:
+            with self.lock:
+                if lookup.generation == self.generation:
+                    lookup.entry.expires = self.clock() + lookup.rule.ttl
+                    if lookup.key in self.entries:
+                        self.entries.move_to_end(lookup.key)
+                self.stats.hits += 1
+                self.stats.revalidated += 1
+            return lookup.entry
+        if lookup.entry is not None:
+            with self.lock:
+                self.stats.misses += 1
+                self._remove(lookup.key)
+        content_type = response.headers.get("Content-Type", "")
+        # Empty bodies don't decode from JSON, and are only accepted by requests using `accept_empty_json`.
+        if response.status_code == 200 and content_type.startswith("application/json") and response.content:
+            self.store(lookup.key, lookup.rule, response.content, response.headers.get("ETag"), lookup.generation)
+        return None
+
+    def store(
+        self,
+        key: str,
+        rule: CacheRule,
+        content: bytes,
+        etag: t.Optional[str] = None,
+        generation: t.Optional[int] = None,
+    ):
+        """
+        Store a response. With `generation`, only when no entries were invalidated since then.
+        """
+        if len(content) > self.max_bytes:
+            return
+        entry = CacheEntry(rule=rule, content=content, etag=etag, expires=self.clock() + rule.ttl)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._remove(key)
+            self.entries[key] = entry
+            self.size += entry.size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def invalidate(self, path: str) -> int:
+        """
+        Remove all entries of rules invalidated by a write request to the given path.
+
+        Call it both before sending the write request, and after receiving its response,
+        to also remove entries stored by concurrent reads while the write was in flight.
+        """
+        if read_only_write(path) or not any(rule.invalidated_by_write(path) for rule in self.rules):
+            return 0
+        with self.lock:
+            self.generation += 1
+            keys = [key for key, entry in self.entries.items() if entry.rule.invalidated_by_write(path)]
+            for key in keys:
+                self._remove(key)
+            self.stats.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
@@ -0,0 +1,168 @@
+"""
+About
+=====
+Detect the version, edition, feature toggles, and available API endpoints of
+a Grafana instance once, and consult them without further requests.
+
+`GrafanaApi.connect()` probes the `/frontend/settings` endpoint, and stores the
+outcome as `Capabilities` in a `CapabilityRegistry`. Element methods use it for
+version gating, so they neither issue requests, nor parse version strings
+repeatedly. Capabilities are kept until they expire, when configured using a
+time-to-live, or until they are refreshed explicitly::
+
+    grafana = GrafanaApi.from_url(..., capabilities_ttl=3600)
+    grafana.connect()
+    grafana.capabilities.version_info >= Version("10")
+    grafana.capabilities.has_feature("publicDashboards")
+    grafana.capabilities.supports("datasource_health")
+    grafana.refresh_capabilities()
+"""
+
+import dataclasses
+import logging
+import threading
+import time
+import typing as t
+
+from verlib2 import Version
+from verlib2.packaging.version import InvalidVersion
+
+logger = logging.getLogger(__name__)
+
+
+# API endpoints, and the range of Grafana versions providing them, as `(minimum, maximum)`.
+# `None` means there is no lower or upper bound, respectively.
+ENDPOINTS: t.Dict[str, t.Tuple[t.Optional[Version], t.Optional[Version]]] = {
+    "datasource_health": (Version("9"), None),
+    "datasource_permissions": (None, Version("10.2.2")),
+    "library_elements": (Version("8.2"), None),
+    "service_accounts": (Version("9"), None),
+    "team_external_groups_by_query": (Version("10.2.0"), None),
+}
+
+
+def parse_version(version: t.Optional[str]) -> t.Optional[Version]:
+    """
+    Parse a Grafana version string, returning `None` when it is not a valid version, like `nightly`.
+    """
+    if not version:
+        return None
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+
+@dataclasses.dataclass
+class Capabilities:
+    """
+    The capabilities of a Grafana instance, derived from its `/frontend/settings` document.
+
+    `version` is the version string, stripped from build suffixes, and `version_info` is
+    its parsed `Version`, or `None` for versions like `nightly`. `endpoints` tells which
+    of the API endpoints listed in `ENDPOINTS` are available.
+    """
+
+    build_info: t.Dict[str, t.Any] = dataclasses.field(default_factory=dict)
+    version: t.Optional[str] = None
+    version_info: t.Optional[Version] = None
+    edition: t.Optional[str] = None
+    feature_toggles: t.Dict[str, bool] = dataclasses.field(default_factory=dict)
+    endpoints: t.Dict[str, bool] = dataclasses.field(default_factory=dict)
+
+    @classmethod
+    def from_settings(cls, settings: t.Optional[t.Dict[str, t.Any]]) -> "Capabilities":
+        settings = settings or {}
+        build_info = settings.get("buildInfo") or {}
+        version = build_info.get("version")
+        if version:
+            version = str(version).rsplit("-")[0]
+        version_info = parse_version(version)
+        return cls(
+            build_info=build_info,
+            version=version,
+            version_info=version_info,
+            edition=build_info.get("edition"),
+            feature_toggles={name: bool(value) for name, value in (settings.get("featureToggles") or {}).items()},
+            endpoints={name: cls.endpoint_available(version_info, bounds) for name, bounds in ENDPOINTS.items()},
+        )
+
+    @staticmethod
+    def endpoint_available(
+        version_info: t.Optional[Version], bounds: t.Tuple[t.Optional[Version], t.Optional[Version]]
+    ) -> bool:
+        minimum, maximum = bounds
+        if version_info is None:
+            # Unknown versions, like `nightly`, are assumed to be the most recent ones.
+            return maximum is None
+        if minimum is not None and version_info < minimum:
+            return False
+        if maximum is not None and version_info > maximum:
+            return False
+        return True
+
+    def at_least(self, version: Version) -> bool:
+        """
+        Return whether the Grafana version is the given one, or newer.
+        Unknown versions, like `nightly`, are assumed to be newer.
+        """
+        return self.version_info is None or self.version_info >= version
+
+    def at_most(self, version: Version) -> bool:
+        """
+        Return whether the Grafana version is the given one, or older.
+        """
+        return self.version_info is not None and self.version_info <= version
+
+    def has_feature(self, name: str) -> bool:
+        return self.feature_toggles.get(name, False)
+
+    def supports(self, endpoint: str) -> bool:
+        """
+        Return whether the Grafana instance provides an API endpoint listed in `ENDPOINTS`.
+        """
+        try:
+            return self.endpoints[endpoint]
+        except KeyError:
+            raise KeyError(f"Unknown endpoint: {endpoint}. Known endpoints: {', '.join(ENDPOINTS)}") from None
+
+
+class CapabilityRegistry:
+    """
+    Hold the `Capabilities` of a Grafana instance, optionally expiring after `ttl` seconds.
+
+    The registry does not issue requests on its own. It is updated by the API
+    wrapper, using the `/frontend/settings` document.
+    """
+
+    def __init__(self, ttl: t.Optional[float] = None, clock: t.Callable[[], float] = time.monotonic):
+        if ttl is not None and ttl < 0:
+            raise ValueError("Time-to-live must not be negative")
+        self.ttl = ttl
+        self.clock = clock
+        self.probes = 0
+        self._capabilities: t.Optional[Capabilities] = None
+        self._expires: t.Optional[float] = None
+        self.lock = threading.Lock()
+
+    def get(self) -> t.Optional[Capabilities]:
+        """
+        Return the current capabilities, or `None` when they are unknown or expired.
+        """
+        if self._expires is not None and self.clock() >= self._expires:
+            return None
+        return self._capabilities
+
+    def update(self, settings: t.Optional[t.Dict[str, t.Any]]) -> Capabilities:
+        capabilities = Capabilities.from_settings(settings)
+        with self.lock:
+            self._capabilities = capabilities
+            self._expires = None if self.ttl is None else self.clock() + self.ttl
+            self.probes += 1
+        logger.info(f"Inquired Grafana version: {capabilities.version}")
+        return capabilities
+
+    def invalidate(self):
+        with self.lock:
+            self._capabilities = None
+            self._expires = None
@@ -1,10 +1,60 @@
+import asyncio
+import contextlib
+import contextvars
+import dataclasses
+import functools
+import threading
+import time
+import typing as t
+from json import JSONDecodeError
+
 import niquests
 import niquests.auth
 from niquests import HTTPError, Timeout
-from niquests.exceptions import JSONDecodeError
+
+from .batch import Batch
+from .cache import CacheRule, ResponseCache
+from .codec import JsonCodec, get_codec
+from .connection import ConnectionOptions
+from .ratelimit import NULL_LIMIT, RateLimit, RateLimiter
+from .retry import RetryPolicy, RetryStatistics
+from .streaming import aiter_json_array, iter_json_array
 
 DEFAULT_TIMEOUT: float = 5.0
 DEFAULT_SESSION_POOL_SIZE: int = 10
+STREAM_CHUNK_SIZE: int = 64 * 1024
+
+_request_timeout: contextvars.ContextVar = contextvars.ContextVar("grafana_client_request_timeout", default=None)
+
+
+def json_encoder(codec: JsonCodec) -> t.Callable[[t.Any], bytes]:
+    """
+    Return a JSON encoder for HTTP sessions, using the given codec.
+
+    Like niquests does with its own encoder, errors about payloads which can not be
+    serialized, like `NaN` values, are raised as `InvalidJSONError`.
+    """
+
+    def encode(obj: t.Any) -> bytes:
+        try:
+            return codec.dumps(obj)
+        except (TypeError, ValueError) as ex:
+            raise niquests.exceptions.InvalidJSONError(ex) from ex
+
+    return encode
+
+
+@contextlib.contextmanager
+def request_timeout(timeout: t.Optional[float]):
+    """
+    Override the timeout of the HTTP session for requests of the current thread or task,
+    within the block. `None` keeps the timeout of the session.
+    """
+    token = _request_timeout.set(timeout)
+    try:
+        yield
+    finally:
+        _request_timeout.reset(token)
 
 
 class GrafanaException(Exception):
@@ -75,7 +125,11 @@ class HeaderAuth(niquests.auth.AuthBase):
         return request
 
 
-class GrafanaClient:
+class BaseGrafanaClient:
+    """
+    The HTTP client shared by `GrafanaClient` and `AsyncGrafanaClient`.
+    """
+
     def __init__(
         self,
         auth,
@@ -88,15 +142,24 @@ class GrafanaClient:
         user_agent: str = None,
         organization_id: int = None,
         session_pool_size=DEFAULT_SESSION_POOL_SIZE,
+        retry: t.Union[RetryPolicy, int, bool, None] = None,
+        rate_limit: t.Union[RateLimiter, RateLimit, t.List[RateLimit], None] = None,
+        connection: t.Union[ConnectionOptions, t.Dict[str, t.Any], None] = None,
+        json_codec: t.Union[JsonCodec, str, None] = None,
+        cache: t.Union[ResponseCache, CacheRule, t.List[CacheRule], bool, None] = None,
     ):
-        self.auth = auth
-        self.verify = verify
-        self.timeout = timeout
         self.url_host = host
         self.url_port = port
         self.url_path_prefix = url_path_prefix
         self.url_protocol = protocol
         self.session_pool_size = session_pool_size
+        self.retry = RetryPolicy.from_value(retry)
+        self.retry_stats = RetryStatistics()
+        self.retry_stats_lock = threading.Lock()
+        self.rate_limiter = RateLimiter.from_value(rate_limit)
+        self.connection = ConnectionOptions.from_value(connection)
+        self.json_codec = get_codec(json_codec)
+        self.cache = ResponseCache.from_value(cache)
 
         def construct_api_url():
             params = {
@@ -119,24 +182,58 @@ class GrafanaClient:
 
         self.user_agent = user_agent or f"{__appname__}/{__version__}"
 
-        self.s = niquests.Session(pool_maxsize=session_pool_size)
+        self.s = self._create_session()
         self.s.headers["User-Agent"] = self.user_agent
+        self.s.json_encoder = json_encoder(self.json_codec)
 
         self.organization_id = organization_id
         if self.organization_id:
             # orgId is defined in the openapi3 spec as an int64, but headers need to be a str
             self.s.headers["X-Grafana-Org-Id"] = str(self.organization_id)
 
-        if self.auth is not None:
-            if isinstance(self.auth, niquests.auth.AuthBase):
+        if auth is not None:
+            if isinstance(auth, niquests.auth.AuthBase):
                 pass
-            elif isinstance(self.auth, tuple):
-                self.auth = niquests.auth.HTTPBasicAuth(*self.auth)
+            elif isinstance(auth, tuple):
+                auth = niquests.auth.HTTPBasicAuth(*auth)
             else:
-                self.auth = TokenAuth(self.auth)
+                auth = TokenAuth(auth)
+
+        # Bind authentication and timeout settings once to the session, instead of
+        # passing them along with each request. TLS verification is passed along with
+        # each request, because the session setting would be overridden by the
+        # `REQUESTS_CA_BUNDLE` and `CURL_CA_BUNDLE` environment variables.
+        self.auth = auth
+        self.verify = verify
+        self.timeout = timeout
 
-    def _make_url(self, url):
-        return f"{self.url}{url}"
+    def _create_session(self):
+        return self.connection.create_session(self.session_pool_size)
+
+    @property
+    def auth(self):
+        return self.s.auth
+
+    @auth.setter
+    def auth(self, value):
+        self.s.auth = value
+
+    @property
+    def verify(self):
+        return self._verify
+
+    @verify.setter
+    def verify(self, value):
+        self._verify = value
+        self.s.verify = value
+
+    @property
+    def timeout(self):
+        return self.s.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.s.timeout = value
 
     @staticmethod
     def _ensure_valid_json_arg(json):
@@ -147,8 +244,7 @@ class GrafanaClient:
                 f"The type is: {type(json)}"
             )
 
-    @staticmethod
-    def _extract_from_response(r, accept_empty_json):
+    def _extract_from_response(self, r, accept_empty_json):
         if r.status_code >= 400:
             try:
                 response = r.json()
@@ -183,43 +279,275 @@ class GrafanaClient:
         if content_type.startswith("text/"):
             return r.text
         try:
-            return r.json()
-        except JSONDecodeError:
+            return self.json_codec.loads(r.content)
+        except JSONDecodeError as ex:
             if accept_empty_json and r.text == "":
                 return ""
-            else:
-                raise
+            # Raise the same exception type as `Response.json()`, which is also a `RequestException`.
+            raise niquests.exceptions.JSONDecodeError(ex.msg, ex.doc, ex.pos) from ex
+
+    def _limit(self, method, url):
+        """
+        Return a context manager which enforces the rate limits for the given request.
+        """
+        if self.rate_limiter is None:
+            return NULL_LIMIT
+        return self.rate_limiter.limit(method, url)
+
+    def _retry_delay(self, method, attempt, response=None):
+        """
+        Return the delay in seconds before retrying a request, or `None` if it should not be retried.
+
+        `attempt` is the one-based number of the attempt just made. `response` is `None`
+        when the request timed out.
+        """
+        policy = self.retry
+        if policy is None:
+            return None
 
-    def __getattr__(self, item):
-        def __request_runner(url, json=None, data=None, params=None, headers=None, accept_empty_json=False):
-            __url = self._make_url(url)
-            # Sanity checks.
-            self._ensure_valid_json_arg(json)
+        if response is None:
+            if not policy.retry_on_timeout:
+                return None
+            reason = "timeout"
+            retry_after = None
+        elif response.status_code in policy.status_codes:
+            reason = response.status_code
+            retry_after = policy.parse_retry_after(response.headers.get("Retry-After"))
+        else:
+            if attempt > 1 and response.status_code < 400:
+                with self.retry_stats_lock:
+                    self.retry_stats.recovered += 1
+            return None
+
+        if not policy.can_retry(method, attempt):
+            if attempt > 1:
+                with self.retry_stats_lock:
+                    self.retry_stats.exhausted += 1
+            return None
 
+        with self.retry_stats_lock:
+            self.retry_stats.record_retry(reason)
+        return policy.compute_delay(attempt - 1, retry_after)
+
+    def _stream_from_response(self, r, accept_empty_json):
+        """
+        Return an iterator over the items of a top-level JSON array, decoding the response incrementally.
+
+        Error responses, and responses without content, are handled like by `_extract_from_response`.
+        """
+        if r.status_code >= 400 or r.status_code == 204:
+            value = self._extract_from_response(r, accept_empty_json)
+            return iter(() if value is None else (value,))
+        return self._iter_response(r)
+
+    @staticmethod
+    def _iter_response(r):
+        try:
+            yield from iter_json_array(r.iter_content(STREAM_CHUNK_SIZE))
+        finally:
+            r.close()
+
+    def _send(self, method, url, json=None, data=None, params=None, headers=None, stream=False):
+        """
+        Submit a request, retrying on transient errors, and return the response.
+        """
+        attempt = 1
+        while True:
             try:
-                r = self.s.request(
-                    item.lower(),
-                    __url,
-                    json=json,
-                    data=data,
-                    params=params,
-                    headers=headers,
-                    auth=self.auth,
-                    verify=self.verify,
-                    timeout=self.timeout,
-                )
+                with self._limit(method, url):
+                    r = self.s.request(
+                        method,
+                        self.url + url,
+                        json=json,
+                        data=data,
+                        params=params,
+                        headers=headers,
+                        stream=stream,
+                        verify=self._verify,
+                        timeout=_request_timeout.get(),
+                    )
             except Timeout as e:
-                raise GrafanaTimeoutError(0, None, str(e)) from e
+                delay = self._retry_delay(method, attempt)
+                if delay is None:
+                    raise GrafanaTimeoutError(0, None, str(e)) from e
             except HTTPError as e:
                 # Make sure to not leak any exception types of the requests implementation.
                 raise GrafanaException(0, None, str(e)) from e
+            else:
+                delay = self._retry_delay(method, attempt, r)
+                if delay is None:
+                    return r
+                # Release the connection of the discarded response, when streamed.
+                r.close()
+
+            time.sleep(delay)
+            attempt += 1
+
+    def _decode_cached(self, entry):
+        return self.json_codec.loads(entry.content)
+
+    def _cached_get(self, lookup, url, params, accept_empty_json):
+        if lookup.fresh:
+            return self._decode_cached(lookup.entry)
+        r = self._send("get", url, params=params, headers=lookup.request_headers())
+        entry = self.cache.update(lookup, r)
+        if entry is not None:
+            return self._decode_cached(entry)
+        return self._extract_from_response(r, accept_empty_json)
+
+    def _request(
+        self, method, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, stream=False
+    ):
+        if self.cache is not None and method != "get":
+            self.cache.invalidate(url)
+
+        # Sanity checks.
+        self._ensure_valid_json_arg(json)
+
+        if self.cache is not None and method == "get" and not stream:
+            lookup = self.cache.lookup(url, params, headers)
+            if lookup is not None:
+                return self._cached_get(lookup, url, params, accept_empty_json)
+
+        try:
+            r = self._send(method, url, json, data, params, headers, stream)
+        finally:
+            if self.cache is not None and method != "get":
+                # Remove entries stored by concurrent reads while the write was in flight.
+                self.cache.invalidate(url)
+        if stream:
+            return self._stream_from_response(r, accept_empty_json)
+        return self._extract_from_response(r, accept_empty_json)
 
+    def get(self, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, stream=False):
+        return self._request("get", url, json, data, params, headers, accept_empty_json, stream)
+
+    def post(self, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, stream=False):
+        return self._request("post", url, json, data, params, headers, accept_empty_json, stream)
+
+    def put(self, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, stream=False):
+        return self._request("put", url, json, data, params, headers, accept_empty_json, stream)
+
+    def patch(self, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, stream=False):
+        return self._request("patch", url, json, data, params, headers, accept_empty_json, stream)
+
+    def delete(self, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, stream=False):
+        return self._request("delete", url, json, data, params, headers, accept_empty_json, stream)
+
+    def __getattr__(self, item):
+        """
+        Dynamically resolve request runners like `GET`, `POST`, or any other HTTP verb.
+
+        The runner is cached on the instance, so subsequent lookups bypass `__getattr__`.
+        """
+        try:
+            runner = object.__getattribute__(self, item.lower())
+        except AttributeError:
+            runner = functools.partial(self._request, item.lower())
+        self.__dict__[item] = runner
+        return runner
+
+
+class GrafanaClient(BaseGrafanaClient):
+    """
+    The synchronous HTTP client, additionally supporting batches of lazy requests.
+    """
+
+    def __init__(
+        self,
+        auth,
+        host="localhost",
+        port=None,
+        url_path_prefix="",
+        protocol="http",
+        verify=True,
+        timeout=DEFAULT_TIMEOUT,
+        user_agent: str = None,
+        organization_id: int = None,
+        session_pool_size=DEFAULT_SESSION_POOL_SIZE,
+        retry: t.Union[RetryPolicy, int, bool, None] = None,
+        rate_limit: t.Union[RateLimiter, RateLimit, t.List[RateLimit], None] = None,
+        connection: t.Union[ConnectionOptions, t.Dict[str, t.Any], None] = None,
+        json_codec: t.Union[JsonCodec, str, None] = None,
+        cache: t.Union[ResponseCache, CacheRule, t.List[CacheRule], bool, None] = None,
+    ):
+        super().__init__(
+            auth,
+            host=host,
+            port=port,
+            url_path_prefix=url_path_prefix,
+            protocol=protocol,
+            verify=verify,
+            timeout=timeout,
+            user_agent=user_agent,
+            organization_id=organization_id,
+            session_pool_size=session_pool_size,
+            retry=retry,
+            rate_limit=rate_limit,
+            connection=connection,
+            json_codec=json_codec,
+            cache=cache,
+        )
+        # The active batch, and the multiplexed session, of each thread.
+        self._batches = threading.local()
+
+    def batch(self) -> Batch:
+        """
+        Return a context manager, within which requests of the current thread
+        return lazy `BatchHandle` objects, resolved together when it exits.
+        """
+        return Batch(self)
+
+    def _active_batch(self) -> t.Optional[Batch]:
+        return getattr(self._batches, "current", None)
+
+    def _enter_batch(self, batch: Batch):
+        batch.previous = self._active_batch()
+        self._batches.current = batch
+
+    def _exit_batch(self, batch: Batch):
+        self._batches.current = batch.previous
+
+    def _multiplexed_session(self):
+        """
+        Return the multiplexed session of the current thread, sharing the settings of the main session.
+
+        Each thread uses its own session, because resolving a batch gathers all pending
+        responses of its session, and batches of other threads must not collect them.
+        """
+        session = getattr(self._batches, "session", None)
+        if session is None:
+            session = dataclasses.replace(self.connection, multiplexed=True).create_session(self.session_pool_size)
+            session.headers.update(self.s.headers)
+            session.auth = self.s.auth
+            session.verify = self.s.verify
+            session.timeout = self.s.timeout
+            session.json_encoder = self.s.json_encoder
+            self._batches.session = session
+        return session
+
+    def _extract_batch_response(self, r, accept_empty_json):
+        try:
+            if isinstance(r, Exception):
+                raise r
             return self._extract_from_response(r, accept_empty_json)
+        except Timeout as e:
+            raise GrafanaTimeoutError(0, None, str(e)) from e
+        except HTTPError as e:
+            raise GrafanaException(0, None, str(e)) from e
 
-        return __request_runner
+    def _request(
+        self, method, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, stream=False
+    ):
+        batch = self._active_batch()
+        if batch is not None and not stream:
+            if self.cache is not None and method != "get":
+                self.cache.invalidate(url)
+            return batch.submit(method, url, json, data, params, headers, accept_empty_json, _request_timeout.get())
+        return super()._request(method, url, json, data, params, headers, accept_empty_json, stream)
 
 
-class AsyncGrafanaClient(GrafanaClient):
+class AsyncGrafanaClient(BaseGrafanaClient):
     def __init__(
         self,
         auth,
@@ -232,6 +560,11 @@ class AsyncGrafanaClient(GrafanaClient):
         user_agent: str = None,
         organization_id: int = None,
         session_pool_size=DEFAULT_SESSION_POOL_SIZE,
+        retry: t.Union[RetryPolicy, int, bool, None] = None,
+        rate_limit: t.Union[RateLimiter, RateLimit, t.List[RateLimit], None] = None,
+        connection: t.Union[ConnectionOptions, t.Dict[str, t.Any], None] = None,
+        json_codec: t.Union[JsonCodec, str, None] = None,
+        cache: t.Union[ResponseCache, CacheRule, t.List[CacheRule], bool, None] = None,
     ):
         super().__init__(
             auth,
@@ -244,33 +577,114 @@ class AsyncGrafanaClient(GrafanaClient):
             user_agent=user_agent,
             organization_id=organization_id,
             session_pool_size=session_pool_size,
+            retry=retry,
+            rate_limit=rate_limit,
+            connection=connection,
+            json_codec=json_codec,
+            cache=cache,
         )
-        self.s = niquests.AsyncSession(pool_maxsize=session_pool_size)
         self.s.headers.setdefault("Connection", "keep-alive")
 
-    def __getattr__(self, item):
-        async def __request_runner(url, json=None, data=None, params=None, headers=None, accept_empty_json=False):
-            __url = self._make_url(url)
-            # Sanity checks.
-            self._ensure_valid_json_arg(json)
+    def _create_session(self):
+        return self.connection.create_session(self.session_pool_size, asynchronous=True)
+
+    def _limit(self, method, url):
+        if self.rate_limiter is None:
+            return NULL_LIMIT
+        return self.rate_limiter.limit_async(method, url)
+
+    async def _astream_from_response(self, r, accept_empty_json):
+        """
+        Return an asynchronous iterator over the items of a top-level JSON array,
+        decoding the response incrementally.
+        """
+        if r.status_code >= 400 or r.status_code == 204:
+            # Buffer the body, so that the response can be decoded synchronously.
+            buffered = niquests.Response()
+            buffered.status_code = r.status_code
+            buffered.headers = r.headers
+            buffered.url = r.url
+            buffered.encoding = r.encoding
+            buffered._content = await r.content
+            value = self._extract_from_response(buffered, accept_empty_json)
+            return self._aiter_values(() if value is None else (value,))
+        return self._aiter_response(r)
 
+    @staticmethod
+    async def _aiter_values(values):
+        for value in values:
+            yield value
+
+    @staticmethod
+    async def _aiter_response(r):
+        try:
+            async for item in aiter_json_array(await r.iter_content(STREAM_CHUNK_SIZE)):
+                yield item
+        finally:
+            await r.close()
+
+    async def _send(self, method, url, json=None, data=None, params=None, headers=None, stream=False):
+        attempt = 1
+        while True:
             try:
-                r = await self.s.request(
-                    item.lower(),
-                    __url,
-                    json=json,
-                    data=data,
-                    params=params,
-                    headers=headers,
-                    auth=self.auth,
-                    verify=self.verify,
-                    timeout=self.timeout,
-                )
+                async with self._limit(method, url):
+                    r = await self.s.request(
+                        method,
+                        self.url + url,
+                        json=json,
+                        data=data,
+                        params=params,
+                        headers=headers,
+                        stream=stream,
+                        verify=self._verify,
+                        timeout=_request_timeout.get(),
+                    )
             except Timeout as e:
-                raise GrafanaTimeoutError(0, None, str(e)) from e
+                delay = self._retry_delay(method, attempt)
+                if delay is None:
+                    raise GrafanaTimeoutError(0, None, str(e)) from e
             except HTTPError as e:
                 raise GrafanaException(0, None, str(e)) from e
+            else:
+                delay = self._retry_delay(method, attempt, r)
+                if delay is None:
+                    return r
+                if stream:
+                    # Release the connection of the discarded response.
+                    await r.close()
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _cached_get(self, lookup, url, params, accept_empty_json):
+        if lookup.fresh:
+            return self._decode_cached(lookup.entry)
+        r = await self._send("get", url, params=params, headers=lookup.request_headers())
+        entry = self.cache.update(lookup, r)
+        if entry is not None:
+            return self._decode_cached(entry)
+        return self._extract_from_response(r, accept_empty_json)
+
+    async def _request(
+        self, method, url, json=None, data=None, params=None, headers=None, accept_empty_json=False, stream=False
+    ):
+        # Sanity checks.
+        self._ensure_valid_json_arg(json)
 
-            return self._extract_from_response(r, accept_empty_json)
+        if self.cache is not None:
+            if method != "get":
+                self.cache.invalidate(url)
+            elif not stream:
+                lookup = self.cache.lookup(url, params, headers)
+                if lookup is not None:
+                    return await self._cached_get(lookup, url, params, accept_empty_json)
 
-        return __request_runner
+        try:
+            r = await self._send(method, url, json, data, params, headers, stream)
+        finally:
+            if self.cache is not None and method != "get":
+                # Remove entries stored by concurrent reads while the write was in flight.
+                self.cache.invalidate(url)
+        if stream:
+            return await self._astream_from_response(r, accept_empty_json)
+        return self._extract_from_response(r, accept_empty_json)
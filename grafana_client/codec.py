@@ -0,0 +1,104 @@
+"""
+About
+=====
+Pluggable JSON codecs for encoding request bodies and decoding response bodies.
+
+`orjson` and `msgspec` are significantly faster than the `json` module of the
+standard library, for both encoding and decoding. They are used when
+installed, in that order of preference, unless a codec is selected explicitly::
+
+    GrafanaApi(..., json_codec="json")
+    GrafanaApi(..., json_codec="orjson")
+    GrafanaApi(..., json_codec="msgspec")
+
+Install them using `pip install grafana-client[orjson]`, or `pip install grafana-client[msgspec]`.
+"""
+
+import json
+import typing as t
+
+
+class JsonCodec:
+    """
+    Encode and decode JSON documents using the `json` module of the standard library.
+
+    Subclasses implement `dumps` and `loads`, where `loads` raises a
+    `json.JSONDecodeError` on invalid input.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: t.Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+    def loads(self, data: t.Union[bytes, str]) -> t.Any:
+        return json.loads(data)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    Encode and decode JSON documents using `orjson`.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.dumps = orjson.dumps
+        # `orjson.JSONDecodeError` is a subclass of `json.JSONDecodeError`.
+        self.loads = orjson.loads
+
+
+class MsgspecCodec(JsonCodec):
+    """
+    Encode and decode JSON documents using `msgspec`.
+    """
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self.encoder = msgspec.json.Encoder()
+        self.decoder = msgspec.json.Decoder()
+        self.decode_error = msgspec.DecodeError
+
+    def dumps(self, obj: t.Any) -> bytes:
+        return self.encoder.encode(obj)
+
+    def loads(self, data: t.Union[bytes, str]) -> t.Any:
+        try:
+            return self.decoder.decode(data)
+        except self.decode_error as ex:
+            raise json.JSONDecodeError(str(ex), data if isinstance(data, str) else "", 0) from ex
+
+
+CODECS: t.Dict[str, t.Type[JsonCodec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JsonCodec,
+}
+
+
+def get_codec(value: t.Union[JsonCodec, str, None] = None) -> JsonCodec:
+    """
+    Resolve a JSON codec by name, or return the fastest one available, when `value` is `None` or `auto`.
+
+    Selecting a codec by name raises an `ImportError` when its package is not installed.
+    """
+    if isinstance(value, JsonCodec):
+        return value
+    if value is None or value == "auto":
+        for codec_class in (OrjsonCodec, MsgspecCodec):
+            try:
+                return codec_class()
+            except ImportError:
+                pass
+        return JsonCodec()
+    if value not in CODECS:
+        raise ValueError(f"Unknown JSON codec: {value}. Available codecs: {', '.join(CODECS)}")
+    return CODECS[value]()
@@ -0,0 +1,257 @@
+"""
+About
+=====
+Helpers for running many Grafana API calls concurrently, with bounded
+concurrency, and collecting per-item results and errors. Synchronous calls
+are running on a thread pool, asynchronous calls are running as tasks. Both
+run within a copy of the context of the caller, so context variables like a
+`request_timeout` apply to them.
+
+A task can be specified in different ways:
+
+- A callable without arguments, like `functools.partial(grafana.dashboard.get_dashboard, "foo")`.
+- A tuple of `(method, args)`, or `(method, args, kwargs)`, like `(grafana.dashboard.get_dashboard, ["foo"])`.
+  When `args` is neither a tuple nor a list, it is used as single positional argument.
+"""
+
+import asyncio
+import contextvars
+import dataclasses
+import typing as t
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+TaskSpec = t.Union[t.Callable[[], t.Any], t.Tuple[t.Callable, t.Any], t.Tuple[t.Callable, t.Any, t.Dict]]
+
+
+@dataclasses.dataclass
+class TaskResult:
+    """
+    The outcome of a single task, either its `value`, or its `error`.
+
+    `index` is the position of the task within the input sequence.
+    """
+
+    index: int
+    value: t.Any = None
+    error: t.Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def result(self) -> t.Any:
+        """
+        Return the value, or raise the error of the task.
+        """
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class ParallelExecutionError(Exception):
+    """
+    Raised when one or more tasks of a parallel execution failed.
+
+    `results` contains the outcomes of all tasks in input order, `errors` only the failed ones.
+    """
+
+    def __init__(self, results: t.List[TaskResult]):
+        self.results = results
+        self.errors = [result for result in results if result.error is not None]
+        first = self.errors[0]
+        super().__init__(
+            f"{len(self.errors)} of {len(results)} tasks failed. "
+            f"First error at index {first.index}: {first.error.__class__.__name__}: {first.error}"
+        )
+
+
+def task_callable(task: TaskSpec) -> t.Callable[[], t.Any]:
+    """
+    Normalize a task specification into a callable without arguments.
+    """
+    if callable(task):
+        return task
+    if isinstance(task, (tuple, list)) and task and callable(task[0]):
+        method = task[0]
+        args = task[1] if len(task) > 1 else ()
+        kwargs = task[2] if len(task) > 2 else {}
+        if not isinstance(args, (tuple, list)):
+            args = (args,)
+        return lambda: method(*args, **kwargs)
+    raise TypeError(f"Unable to use task specification of type {type(task)}")
+
+
+def submit(executor: ThreadPoolExecutor, function: t.Callable, *args) -> Future:
+    """
+    Submit a call to a thread pool, within a copy of the context of the caller.
+
+    Like asyncio tasks do, this keeps context variables, like a `request_timeout`,
+    or a breaker `probe`, applying to calls running on worker threads.
+    """
+    return executor.submit(contextvars.copy_context().run, function, *args)
+
+
+def _run_sync(index: int, task: t.Callable[[], t.Any]) -> TaskResult:
+    try:
+        return TaskResult(index=index, value=task())
+    except Exception as ex:
+        return TaskResult(index=index, error=ex)
+
+
+def map_bounded(
+    tasks: t.Iterable[TaskSpec], concurrency: int, executor: t.Optional[ThreadPoolExecutor] = None
+) -> t.Iterator[TaskResult]:
+    """
+    Run tasks on a thread pool with at most `concurrency` of them in flight, and
+    yield their `TaskResult` items in completion order.
+
+    Tasks are consumed lazily from the input iterable. Exceptions raised by
+    individual tasks are captured into their results. When the consumer stops
+    iterating, all tasks not started yet are cancelled.
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+    own_executor = executor is None
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="grafana-client")
+    specs = enumerate(tasks)
+    pending: t.Set[Future] = set()
+
+    def schedule() -> bool:
+        for index, spec in specs:
+            pending.add(submit(executor, _run_sync, index, task_callable(spec)))
+            return True
+        return False
+
+    try:
+        while len(pending) < concurrency and schedule():
+            pass
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                yield future.result()
+                schedule()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
+
+
+class ParallelExecutor:
+    """
+    Run synchronous API calls on a thread pool, sharing the HTTP session and its connection pool.
+
+    Use it as a context manager, obtained by `GrafanaApi.parallel()`::
+
+        with grafana.parallel() as pool:
+            dashboards = pool.map(grafana.dashboard.get_dashboard, uids)
+    """
+
+    def __init__(self, max_workers: int):
+        if max_workers < 1:
+            raise ValueError("Number of workers must be at least 1")
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="grafana-client")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def as_completed(self, tasks: t.Iterable[TaskSpec]) -> t.Iterator[TaskResult]:
+        """
+        Run tasks, and yield their `TaskResult` items in completion order.
+        """
+        return map_bounded(tasks, self.max_workers, executor=self.executor)
+
+    def run(self, tasks: t.Iterable[TaskSpec]) -> t.List[TaskResult]:
+        """
+        Run tasks, and return their `TaskResult` items in input order.
+        """
+        return sorted(self.as_completed(tasks), key=lambda item: item.index)
+
+    def map(self, func: t.Callable, *iterables: t.Iterable, return_exceptions: bool = False) -> t.List[t.Any]:
+        """
+        Call `func` with arguments from each of the iterables, like the builtin `map` does,
+        and return the values in input order.
+
+        By default, all calls will be completed before raising a `ParallelExecutionError`,
+        which aggregates all errors. With `return_exceptions`, errors are returned in place
+        of the values.
+        """
+        results = self.run((func, args) for args in zip(*iterables))
+        if not return_exceptions and any(result.error is not None for result in results):
+            raise ParallelExecutionError(results)
+        return [result.value if result.error is None else result.error for result in results]
+
+
+async def _run_async(index: int, task: t.Callable[[], t.Awaitable]) -> TaskResult:
+    try:
+        return TaskResult(index=index, value=await task())
+    except Exception as ex:
+        return TaskResult(index=index, error=ex)
+
+
+async def amap_bounded(tasks: t.Iterable[TaskSpec], concurrency: int) -> t.AsyncIterator[TaskResult]:
+    """
+    Run awaitable tasks with at most `concurrency` of them in flight, and yield
+    their `TaskResult` items in completion order.
+
+    Tasks are consumed lazily from the input iterable. Exceptions raised by
+    individual tasks are captured into their results. When the consumer stops
+    iterating, or is cancelled, all pending tasks are cancelled.
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+    specs = enumerate(tasks)
+    pending: t.Set[asyncio.Future] = set()
+
+    def schedule() -> bool:
+        for index, spec in specs:
+            pending.add(asyncio.ensure_future(_run_async(index, task_callable(spec))))
+            return True
+        return False
+
+    try:
+        while len(pending) < concurrency and schedule():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                yield future.result()
+                schedule()
+    finally:
+        for future in pending:
+            future.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def agather_bounded(
+    tasks: t.Iterable[TaskSpec], concurrency: int, return_exceptions: bool = True
+) -> t.List[t.Any]:
+    """
+    Run awaitable tasks with at most `concurrency` of them in flight, and return
+    their values in input order.
+
+    With `return_exceptions`, errors are returned in place of the values, like
+    `asyncio.gather` does. Otherwise, the first error is raised, and all
+    pending tasks are cancelled.
+    """
+    results: t.Dict[int, t.Any] = {}
+    iterator = amap_bounded(tasks, concurrency)
+    try:
+        async for item in iterator:
+            if item.error is not None and not return_exceptions:
+                raise item.error
+            results[item.index] = item.value if item.error is None else item.error
+    finally:
+        await iterator.aclose()
+    return [results[index] for index in range(len(results))]
@@ -0,0 +1,91 @@
+"""
+About
+=====
+Transport settings for the HTTP sessions of `GrafanaClient` and `AsyncGrafanaClient`.
+
+`niquests` negotiates HTTP/1.1, HTTP/2, or HTTP/3 with the server. With
+`ConnectionOptions`, you can turn off individual protocol versions, for
+example to force HTTP/2, enable multiplexed lazy responses, tune keep-alive
+behavior, and make requests wait for a free connection when the pool is
+exhausted, instead of opening a surplus connection which will be discarded.
+"""
+
+import dataclasses
+import typing as t
+
+import niquests
+from niquests.adapters import AsyncHTTPAdapter, HTTPAdapter
+
+
+@dataclasses.dataclass
+class ConnectionOptions:
+    """
+    Protocol negotiation, multiplexing, and connection reuse settings.
+
+    - `http1`, `http2`, and `http3` enable or disable the corresponding protocol
+      versions. For example, `ConnectionOptions(http1=False, http3=False)` forces HTTP/2.
+    - `multiplexed` makes the session return lazy responses, so many requests can
+      be in flight on a single HTTP/2 or HTTP/3 connection.
+    - `keepalive_delay` is the maximum lifetime of an idle connection in seconds,
+      `keepalive_idle_window` is the idle period after which HTTP/2 and HTTP/3
+      connections are probed with a ping. `None` turns the feature off.
+    - `pool_block` makes requests wait for a free connection, when all connections
+      of the pool are busy.
+    """
+
+    http1: bool = True
+    http2: bool = True
+    http3: bool = True
+    multiplexed: bool = False
+    keepalive_delay: t.Optional[float] = 600.0
+    keepalive_idle_window: t.Optional[float] = 60.0
+    pool_block: bool = False
+
+    def __post_init__(self):
+        if not (self.http1 or self.http2 or self.http3):
+            raise ValueError("At least one HTTP protocol version must be enabled")
+
+    @classmethod
+    def from_value(cls, value: t.Union["ConnectionOptions", t.Dict[str, t.Any], None]) -> "ConnectionOptions":
+        """
+        Accept a `ConnectionOptions` instance, a dictionary of options, or `None` for the defaults.
+        """
+        if value is None:
+            return cls()
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls(**value)
+        raise TypeError(f"Unable to use connection options of type {type(value)}")
+
+    def protocol_kwargs(self) -> t.Dict[str, t.Any]:
+        return {
+            "disable_http1": not self.http1,
+            "disable_http2": not self.http2,
+            "disable_http3": not self.http3,
+            "keepalive_delay": self.keepalive_delay,
+            "keepalive_idle_window": self.keepalive_idle_window,
+        }
+
+    def create_session(
+        self, pool_size: int, asynchronous: bool = False
+    ) -> t.Union[niquests.Session, niquests.AsyncSession]:
+        """
+        Create a synchronous or asynchronous `niquests` session using those options.
+        """
+        session_class = niquests.AsyncSession if asynchronous else niquests.Session
+        session = session_class(pool_maxsize=pool_size, multiplexed=self.multiplexed, **self.protocol_kwargs())
+        if self.pool_block:
+            # The session does not accept `pool_block`, so replace its adapters.
+            adapter_class = AsyncHTTPAdapter if asynchronous else HTTPAdapter
+            for prefix in ("http://", "https://"):
+                session.mount(
+                    prefix,
+                    adapter_class(
+                        pool_maxsize=pool_size,
+                        pool_block=True,
+                        quic_cache_layer=session.quic_cache_layer,
+                        **self.protocol_kwargs(),
+                    ),
+                )
+        return session
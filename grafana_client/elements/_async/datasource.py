@@ -1,32 +1,71 @@
+import contextlib
 import json
 import logging
 import time
 import warnings
-from typing import Dict, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Tuple, Union
 from urllib.parse import urlencode
 
 from niquests import ReadTimeout
 from verlib2 import Version
 
-from ...client import GrafanaBadInputError, GrafanaClientError, GrafanaServerError
+from ...breaker import probe
+from ...client import GrafanaBadInputError, GrafanaClientError, GrafanaServerError, request_timeout
+from ...concurrency import amap_bounded
 from ...knowledge import get_healthcheck_expression, query_factory
 from ...model import DatasourceHealthResponse, DatasourceIdentifier
+from ...query import (
+    LabelMerger,
+    MatrixMerger,
+    QueryBatch,
+    SeriesMerger,
+    chunk_tasks,
+    parse_duration,
+    split_time_range,
+    to_timestamp,
+)
+from ...records import DatasourceRecord, decode_records
 from ..base import Base
 
+if TYPE_CHECKING:
+    from ...breaker import CircuitBreaker
+    from ...index import DatasourceIndex
+    from ...querycache import QueryResultCache
+
 logger = logging.getLogger(__name__)
 
-VERSION_10_2_2 = Version("10.2.2")
-VERSION_9 = Version("9")
 VERSION_8 = Version("8")
 VERSION_7 = Version("7")
 VERBOSE = False
 
 
+def sweep_failure(datasource: Dict, error: BaseException) -> DatasourceHealthResponse:
+    """
+    Convert an error raised while inquiring data source health into a response.
+    """
+    status = "UNKNOWN" if isinstance(error, NotImplementedError) else "FATAL"
+    message = f"{error.__class__.__name__}: {error}"
+    logger.warning(f"Data source health inquiry failed. uid={datasource['uid']}, {message}")
+    return DatasourceHealthResponse(
+        uid=datasource["uid"],
+        type=datasource.get("type"),
+        success=False,
+        status=status,
+        message=message,
+        response=getattr(error, "response", None),
+    )
+
+
 class Datasource(Base):
     def __init__(self, client, api):
         super(Datasource, self).__init__(client)
         self.client = client
         self.api = api
+        self.index: Optional["DatasourceIndex"] = None
+        self.query_cache: Optional["QueryResultCache"] = None
+        self.breaker: Optional["CircuitBreaker"] = None
+        # Data source uids by id, for keying circuits.
+        self._uids: Dict[Any, str] = {}
 
     async def health(self, datasource_uid: str):
         """
@@ -60,6 +99,23 @@ class Datasource(Base):
         get_datasource_path = "/datasources/%s" % datasource_id
         return await self.client.GET(get_datasource_path)
 
+    async def get_datasource_uid_by_id(self, datasource_id):
+        """
+        Resolve the uid of a data source identified by its ``id``, using the data
+        source `index` when enabled. Resolved uids are remembered.
+
+        :param datasource_id:
+        :return:
+        """
+        uids = self._uids
+        if datasource_id in uids:
+            return uids[datasource_id]
+        datasource = await self.get(DatasourceIdentifier(id=datasource_id))
+        uid = datasource.get("uid")
+        if uid:
+            uids[datasource_id] = uid
+        return uid
+
     async def get_datasource_by_name(self, datasource_name):
         """
 
@@ -90,7 +146,21 @@ class Datasource(Base):
     async def get(self, dsident: DatasourceIdentifier):
         """
         Get dashboard by either datasource_id, datasource_uid, or datasource_name.
+
+        When the data source `index` is enabled, the data source is resolved from it.
+        A miss refreshes the index at most once, before falling back to fetching the
+        data source individually.
         """
+        index = self.index
+        if index is not None:
+            datasource = index.lookup(dsident)
+            if datasource is None and index.should_refresh(dsident):
+                datasources = await self.list_datasources()
+                index.update(datasources)
+                datasource = index.lookup(dsident)
+            if datasource is not None:
+                return datasource
+
         if dsident.id:
             datasource = await self.get_datasource_by_id(dsident.id)
         elif dsident.uid:
@@ -108,7 +178,9 @@ class Datasource(Base):
         :return:
         """
         create_datasources_path = "/datasources"
-        return await self.client.POST(create_datasources_path, json=datasource)
+        response = await self.client.POST(create_datasources_path, json=datasource)
+        self._invalidate_lookups()
+        return response
 
     async def update_datasource(self, datasource_id, datasource):
         """
@@ -118,7 +190,9 @@ class Datasource(Base):
         :return:
         """
         update_datasource = "/datasources/%s" % datasource_id
-        return await self.client.PUT(update_datasource, json=datasource)
+        response = await self.client.PUT(update_datasource, json=datasource)
+        self._invalidate_lookups()
+        return response
 
     async def update_datasource_by_uid(self, datasource_uid, datasource):
         """
@@ -128,15 +202,45 @@ class Datasource(Base):
         :return:
         """
         update_datasource = "/datasources/uid/%s" % datasource_uid
-        return await self.client.PUT(update_datasource, json=datasource)
+        response = await self.client.PUT(update_datasource, json=datasource)
+        self._invalidate_lookups()
+        return response
+
+    def _invalidate_lookups(self):
+        """
+        Forget data sources resolved by the `index`, and uids resolved by id, after writing data sources.
+        """
+        if self.index is not None:
+            self.index.invalidate()
+        self._uids.clear()
 
-    async def list_datasources(self):
+    def _circuit(self, key):
+        """
+        Guard a request to a data source by its circuit, when the circuit `breaker` is enabled.
+        """
+        breaker = self.breaker
+        if breaker is None or key is None:
+            return contextlib.nullcontext()
+        return breaker.guard(key)
+
+    def _record_health(self, health: DatasourceHealthResponse):
+        if self.breaker is not None:
+            self.breaker.record_health(health)
+
+    async def list_datasources(self, stream=False, records=False):
         """
 
+        :param stream: Decode the response incrementally, and return an iterator over the data sources.
+        :param records: Return compact `DatasourceRecord` records instead of dictionaries.
         :return:
         """
+        if records and stream:
+            raise ValueError("The `records` and `stream` options can not be combined")
         list_datasources_path = "/datasources"
-        return await self.client.GET(list_datasources_path)
+        datasources = await self.client.GET(list_datasources_path, stream=stream)
+        if records:
+            return decode_records(DatasourceRecord, datasources)
+        return datasources
 
     async def delete_datasource_by_id(self, datasource_id):
         """
@@ -147,7 +251,9 @@ class Datasource(Base):
         :return:
         """
         delete_datasource = "/datasources/%s" % datasource_id
-        return await self.client.DELETE(delete_datasource)
+        response = await self.client.DELETE(delete_datasource)
+        self._invalidate_lookups()
+        return response
 
     async def delete_datasource_by_name(self, datasource_name):
         """
@@ -156,7 +262,9 @@ class Datasource(Base):
         :return:
         """
         delete_datasource = "/datasources/name/%s" % datasource_name
-        return await self.client.DELETE(delete_datasource)
+        response = await self.client.DELETE(delete_datasource)
+        self._invalidate_lookups()
+        return response
 
     async def delete_datasource_by_uid(self, datasource_uid):
         """
@@ -165,7 +273,9 @@ class Datasource(Base):
         :return:
         """
         delete_datasource = "/datasources/uid/%s" % datasource_uid
-        return await self.client.DELETE(delete_datasource)
+        response = await self.client.DELETE(delete_datasource)
+        self._invalidate_lookups()
+        return response
 
     async def enable_datasource_permissions(self, datasource_id):
         """
@@ -174,7 +284,7 @@ class Datasource(Base):
         :param datasource_id:
         :return:
         """
-        if Version(await self.api.version) > VERSION_10_2_2:
+        if not (await self.api.capabilities).supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3")
 
         get_datasource_path = "/datasources/%s/enable-permissions" % datasource_id
@@ -187,7 +297,7 @@ class Datasource(Base):
         :param datasource_id:
         :return:
         """
-        if Version(await self.api.version) > VERSION_10_2_2:
+        if not (await self.api.capabilities).supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3")
 
         get_datasource_path = "/datasources/%s/disable-permissions" % datasource_id
@@ -200,7 +310,7 @@ class Datasource(Base):
         :param datasource_id:
         :return:
         """
-        if Version(await self.api.version) > VERSION_10_2_2:
+        if not (await self.api.capabilities).supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3, please use get_rbac_datasources()")
 
         get_datasource_path = "/datasources/%s/permissions" % datasource_id
@@ -214,7 +324,7 @@ class Datasource(Base):
         :param permissions:
         :return:
         """
-        if Version(await self.api.version) > VERSION_10_2_2:
+        if not (await self.api.capabilities).supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3, please use set_rbac_datasources_*()")
 
         get_datasource_path = "/datasources/%s/permissions" % datasource_id
@@ -228,7 +338,7 @@ class Datasource(Base):
         :param permission_id:
         :return:
         """
-        if Version(await self.api.version) > VERSION_10_2_2:
+        if not (await self.api.capabilities).supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3, please use set_rbac_datasources_*()")
 
         get_datasource_path = "/datasources/%s/permissions/%s" % (datasource_id, permission_id)
@@ -289,16 +399,30 @@ class Datasource(Base):
             post_query_path = "/datasources/%s/uid/%s/api/v1/query" % (access, datasource_uid)
         else:
             raise ValueError("Either datasource_id or datasource_uid must be provided")
-        return await self.client.POST(
-            post_query_path,
-            data={
-                "query": query,
-                "time": timestamp,
-            },
-        )
+        circuit_key = datasource_uid
+        if self.breaker is not None and not circuit_key:
+            circuit_key = await self.get_datasource_uid_by_id(datasource_id)
+        with self._circuit(circuit_key):
+            return await self.client.POST(
+                post_query_path,
+                data={
+                    "query": query,
+                    "time": timestamp,
+                },
+            )
 
     async def query_range(
-        self, datasource_id=None, query=None, start=None, end=None, step=None, access="proxy", *, datasource_uid=None
+        self,
+        datasource_id=None,
+        query=None,
+        start=None,
+        end=None,
+        step=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        shard_size=None,
+        concurrency=None,
     ):
         """
 
@@ -308,20 +432,100 @@ class Datasource(Base):
         :param end:
         :param step:
         :param access:
+        :param shard_size: Split the time range into shards of this duration, like `1d`, and query them concurrently.
+        :param concurrency: Maximum number of shards in flight, defaulting to the session pool size.
         :return:
         """
+        if shard_size is not None:
+            merger = MatrixMerger()
+            async for _, _, response in self.iter_query_range(
+                datasource_id=datasource_id,
+                query=query,
+                start=start,
+                end=end,
+                step=step,
+                access=access,
+                datasource_uid=datasource_uid,
+                shard_size=shard_size,
+                concurrency=concurrency,
+            ):
+                merger.add(response)
+            return merger.result()
+
         if datasource_id:
             post_query_range_path = "/datasources/%s/%s/api/v1/query_range" % (access, datasource_id)
         elif datasource_uid:
             post_query_range_path = "/datasources/%s/uid/%s/api/v1/query_range" % (access, datasource_uid)
         else:
             raise ValueError("Either datasource_id or datasource_uid must be provided")
-        return await self.client.POST(
-            post_query_range_path, data={"query": query, "start": start, "end": end, "step": step}
-        )
+        circuit_key = datasource_uid
+        if self.breaker is not None and not circuit_key:
+            circuit_key = await self.get_datasource_uid_by_id(datasource_id)
+        with self._circuit(circuit_key):
+            return await self.client.POST(
+                post_query_range_path, data={"query": query, "start": start, "end": end, "step": step}
+            )
+
+    async def iter_query_range(
+        self,
+        datasource_id=None,
+        query=None,
+        start=None,
+        end=None,
+        step=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        shard_size="1d",
+        concurrency=None,
+    ):
+        """
+        Split the time range of a `query_range` request into shards aligned to `step`,
+        query them concurrently, and yield `(start, end, response)` tuples for each
+        shard, in completion order.
+
+        `start` and `end` are Unix timestamps, or `datetime` objects. `step` and
+        `shard_size` are durations in seconds, or Prometheus duration strings.
+        Use `MatrixMerger` to merge the responses per series.
+        """
+        step = parse_duration(step)
+        shards = split_time_range(to_timestamp(start), to_timestamp(end), step, parse_duration(shard_size))
+        concurrency = concurrency or self.client.session_pool_size
+        if self.breaker is not None and not datasource_uid:
+            # Resolve the circuit key once, instead of per shard. Requests still address the data source by id.
+            datasource_uid = await self.get_datasource_uid_by_id(datasource_id)
+        tasks = [
+            (
+                self.query_range,
+                (),
+                {
+                    "datasource_id": datasource_id,
+                    "query": query,
+                    "start": shard_start,
+                    "end": shard_end,
+                    "step": step,
+                    "access": access,
+                    "datasource_uid": datasource_uid,
+                },
+            )
+            for shard_start, shard_end in shards
+        ]
+        logger.debug(f"Querying {len(shards)} shards of time range {start} to {end}")
+        async for result in amap_bounded(tasks, concurrency):
+            shard_start, shard_end = shards[result.index]
+            yield shard_start, shard_end, result.result()
 
     async def series(
-        self, datasource_id=None, match=None, start=None, end=None, access="proxy", *, datasource_uid=None
+        self,
+        datasource_id=None,
+        match=None,
+        start=None,
+        end=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        chunk_size=None,
+        concurrency=None,
     ):
         """
 
@@ -330,8 +534,26 @@ class Datasource(Base):
         :param start:
         :param end:
         :param access:
+        :param chunk_size: Split the `match` list into chunks of this many matchers, and look them up concurrently.
+        :param concurrency: Maximum number of chunks in flight, defaulting to the session pool size.
         :return:
         """
+        if chunk_size is not None:
+            merger = SeriesMerger()
+            tasks = chunk_tasks(
+                self.series,
+                match,
+                chunk_size,
+                datasource_id=datasource_id,
+                start=start,
+                end=end,
+                access=access,
+                datasource_uid=datasource_uid,
+            )
+            async for result in amap_bounded(tasks, concurrency or self.client.session_pool_size):
+                merger.add(result.result())
+            return merger.result()
+
         if datasource_id:
             post_series_path = "/datasources/%s/%s/api/v1/series" % (access, datasource_id)
         elif datasource_uid:
@@ -340,6 +562,90 @@ class Datasource(Base):
             raise ValueError("Either datasource_id or datasource_uid must be provided")
         return await self.client.POST(post_series_path, data={"match[]": match, "start": start, "end": end})
 
+    async def label_names(
+        self,
+        datasource_id=None,
+        match=None,
+        start=None,
+        end=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        chunk_size=None,
+        concurrency=None,
+    ):
+        """
+        Look up the label names of a Prometheus data source, optionally restricted to series
+        selected by `match`. With `chunk_size`, the `match` list is split into chunks, looked
+        up concurrently, and the label names are merged.
+        """
+        if chunk_size is not None:
+            merger = LabelMerger()
+            tasks = chunk_tasks(
+                self.label_names,
+                match,
+                chunk_size,
+                datasource_id=datasource_id,
+                start=start,
+                end=end,
+                access=access,
+                datasource_uid=datasource_uid,
+            )
+            async for result in amap_bounded(tasks, concurrency or self.client.session_pool_size):
+                merger.add(result.result())
+            return merger.result()
+
+        if datasource_id:
+            post_labels_path = "/datasources/%s/%s/api/v1/labels" % (access, datasource_id)
+        elif datasource_uid:
+            post_labels_path = "/datasources/%s/uid/%s/api/v1/labels" % (access, datasource_uid)
+        else:
+            raise ValueError("Either datasource_id or datasource_uid must be provided")
+        return await self.client.POST(post_labels_path, data={"match[]": match, "start": start, "end": end})
+
+    async def label_values(
+        self,
+        label,
+        datasource_id=None,
+        match=None,
+        start=None,
+        end=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        chunk_size=None,
+        concurrency=None,
+    ):
+        """
+        Look up the values of a label of a Prometheus data source, optionally restricted to
+        series selected by `match`. With `chunk_size`, the `match` list is split into chunks,
+        looked up concurrently, and the label values are merged.
+        """
+        if chunk_size is not None:
+            merger = LabelMerger()
+            tasks = chunk_tasks(
+                self.label_values,
+                match,
+                chunk_size,
+                label=label,
+                datasource_id=datasource_id,
+                start=start,
+                end=end,
+                access=access,
+                datasource_uid=datasource_uid,
+            )
+            async for result in amap_bounded(tasks, concurrency or self.client.session_pool_size):
+                merger.add(result.result())
+            return merger.result()
+
+        if datasource_id:
+            get_label_values_path = "/datasources/%s/%s/api/v1/label/%s/values" % (access, datasource_id, label)
+        elif datasource_uid:
+            get_label_values_path = "/datasources/%s/uid/%s/api/v1/label/%s/values" % (access, datasource_uid, label)
+        else:
+            raise ValueError("Either datasource_id or datasource_uid must be provided")
+        return await self.client.GET(get_label_values_path, params={"match[]": match, "start": start, "end": end})
+
     async def smartquery(
         self,
         datasource: Union[DatasourceIdentifier, Dict],
@@ -350,6 +656,11 @@ class Datasource(Base):
         """
         Send a query to the designated data source and return its response.
 
+        When the `query_cache` is enabled, results of time series queries submitted
+        to `/ds/query` are cached, and repeated queries only fetch the missing tail.
+        When the circuit `breaker` is enabled, queries to data sources whose circuit
+        is open raise `CircuitOpenError` immediately.
+
         TODO: This is by far not complete. The `query_factory` function has to
             be made more elaborate in order to query different data source
                 types.
@@ -365,6 +676,7 @@ class Datasource(Base):
 
         # Sanity checks.
         model = {}
+        lookup = None
         if not request and not expression:
             raise ValueError("request or expression must be given")
         elif not request:
@@ -407,7 +719,7 @@ class Datasource(Base):
             request_kwargs = {}
             send_request = self.client.GET
 
-        elif datasource_type in ("prometheus", "loki") and Version(await self.api.version) <= VERSION_7:
+        elif datasource_type in ("prometheus", "loki") and (await self.api.capabilities).at_most(VERSION_7):
             if (
                 "queries" in request["data"]
                 and len(request["data"]["queries"]) > 0
@@ -418,6 +730,7 @@ class Datasource(Base):
                     datasource_id=datasource.get("id"),
                     query=request["expr"],
                     timestamp=request["data"]["to"],
+                    datasource_uid=datasource.get("uid"),
                 )
             else:
                 return await self.query_range(
@@ -426,6 +739,7 @@ class Datasource(Base):
                     start=request["data"]["from"],
                     end=request["data"]["to"],
                     step=request["data"]["step"],
+                    datasource_uid=datasource.get("uid"),
                 )
 
         # For all others, use the generic data source communication endpoint.
@@ -433,18 +747,72 @@ class Datasource(Base):
             url = "/ds/query"
             request_kwargs = {"json": request["data"]}
 
+            # When the query result cache is enabled, only fetch what is missing.
+            query_cache = self.query_cache
+            if query_cache is not None:
+                lookup = query_cache.lookup(datasource, request["data"])
+                if lookup is not None and lookup.payload is None:
+                    return lookup.response()
+                if lookup is not None:
+                    request_kwargs = {"json": lookup.payload}
+
         else:
             raise NotImplementedError(f"Unable to submit query to data source with access type '{access_type}'")
 
         # Submit query.
-        try:
-            return await send_request(url, **request_kwargs)
-        except (GrafanaClientError, GrafanaServerError) as ex:
-            logger.error(
-                f"Querying data source failed. id={datasource_id}, type={datasource_type}. "
-                f"Reason: {ex}. Response: {ex.response or '<empty>'}"
-            )
-            raise
+        with self._circuit(datasource.get("uid")):
+            try:
+                response = await send_request(url, **request_kwargs)
+            except (GrafanaClientError, GrafanaServerError) as ex:
+                logger.error(
+                    f"Querying data source failed. id={datasource_id}, type={datasource_type}. "
+                    f"Reason: {ex}. Response: {ex.response or '<empty>'}"
+                )
+                raise
+        if lookup is not None:
+            response = query_cache.update(lookup, response)
+        return response
+
+    async def smartquery_many(self, queries: Union[QueryBatch, Iterable[Tuple]]) -> Dict[str, Any]:
+        """
+        Send many queries, combining them into few requests to the `/ds/query` endpoint,
+        and return their results by `refId`, in the order the queries were added.
+
+        `queries` is either a `QueryBatch`, or an iterable of `(datasource, expression)`,
+        or `(datasource, expression, attrs)` tuples, with `refId`s `q0`, `q1`, and so on.
+
+        The result of a query submitted to `/ds/query` is its item of the `results`
+        response document. Queries not supported by `/ds/query` are submitted
+        individually using `smartquery`, and their result is its response.
+        """
+        batch = QueryBatch.from_value(queries)
+
+        # Resolve data sources, once per identifier.
+        resolved = {}
+        for query in batch.queries:
+            if isinstance(query.datasource, DatasourceIdentifier):
+                key = (query.datasource.id, query.datasource.uid, query.datasource.name)
+                if key not in resolved:
+                    resolved[key] = await self.get(query.datasource)
+                query.datasource = resolved[key]
+
+        payloads, individual = batch.build(legacy=(await self.api.capabilities).at_most(VERSION_7))
+        logger.info(f"Submitting {len(batch)} queries using {len(payloads) + len(individual)} requests")
+
+        results = {}
+        for payload in payloads:
+            try:
+                response = await self.client.POST("/ds/query", json=payload)
+            except (GrafanaClientError, GrafanaServerError) as ex:
+                # Errors of individual queries are reported within the `results` of the response.
+                if not isinstance(ex.response, dict) or "results" not in ex.response:
+                    raise
+                response = ex.response
+            results.update(batch.split(payload, response))
+        for query in individual:
+            results[query.ref_id] = await self.smartquery(query.datasource, query.expression, attrs=query.attrs)
+
+        return {query.ref_id: results.get(query.ref_id) for query in batch.queries}
 
     async def health_check(self, datasource: Union[DatasourceIdentifier, Dict]) -> DatasourceHealthResponse:
         """
@@ -472,7 +840,8 @@ class Datasource(Base):
         start = time.time()
         message = "Unknown error"
         try:
-            response = await self.smartquery(datasource, expression)
+            with probe():
+                response = await self.smartquery(datasource, expression)
             response_display = response
             if VERBOSE:  # pragma: no cover
                 response_display = json.dumps(response, indent=2)
@@ -520,7 +889,8 @@ class Datasource(Base):
                     message = f"Invalid response. {reason}"
 
             elif datasource_type == "loki":
-                if await self.api.version and VERSION_7 <= Version(await self.api.version) < VERSION_8:
+                capabilities = await self.api.capabilities
+                if capabilities.at_least(VERSION_7) and not capabilities.at_least(VERSION_8):
                     if "status" in response and response["status"] == "success":
                         message = "Success"
                         success = True
@@ -597,7 +967,7 @@ class Datasource(Base):
             status = "ERROR"
             logger.warning(message)
 
-        return DatasourceHealthResponse(
+        health = DatasourceHealthResponse(
             uid=datasource_uid,
             type=datasource_type,
             success=success,
@@ -606,16 +976,22 @@ class Datasource(Base):
             duration=duration,
             response=response,
         )
+        self._record_health(health)
+        return health
 
-    async def health_inquiry(self, datasource_uid: str) -> DatasourceHealthResponse:
+    async def health_inquiry(self, datasource_uid: str, datasource: Optional[Dict] = None) -> DatasourceHealthResponse:
         """
         Inquiry data source health. Try native method available since Grafana 9 first,
         and fall back to client-side implementation afterwards.
+
+        When the data source has already been fetched, pass it using `datasource`,
+        in order to skip fetching it again.
         """
 
         # Check if data source actually exists.
         try:
-            datasource = await self.get(DatasourceIdentifier(uid=datasource_uid))
+            if datasource is None:
+                datasource = await self.get(DatasourceIdentifier(uid=datasource_uid))
             datasource_type = datasource["type"]
             logger.debug(f"Data source information: {datasource}")
         except GrafanaClientError as ex:
@@ -641,7 +1017,7 @@ class Datasource(Base):
         start = time.time()
         raised = True
         noop = False
-        if await self.api.version and Version(await self.api.version) >= VERSION_9:
+        if (await self.api.capabilities).supports("datasource_health"):
             try:
                 health_native = await self.health(datasource_uid=datasource_uid)
                 logger.debug(f"Response from native data source health check: {health_native}")
@@ -699,13 +1075,52 @@ class Datasource(Base):
                         )
 
         if health is None:
-            # Resolve data source by UID.
-            datasource = await self.get(DatasourceIdentifier(uid=datasource_uid))
-            # Run client-side health check.
+            # Run client-side health check, which records its result.
             health = await self.health_check(datasource=datasource)
+        else:
+            self._record_health(health)
 
         return health
 
+    async def health_sweep(
+        self,
+        datasources: Optional[Iterable[Dict]] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ) -> Iterator[DatasourceHealthResponse]:
+        """
+        Inquiry the health of many data sources concurrently, and yield their
+        `DatasourceHealthResponse` items in completion order.
+
+        By default, all data sources are swept, fetched by a single call to
+        `list_datasources`. The data source items are reused by the health
+        inquiries, so they are not fetched again one by one.
+
+        :param datasources: Data source items to inquire, as returned by `list_datasources`.
+        :param concurrency: Maximum number of inquiries in flight, defaulting to the session pool size.
+        :param timeout: Request timeout in seconds, defaulting to the timeout of the client.
+        :param timeouts: Request timeouts in seconds by data source type, like `{"elasticsearch": 30}`.
+
+        Errors of individual inquiries do not stop the sweep. They are reported with
+        status `UNKNOWN` when the data source type is not supported, otherwise `FATAL`.
+        """
+        if datasources is None:
+            datasources = await self.list_datasources()
+        datasources = list(datasources)
+        timeouts = timeouts or {}
+        concurrency = concurrency or self.client.session_pool_size
+
+        async def inquire(datasource: Dict) -> DatasourceHealthResponse:
+            with request_timeout(timeouts.get(datasource["type"], timeout)):
+                return await self.health_inquiry(datasource_uid=datasource["uid"], datasource=datasource)
+
+        async for result in amap_bounded(((inquire, datasource) for datasource in datasources), concurrency):
+            if result.ok:
+                yield result.value
+            else:
+                yield sweep_failure(datasources[result.index], result.error)
+
     @staticmethod
     async def parse_health_response_results(response: Dict) -> Tuple[bool, str]:
         success = False
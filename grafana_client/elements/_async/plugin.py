@@ -11,12 +11,14 @@ class Plugin(Base):
         self.client = client
         self.logger = logging.getLogger(__name__)
 
-    async def list(self):
+    async def list(self, stream=False):
         """
         Return list of all installed plugins.
+
+        With `stream`, the response is decoded incrementally, and an iterator over the plugins is returned.
         """
         path = "/plugins?embedded=0"
-        return await self.client.GET(path)
+        return await self.client.GET(path, stream=stream)
 
     async def by_id(self, plugin_id):
         """
@@ -1,7 +1,12 @@
 from grafana_client.util import as_bool, format_param_value, to_list
 
+from ...pagination import aiter_pages, ramp_sizes
+from ...records import Interner, SearchHit, decode_records
 from ..base import Base
 
+# Maximum number of hits Grafana returns per page of `/search`.
+SEARCH_LIMIT = 5000
+
 
 class Search(Base):
     def __init__(self, client):
@@ -20,6 +25,8 @@ class Search(Base):
         starred=None,
         limit=None,
         page=None,
+        stream=False,
+        records=False,
     ):
         """
 
@@ -33,6 +40,8 @@ class Search(Base):
         :param starred:
         :param limit:
         :param page:
+        :param stream: Decode the response incrementally, and return an iterator over the results.
+        :param records: Return compact `SearchHit` records instead of dictionaries.
         :return:
         """
         list_dashboard_path = "/search"
@@ -68,4 +77,104 @@ class Search(Base):
         if page is not None:
             params["page"] = page
 
-        return await self.client.GET(list_dashboard_path, params=params)
+        if records and stream:
+            raise ValueError("The `records` and `stream` options can not be combined, use `iter_dashboards`")
+        hits = await self.client.GET(list_dashboard_path, params=params, stream=stream)
+        if records:
+            return decode_records(SearchHit, hits)
+        return hits
+
+    async def iter_dashboard_pages(
+        self,
+        query=None,
+        tag=None,
+        type_=None,
+        dashboard_ids=None,
+        dashboard_uids=None,
+        folder_ids=None,
+        folder_uids=None,
+        starred=None,
+        limit=SEARCH_LIMIT,
+        initial_limit=1000,
+        concurrency=0,
+    ):
+        """
+        Search dashboards and folders, paging automatically, and yield the pages of hits.
+
+        Pages start with `initial_limit` hits, and double in size up to `limit`, which is
+        capped at 5000, so the first hits arrive quickly, and large instances are walked
+        using few requests. Use `initial_limit=None` to start with `limit` right away.
+        With `concurrency`, that many pages are fetched in parallel, once pages reached
+        their full size. The walk ends on the first page with less than `limit` hits.
+        """
+        limit = min(limit, SEARCH_LIMIT)
+        filters = {
+            "query": query,
+            "tag": tag,
+            "type_": type_,
+            "dashboard_ids": dashboard_ids,
+            "dashboard_uids": dashboard_uids,
+            "folder_ids": folder_ids,
+            "folder_uids": folder_uids,
+            "starred": starred,
+        }
+
+        async def fetch(page):
+            return await self.search_dashboards(limit=limit, page=page, **filters)
+
+        sizes = ramp_sizes(limit, initial_limit)
+        start = 1
+        if len(sizes) > 1:
+            # Page 1 using the smallest size, then page 2 using each size continues where the previous page ended.
+            for page, size in [(1, sizes[0])] + [(2, size) for size in sizes[:-1]]:
+                hits = await self.search_dashboards(limit=size, page=page, **filters)
+                yield hits
+                if len(hits) < size:
+                    return
+            start = 2
+        async for hits in aiter_pages(fetch, perpage=limit, start=start, concurrency=concurrency):
+            yield hits
+
+    async def iter_dashboards(
+        self,
+        query=None,
+        tag=None,
+        type_=None,
+        dashboard_ids=None,
+        dashboard_uids=None,
+        folder_ids=None,
+        folder_uids=None,
+        starred=None,
+        limit=SEARCH_LIMIT,
+        initial_limit=1000,
+        concurrency=0,
+        records=False,
+    ):
+        """
+        Search dashboards and folders, paging automatically, and yield the hits, see `iter_dashboard_pages`.
+
+        Hits shifting between pages, when dashboards are created or deleted meanwhile, are
+        deduplicated by their UID. With `records`, compact `SearchHit` records are yielded.
+        """
+        interner = Interner() if records else None
+        seen = set()
+        async for hits in self.iter_dashboard_pages(
+            query=query,
+            tag=tag,
+            type_=type_,
+            dashboard_ids=dashboard_ids,
+            dashboard_uids=dashboard_uids,
+            folder_ids=folder_ids,
+            folder_uids=folder_uids,
+            starred=starred,
+            limit=limit,
+            initial_limit=initial_limit,
+            concurrency=concurrency,
+        ):
+            for hit in hits:
+                uid = hit.get("uid")
+                if uid is not None:
+                    if uid in seen:
+                        continue
+                    seen.add(uid)
+                yield SearchHit.from_dict(hit, interner) if records else hit
@@ -6,8 +6,10 @@ https://grafana.com/docs/grafana/latest/developer-resources/api-reference/http-a
 https://grafana.com/docs/grafana/latest/developer-resources/api-reference/http-api/examples/create-api-tokens-for-org/
 """
 
+import functools
 import typing as t
 
+from ...pagination import aiter_pages
 from ..base import Base
 
 
@@ -103,41 +105,42 @@ class ServiceAccount(Base):
 
     async def search(self, query=None, page=None, perpage=None) -> t.List[t.Dict]:
         """
-        Search service accounts with paging.
+        Search service accounts with paging. Returns a list of page documents.
         https://grafana.com/docs/grafana/latest/developer-resources/api-reference/http-api/serviceaccount/#search-service-accounts-with-paging
         """
-        list_of_sa = []
-        show_sa_path = "/serviceaccounts/search"
-        params = []
+        return [bundle async for bundle in self.iter_search_pages(query=query, page=page, perpage=perpage)]
+
+    async def search_page(self, query=None, page=1, perpage=None) -> t.Dict:
+        """
+        Fetch a single page of service accounts, including `totalCount`, `page`, and `perPage`.
+        https://grafana.com/docs/grafana/latest/developer-resources/api-reference/http-api/serviceaccount/#search-service-accounts-with-paging
+        """
+        params = {"page": page}
         if query:
-            params.append("query=%s" % query)
+            params["query"] = query
+        if perpage:
+            params["perpage"] = perpage
+        return await self.client.GET("/serviceaccounts/search", params=params)
 
-        if page:
-            iterate = False
-            params.append("page=%s" % page)
-        else:
-            iterate = True
-            params.append("page=%s")
-            page = 1
+    async def iter_search_pages(
+        self, query=None, page=None, perpage=None, prefetch: t.Union[bool, int] = False
+    ) -> t.Generator[t.Dict, None, None]:
+        """
+        Search service accounts, and yield page documents lazily, fetching each page when the
+        consumer reaches it. The number of pages is derived from `totalCount` of the first page.
 
-        if perpage:
-            params.append("perpage=%s" % perpage)
-
-        show_sa_path += "?"
-        show_sa_path += "&".join(params)
-        if iterate:
-            while True:
-                url = show_sa_path % page
-                sa_on_page = await self.client.GET(url)
-                list_of_sa.append(sa_on_page)
-                if not sa_on_page["serviceAccounts"]:
-                    break
-                page += 1
-        else:
-            sa_on_page = await self.client.GET(show_sa_path)
-            list_of_sa.append(sa_on_page)
+        With `prefetch`, the next page is fetched in the background, while the consumer
+        processes the current one. An integer fetches that many pages ahead.
 
-        return list_of_sa
+        When `page` is given, only that page is fetched.
+        """
+        if page:
+            bundle = await self.search_page(query=query, page=page, perpage=perpage)
+            yield bundle
+            return
+        fetch = functools.partial(self.search_page, query, perpage=perpage)
+        async for bundle in aiter_pages(fetch, key="serviceAccounts", perpage=perpage, concurrency=int(prefetch)):
+            yield bundle
 
     async def search_one(self, service_account_name="") -> t.Dict:
         """
@@ -147,7 +150,7 @@ class ServiceAccount(Base):
         :param service_account_name:
         :return:
         """
-        s = await self.search(query=service_account_name)[0]
+        s = await self.search_page(query=service_account_name)
         if s["totalCount"] == 1:
             return s["serviceAccounts"][0]
         elif s["totalCount"] > 1:
@@ -155,18 +158,27 @@ class ServiceAccount(Base):
         else:
             raise ValueError("No service account matched")
 
-    async def search_streaming(self, query=None, page=None, perpage=None) -> t.Generator[t.Dict, None, None]:
+    async def search_streaming(
+        self, query=None, page=None, perpage=None, prefetch: t.Union[bool, int] = False
+    ) -> t.Generator[t.Dict, None, None]:
         """
         Search service accounts with automatic paging. Returns a generator of dictionaries.
+        Pages are fetched lazily, see `iter_search_pages`.
         https://grafana.com/docs/grafana/latest/developer-resources/api-reference/http-api/serviceaccount/#search-service-accounts-with-paging
         """
-        for bundle in self.search(query=query, page=page, perpage=perpage):
+        async for bundle in self.iter_search_pages(query=query, page=page, perpage=perpage, prefetch=prefetch):
             for account in bundle["serviceAccounts"]:
                 yield account
 
-    async def search_all(self, query=None, page=None, perpage=None) -> t.List[t.Dict]:
+    async def search_all(
+        self, query=None, page=None, perpage=None, prefetch: t.Union[bool, int] = False
+    ) -> t.List[t.Dict]:
         """
         Search service accounts with automatic paging. Returns a list of dictionaries.
         https://grafana.com/docs/grafana/latest/developer-resources/api-reference/http-api/serviceaccount/#search-service-accounts-with-paging
         """
-        return list(self.search_streaming(query=query, page=page, perpage=perpage))
+        return [
+            account
+            async for bundle in self.iter_search_pages(query=query, page=page, perpage=perpage, prefetch=prefetch)
+            for account in bundle["serviceAccounts"]
+        ]
@@ -1,7 +1,10 @@
+import functools
 import typing as t
 import warnings
 
 from ...model import PersonalPreferences
+from ...pagination import aiter_pages
+from ...records import Interner, UserRecord
 from ..base import Base
 
 
@@ -16,46 +19,59 @@ class Users(Base):
         super(Users, self).__init__(client)
         self.client = client
 
-    async def search_users(self, query=None, page=None, perpage=None):
+    async def search_users(self, query=None, page=None, perpage=None, concurrency=1, records=False):
         """
+        Search users. Without `page`, all pages are fetched, see `iter_users`.
 
+        :param query:
+        :param page:
+        :param perpage:
+        :param concurrency: Maximum number of pages in flight. Pages are fetched one after another by default.
+        :param records: Return compact `UserRecord` records instead of dictionaries.
         :return:
         """
-        list_of_users = []
-        users_on_page = None
-        show_users_path = "/users"
-        params = []
+        return [
+            user
+            async for user in self.iter_users(
+                query=query, page=page, perpage=perpage, concurrency=concurrency, records=records
+            )
+        ]
 
-        if query:
-            params.append("query=%s" % query)
-
-        if page:
-            iterate = False
-            params.append("page=%s" % page)
-        else:
-            iterate = True
-            params.append("page=%s")
-            page = 1
+    async def search_users_page(self, query=None, page=1, perpage=None):
+        """
+        Fetch a single page of users, including `totalCount`, `page`, and `perPage`.
 
+        :param query:
+        :param page:
+        :param perpage:
+        :return:
+        """
+        params = {"page": page}
+        if query:
+            params["query"] = query
         if perpage:
-            params.append("perpage=%s" % perpage)
-
-        show_users_path += "?"
-        show_users_path += "&".join(params)
-
-        if iterate:
-            while True:
-                url = show_users_path % page
-                users_on_page = await self.client.GET(url)
-                if not users_on_page:
-                    break
-                list_of_users += users_on_page
-                page += 1
-        else:
-            users_on_page = await self.client.GET(show_users_path)
-            list_of_users += users_on_page
+            params["perpage"] = perpage
+        return await self.client.GET("/users/search", params=params)
 
-        return list_of_users
+    async def iter_users(self, query=None, page=None, perpage=None, concurrency=1, records=False):
+        """
+        Search users, and yield them in page order. Without `page`, the number of pages is
+        derived from `totalCount` of the first page. With `concurrency` above 1, the remaining
+        pages are fetched concurrently, with at most `concurrency` of them in flight, otherwise
+        one after another. With `records`, compact `UserRecord` records are yielded.
+        """
+        interner = Interner() if records else None
+        if page:
+            users_on_page = await self.search_users_page(query=query, page=page, perpage=perpage)
+            for user in users_on_page["users"]:
+                yield UserRecord.from_dict(user, interner) if records else user
+            return
+        fetch = functools.partial(self.search_users_page, query, perpage=perpage)
+        async for users_on_page in aiter_pages(
+            fetch, key="users", perpage=perpage, concurrency=concurrency if concurrency > 1 else 0
+        ):
+            for user in users_on_page["users"]:
+                yield UserRecord.from_dict(user, interner) if records else user
 
     async def get_user(self, user_id):
         """
@@ -1,32 +1,71 @@
+import contextlib
 import json
 import logging
 import time
 import warnings
-from typing import Dict, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Tuple, Union
 from urllib.parse import urlencode
 
 from niquests import ReadTimeout
 from verlib2 import Version
 
-from ..client import GrafanaBadInputError, GrafanaClientError, GrafanaServerError
+from ..breaker import probe
+from ..client import GrafanaBadInputError, GrafanaClientError, GrafanaServerError, request_timeout
+from ..concurrency import map_bounded
 from ..knowledge import get_healthcheck_expression, query_factory
 from ..model import DatasourceHealthResponse, DatasourceIdentifier
+from ..query import (
+    LabelMerger,
+    MatrixMerger,
+    QueryBatch,
+    SeriesMerger,
+    chunk_tasks,
+    parse_duration,
+    split_time_range,
+    to_timestamp,
+)
+from ..records import DatasourceRecord, decode_records
 from .base import Base
 
+if TYPE_CHECKING:
+    from ..breaker import CircuitBreaker
+    from ..index import DatasourceIndex
+    from ..querycache import QueryResultCache
+
 logger = logging.getLogger(__name__)
 
-VERSION_10_2_2 = Version("10.2.2")
-VERSION_9 = Version("9")
 VERSION_8 = Version("8")
 VERSION_7 = Version("7")
 VERBOSE = False
 
 
+def sweep_failure(datasource: Dict, error: BaseException) -> DatasourceHealthResponse:
+    """
+    Convert an error raised while inquiring data source health into a response.
+    """
+    status = "UNKNOWN" if isinstance(error, NotImplementedError) else "FATAL"
+    message = f"{error.__class__.__name__}: {error}"
+    logger.warning(f"Data source health inquiry failed. uid={datasource['uid']}, {message}")
+    return DatasourceHealthResponse(
+        uid=datasource["uid"],
+        type=datasource.get("type"),
+        success=False,
+        status=status,
+        message=message,
+        response=getattr(error, "response", None),
+    )
+
+
 class Datasource(Base):
     def __init__(self, client, api):
         super(Datasource, self).__init__(client)
         self.client = client
         self.api = api
+        self.index: Optional["DatasourceIndex"] = None
+        self.query_cache: Optional["QueryResultCache"] = None
+        self.breaker: Optional["CircuitBreaker"] = None
+        # Data source uids by id, for keying circuits.
+        self._uids: Dict[Any, str] = {}
 
     def health(self, datasource_uid: str):
         """
@@ -60,6 +99,23 @@ class Datasource(Base):
         get_datasource_path = "/datasources/%s" % datasource_id
         return self.client.GET(get_datasource_path)
 
+    def get_datasource_uid_by_id(self, datasource_id):
+        """
+        Resolve the uid of a data source identified by its ``id``, using the data
+        source `index` when enabled. Resolved uids are remembered.
+
+        :param datasource_id:
+        :return:
+        """
+        uids = self._uids
+        if datasource_id in uids:
+            return uids[datasource_id]
+        datasource = self.get(DatasourceIdentifier(id=datasource_id))
+        uid = datasource.get("uid")
+        if uid:
+            uids[datasource_id] = uid
+        return uid
+
     def get_datasource_by_name(self, datasource_name):
         """
 
@@ -90,7 +146,21 @@ class Datasource(Base):
     def get(self, dsident: DatasourceIdentifier):
         """
         Get dashboard by either datasource_id, datasource_uid, or datasource_name.
+
+        When the data source `index` is enabled, the data source is resolved from it.
+        A miss refreshes the index at most once, before falling back to fetching the
+        data source individually.
         """
+        index = self.index
+        if index is not None:
+            datasource = index.lookup(dsident)
+            if datasource is None and index.should_refresh(dsident):
+                datasources = self.list_datasources()
+                index.update(datasources)
+                datasource = index.lookup(dsident)
+            if datasource is not None:
+                return datasource
+
         if dsident.id:
             datasource = self.get_datasource_by_id(dsident.id)
         elif dsident.uid:
@@ -108,7 +178,9 @@ class Datasource(Base):
         :return:
         """
         create_datasources_path = "/datasources"
-        return self.client.POST(create_datasources_path, json=datasource)
+        response = self.client.POST(create_datasources_path, json=datasource)
+        self._invalidate_lookups()
+        return response
 
     def update_datasource(self, datasource_id, datasource):
         """
@@ -118,7 +190,9 @@ class Datasource(Base):
         :return:
         """
         update_datasource = "/datasources/%s" % datasource_id
-        return self.client.PUT(update_datasource, json=datasource)
+        response = self.client.PUT(update_datasource, json=datasource)
+        self._invalidate_lookups()
+        return response
 
     def update_datasource_by_uid(self, datasource_uid, datasource):
         """
@@ -128,15 +202,45 @@ class Datasource(Base):
         :return:
         """
         update_datasource = "/datasources/uid/%s" % datasource_uid
-        return self.client.PUT(update_datasource, json=datasource)
+        response = self.client.PUT(update_datasource, json=datasource)
+        self._invalidate_lookups()
+        return response
+
+    def _invalidate_lookups(self):
+        """
+        Forget data sources resolved by the `index`, and uids resolved by id, after writing data sources.
+        """
+        if self.index is not None:
+            self.index.invalidate()
+        self._uids.clear()
 
-    def list_datasources(self):
+    def _circuit(self, key):
+        """
+        Guard a request to a data source by its circuit, when the circuit `breaker` is enabled.
+        """
+        breaker = self.breaker
+        if breaker is None or key is None:
+            return contextlib.nullcontext()
+        return breaker.guard(key)
+
+    def _record_health(self, health: DatasourceHealthResponse):
+        if self.breaker is not None:
+            self.breaker.record_health(health)
+
+    def list_datasources(self, stream=False, records=False):
         """
 
+        :param stream: Decode the response incrementally, and return an iterator over the data sources.
+        :param records: Return compact `DatasourceRecord` records instead of dictionaries.
         :return:
         """
+        if records and stream:
+            raise ValueError("The `records` and `stream` options can not be combined")
         list_datasources_path = "/datasources"
-        return self.client.GET(list_datasources_path)
+        datasources = self.client.GET(list_datasources_path, stream=stream)
+        if records:
+            return decode_records(DatasourceRecord, datasources)
+        return datasources
 
     def delete_datasource_by_id(self, datasource_id):
         """
@@ -147,7 +251,9 @@ class Datasource(Base):
         :return:
         """
         delete_datasource = "/datasources/%s" % datasource_id
-        return self.client.DELETE(delete_datasource)
+        response = self.client.DELETE(delete_datasource)
+        self._invalidate_lookups()
+        return response
 
     def delete_datasource_by_name(self, datasource_name):
         """
@@ -156,7 +262,9 @@ class Datasource(Base):
         :return:
         """
         delete_datasource = "/datasources/name/%s" % datasource_name
-        return self.client.DELETE(delete_datasource)
+        response = self.client.DELETE(delete_datasource)
+        self._invalidate_lookups()
+        return response
 
     def delete_datasource_by_uid(self, datasource_uid):
         """
@@ -165,7 +273,9 @@ class Datasource(Base):
         :return:
         """
         delete_datasource = "/datasources/uid/%s" % datasource_uid
-        return self.client.DELETE(delete_datasource)
+        response = self.client.DELETE(delete_datasource)
+        self._invalidate_lookups()
+        return response
 
     def enable_datasource_permissions(self, datasource_id):
         """
@@ -174,7 +284,7 @@ class Datasource(Base):
         :param datasource_id:
         :return:
         """
-        if Version(self.api.version) > VERSION_10_2_2:
+        if not self.api.capabilities.supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3")
 
         get_datasource_path = "/datasources/%s/enable-permissions" % datasource_id
@@ -187,7 +297,7 @@ class Datasource(Base):
         :param datasource_id:
         :return:
         """
-        if Version(self.api.version) > VERSION_10_2_2:
+        if not self.api.capabilities.supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3")
 
         get_datasource_path = "/datasources/%s/disable-permissions" % datasource_id
@@ -200,7 +310,7 @@ class Datasource(Base):
         :param datasource_id:
         :return:
         """
-        if Version(self.api.version) > VERSION_10_2_2:
+        if not self.api.capabilities.supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3, please use get_rbac_datasources()")
 
         get_datasource_path = "/datasources/%s/permissions" % datasource_id
@@ -214,7 +324,7 @@ class Datasource(Base):
         :param permissions:
         :return:
         """
-        if Version(self.api.version) > VERSION_10_2_2:
+        if not self.api.capabilities.supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3, please use set_rbac_datasources_*()")
 
         get_datasource_path = "/datasources/%s/permissions" % datasource_id
@@ -228,7 +338,7 @@ class Datasource(Base):
         :param permission_id:
         :return:
         """
-        if Version(self.api.version) > VERSION_10_2_2:
+        if not self.api.capabilities.supports("datasource_permissions"):
             raise NotImplementedError("Deprecated since Grafana 10.2.3, please use set_rbac_datasources_*()")
 
         get_datasource_path = "/datasources/%s/permissions/%s" % (datasource_id, permission_id)
@@ -287,16 +397,30 @@ class Datasource(Base):
             post_query_path = "/datasources/%s/uid/%s/api/v1/query" % (access, datasource_uid)
         else:
             raise ValueError("Either datasource_id or datasource_uid must be provided")
-        return self.client.POST(
-            post_query_path,
-            data={
-                "query": query,
-                "time": timestamp,
-            },
-        )
+        circuit_key = datasource_uid
+        if self.breaker is not None and not circuit_key:
+            circuit_key = self.get_datasource_uid_by_id(datasource_id)
+        with self._circuit(circuit_key):
+            return self.client.POST(
+                post_query_path,
+                data={
+                    "query": query,
+                    "time": timestamp,
+                },
+            )
 
     def query_range(
-        self, datasource_id=None, query=None, start=None, end=None, step=None, access="proxy", *, datasource_uid=None
+        self,
+        datasource_id=None,
+        query=None,
+        start=None,
+        end=None,
+        step=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        shard_size=None,
+        concurrency=None,
     ):
         """
 
@@ -306,17 +430,101 @@ class Datasource(Base):
         :param end:
         :param step:
         :param access:
+        :param shard_size: Split the time range into shards of this duration, like `1d`, and query them concurrently.
+        :param concurrency: Maximum number of shards in flight, defaulting to the session pool size.
         :return:
         """
+        if shard_size is not None:
+            merger = MatrixMerger()
+            for _, _, response in self.iter_query_range(
+                datasource_id=datasource_id,
+                query=query,
+                start=start,
+                end=end,
+                step=step,
+                access=access,
+                datasource_uid=datasource_uid,
+                shard_size=shard_size,
+                concurrency=concurrency,
+            ):
+                merger.add(response)
+            return merger.result()
+
         if datasource_id:
             post_query_range_path = "/datasources/%s/%s/api/v1/query_range" % (access, datasource_id)
         elif datasource_uid:
             post_query_range_path = "/datasources/%s/uid/%s/api/v1/query_range" % (access, datasource_uid)
         else:
             raise ValueError("Either datasource_id or datasource_uid must be provided")
-        return self.client.POST(post_query_range_path, data={"query": query, "start": start, "end": end, "step": step})
+        circuit_key = datasource_uid
+        if self.breaker is not None and not circuit_key:
+            circuit_key = self.get_datasource_uid_by_id(datasource_id)
+        with self._circuit(circuit_key):
+            return self.client.POST(
+                post_query_range_path, data={"query": query, "start": start, "end": end, "step": step}
+            )
 
-    def series(self, datasource_id=None, match=None, start=None, end=None, access="proxy", *, datasource_uid=None):
+    def iter_query_range(
+        self,
+        datasource_id=None,
+        query=None,
+        start=None,
+        end=None,
+        step=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        shard_size="1d",
+        concurrency=None,
+    ):
+        """
+        Split the time range of a `query_range` request into shards aligned to `step`,
+        query them concurrently, and yield `(start, end, response)` tuples for each
+        shard, in completion order.
+
+        `start` and `end` are Unix timestamps, or `datetime` objects. `step` and
+        `shard_size` are durations in seconds, or Prometheus duration strings.
+        Use `MatrixMerger` to merge the responses per series.
+        """
+        step = parse_duration(step)
+        shards = split_time_range(to_timestamp(start), to_timestamp(end), step, parse_duration(shard_size))
+        concurrency = concurrency or self.client.session_pool_size
+        if self.breaker is not None and not datasource_uid:
+            # Resolve the circuit key once, instead of per shard. Requests still address the data source by id.
+            datasource_uid = self.get_datasource_uid_by_id(datasource_id)
+        tasks = [
+            (
+                self.query_range,
+                (),
+                {
+                    "datasource_id": datasource_id,
+                    "query": query,
+                    "start": shard_start,
+                    "end": shard_end,
+                    "step": step,
+                    "access": access,
+                    "datasource_uid": datasource_uid,
+                },
+            )
+            for shard_start, shard_end in shards
+        ]
+        logger.debug(f"Querying {len(shards)} shards of time range {start} to {end}")
+        for result in map_bounded(tasks, concurrency):
+            shard_start, shard_end = shards[result.index]
+            yield shard_start, shard_end, result.result()
+
+    def series(
+        self,
+        datasource_id=None,
+        match=None,
+        start=None,
+        end=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        chunk_size=None,
+        concurrency=None,
+    ):
         """
 
         :param datasource_id:
@@ -324,8 +532,26 @@ class Datasource(Base):
         :param start:
         :param end:
         :param access:
+        :param chunk_size: Split the `match` list into chunks of this many matchers, and look them up concurrently.
+        :param concurrency: Maximum number of chunks in flight, defaulting to the session pool size.
         :return:
         """
+        if chunk_size is not None:
+            merger = SeriesMerger()
+            tasks = chunk_tasks(
+                self.series,
+                match,
+                chunk_size,
+                datasource_id=datasource_id,
+                start=start,
+                end=end,
+                access=access,
+                datasource_uid=datasource_uid,
+            )
+            for result in map_bounded(tasks, concurrency or self.client.session_pool_size):
+                merger.add(result.result())
+            return merger.result()
+
         if datasource_id:
             post_series_path = "/datasources/%s/%s/api/v1/series" % (access, datasource_id)
         elif datasource_uid:
@@ -334,6 +560,90 @@ class Datasource(Base):
             raise ValueError("Either datasource_id or datasource_uid must be provided")
         return self.client.POST(post_series_path, data={"match[]": match, "start": start, "end": end})
 
+    def label_names(
+        self,
+        datasource_id=None,
+        match=None,
+        start=None,
+        end=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        chunk_size=None,
+        concurrency=None,
+    ):
+        """
+        Look up the label names of a Prometheus data source, optionally restricted to series
+        selected by `match`. With `chunk_size`, the `match` list is split into chunks, looked
+        up concurrently, and the label names are merged.
+        """
+        if chunk_size is not None:
+            merger = LabelMerger()
+            tasks = chunk_tasks(
+                self.label_names,
+                match,
+                chunk_size,
+                datasource_id=datasource_id,
+                start=start,
+                end=end,
+                access=access,
+                datasource_uid=datasource_uid,
+            )
+            for result in map_bounded(tasks, concurrency or self.client.session_pool_size):
+                merger.add(result.result())
+            return merger.result()
+
+        if datasource_id:
+            post_labels_path = "/datasources/%s/%s/api/v1/labels" % (access, datasource_id)
+        elif datasource_uid:
+            post_labels_path = "/datasources/%s/uid/%s/api/v1/labels" % (access, datasource_uid)
+        else:
+            raise ValueError("Either datasource_id or datasource_uid must be provided")
+        return self.client.POST(post_labels_path, data={"match[]": match, "start": start, "end": end})
+
+    def label_values(
+        self,
+        label,
+        datasource_id=None,
+        match=None,
+        start=None,
+        end=None,
+        access="proxy",
+        *,
+        datasource_uid=None,
+        chunk_size=None,
+        concurrency=None,
+    ):
+        """
+        Look up the values of a label of a Prometheus data source, optionally restricted to
+        series selected by `match`. With `chunk_size`, the `match` list is split into chunks,
+        looked up concurrently, and the label values are merged.
+        """
+        if chunk_size is not None:
+            merger = LabelMerger()
+            tasks = chunk_tasks(
+                self.label_values,
+                match,
+                chunk_size,
+                label=label,
+                datasource_id=datasource_id,
+                start=start,
+                end=end,
+                access=access,
+                datasource_uid=datasource_uid,
+            )
+            for result in map_bounded(tasks, concurrency or self.client.session_pool_size):
+                merger.add(result.result())
+            return merger.result()
+
+        if datasource_id:
+            get_label_values_path = "/datasources/%s/%s/api/v1/label/%s/values" % (access, datasource_id, label)
+        elif datasource_uid:
+            get_label_values_path = "/datasources/%s/uid/%s/api/v1/label/%s/values" % (access, datasource_uid, label)
+        else:
+            raise ValueError("Either datasource_id or datasource_uid must be provided")
+        return self.client.GET(get_label_values_path, params={"match[]": match, "start": start, "end": end})
+
     def smartquery(
         self,
         datasource: Union[DatasourceIdentifier, Dict],
@@ -344,6 +654,11 @@ class Datasource(Base):
         """
         Send a query to the designated data source and return its response.
 
+        When the `query_cache` is enabled, results of time series queries submitted
+        to `/ds/query` are cached, and repeated queries only fetch the missing tail.
+        When the circuit `breaker` is enabled, queries to data sources whose circuit
+        is open raise `CircuitOpenError` immediately.
+
         TODO: This is by far not complete. The `query_factory` function has to
             be made more elaborate in order to query different data source
                 types.
@@ -359,6 +674,7 @@ class Datasource(Base):
 
         # Sanity checks.
         model = {}
+        lookup = None
         if not request and not expression:
             raise ValueError("request or expression must be given")
         elif not request:
@@ -401,7 +717,7 @@ class Datasource(Base):
             request_kwargs = {}
             send_request = self.client.GET
 
-        elif datasource_type in ("prometheus", "loki") and Version(self.api.version) <= VERSION_7:
+        elif datasource_type in ("prometheus", "loki") and self.api.capabilities.at_most(VERSION_7):
             if (
                 "queries" in request["data"]
                 and len(request["data"]["queries"]) > 0
@@ -412,6 +728,7 @@ class Datasource(Base):
                     datasource_id=datasource.get("id"),
                     query=request["expr"],
                     timestamp=request["data"]["to"],
+                    datasource_uid=datasource.get("uid"),
                 )
             else:
                 return self.query_range(
@@ -420,6 +737,7 @@ class Datasource(Base):
                     start=request["data"]["from"],
                     end=request["data"]["to"],
                     step=request["data"]["step"],
+                    datasource_uid=datasource.get("uid"),
                 )
 
         # For all others, use the generic data source communication endpoint.
@@ -427,18 +745,72 @@ class Datasource(Base):
             url = "/ds/query"
             request_kwargs = {"json": request["data"]}
 
+            # When the query result cache is enabled, only fetch what is missing.
+            query_cache = self.query_cache
+            if query_cache is not None:
+                lookup = query_cache.lookup(datasource, request["data"])
+                if lookup is not None and lookup.payload is None:
+                    return lookup.response()
+                if lookup is not None:
+                    request_kwargs = {"json": lookup.payload}
+
         else:
             raise NotImplementedError(f"Unable to submit query to data source with access type '{access_type}'")
 
         # Submit query.
-        try:
-            return send_request(url, **request_kwargs)
-        except (GrafanaClientError, GrafanaServerError) as ex:
-            logger.error(
-                f"Querying data source failed. id={datasource_id}, type={datasource_type}. "
-                f"Reason: {ex}. Response: {ex.response or '<empty>'}"
-            )
-            raise
+        with self._circuit(datasource.get("uid")):
+            try:
+                response = send_request(url, **request_kwargs)
+            except (GrafanaClientError, GrafanaServerError) as ex:
+                logger.error(
+                    f"Querying data source failed. id={datasource_id}, type={datasource_type}. "
+                    f"Reason: {ex}. Response: {ex.response or '<empty>'}"
+                )
+                raise
+        if lookup is not None:
+            response = query_cache.update(lookup, response)
+        return response
+
+    def smartquery_many(self, queries: Union[QueryBatch, Iterable[Tuple]]) -> Dict[str, Any]:
+        """
+        Send many queries, combining them into few requests to the `/ds/query` endpoint,
+        and return their results by `refId`, in the order the queries were added.
+
+        `queries` is either a `QueryBatch`, or an iterable of `(datasource, expression)`,
+        or `(datasource, expression, attrs)` tuples, with `refId`s `q0`, `q1`, and so on.
+
+        The result of a query submitted to `/ds/query` is its item of the `results`
+        response document. Queries not supported by `/ds/query` are submitted
+        individually using `smartquery`, and their result is its response.
+        """
+        batch = QueryBatch.from_value(queries)
+
+        # Resolve data sources, once per identifier.
+        resolved = {}
+        for query in batch.queries:
+            if isinstance(query.datasource, DatasourceIdentifier):
+                key = (query.datasource.id, query.datasource.uid, query.datasource.name)
+                if key not in resolved:
+                    resolved[key] = self.get(query.datasource)
+                query.datasource = resolved[key]
+
+        payloads, individual = batch.build(legacy=self.api.capabilities.at_most(VERSION_7))
+        logger.info(f"Submitting {len(batch)} queries using {len(payloads) + len(individual)} requests")
+
+        results = {}
+        for payload in payloads:
+            try:
+                response = self.client.POST("/ds/query", json=payload)
+            except (GrafanaClientError, GrafanaServerError) as ex:
+                # Errors of individual queries are reported within the `results` of the response.
+                if not isinstance(ex.response, dict) or "results" not in ex.response:
+                    raise
+                response = ex.response
+            results.update(batch.split(payload, response))
+        for query in individual:
+            results[query.ref_id] = self.smartquery(query.datasource, query.expression, attrs=query.attrs)
+
+        return {query.ref_id: results.get(query.ref_id) for query in batch.queries}
 
     def health_check(self, datasource: Union[DatasourceIdentifier, Dict]) -> DatasourceHealthResponse:
         """
@@ -466,7 +838,8 @@ class Datasource(Base):
         start = time.time()
         message = "Unknown error"
         try:
-            response = self.smartquery(datasource, expression)
+            with probe():
+                response = self.smartquery(datasource, expression)
             response_display = response
             if VERBOSE:  # pragma: no cover
                 response_display = json.dumps(response, indent=2)
@@ -514,7 +887,8 @@ class Datasource(Base):
                     message = f"Invalid response. {reason}"
 
             elif datasource_type == "loki":
-                if self.api.version and VERSION_7 <= Version(self.api.version) < VERSION_8:
+                capabilities = self.api.capabilities
+                if capabilities.at_least(VERSION_7) and not capabilities.at_least(VERSION_8):
                     if "status" in response and response["status"] == "success":
                         message = "Success"
                         success = True
@@ -591,7 +965,7 @@ class Datasource(Base):
             status = "ERROR"
             logger.warning(message)
 
-        return DatasourceHealthResponse(
+        health = DatasourceHealthResponse(
             uid=datasource_uid,
             type=datasource_type,
             success=success,
@@ -600,16 +974,22 @@ class Datasource(Base):
             duration=duration,
             response=response,
         )
+        self._record_health(health)
+        return health
 
-    def health_inquiry(self, datasource_uid: str) -> DatasourceHealthResponse:
+    def health_inquiry(self, datasource_uid: str, datasource: Optional[Dict] = None) -> DatasourceHealthResponse:
         """
         Inquiry data source health. Try native method available since Grafana 9 first,
         and fall back to client-side implementation afterwards.
+
+        When the data source has already been fetched, pass it using `datasource`,
+        in order to skip fetching it again.
         """
 
         # Check if data source actually exists.
         try:
-            datasource = self.get(DatasourceIdentifier(uid=datasource_uid))
+            if datasource is None:
+                datasource = self.get(DatasourceIdentifier(uid=datasource_uid))
             datasource_type = datasource["type"]
             logger.debug(f"Data source information: {datasource}")
         except GrafanaClientError as ex:
@@ -635,7 +1015,7 @@ class Datasource(Base):
         start = time.time()
         raised = True
         noop = False
-        if self.api.version and Version(self.api.version) >= VERSION_9:
+        if self.api.capabilities.supports("datasource_health"):
             try:
                 health_native = self.health(datasource_uid=datasource_uid)
                 logger.debug(f"Response from native data source health check: {health_native}")
@@ -693,13 +1073,52 @@ class Datasource(Base):
                         )
 
         if health is None:
-            # Resolve data source by UID.
-            datasource = self.get(DatasourceIdentifier(uid=datasource_uid))
-            # Run client-side health check.
+            # Run client-side health check, which records its result.
             health = self.health_check(datasource=datasource)
+        else:
+            self._record_health(health)
 
         return health
 
+    def health_sweep(
+        self,
+        datasources: Optional[Iterable[Dict]] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ) -> Iterator[DatasourceHealthResponse]:
+        """
+        Inquiry the health of many data sources concurrently, and yield their
+        `DatasourceHealthResponse` items in completion order.
+
+        By default, all data sources are swept, fetched by a single call to
+        `list_datasources`. The data source items are reused by the health
+        inquiries, so they are not fetched again one by one.
+
+        :param datasources: Data source items to inquire, as returned by `list_datasources`.
+        :param concurrency: Maximum number of inquiries in flight, defaulting to the session pool size.
+        :param timeout: Request timeout in seconds, defaulting to the timeout of the client.
+        :param timeouts: Request timeouts in seconds by data source type, like `{"elasticsearch": 30}`.
+
+        Errors of individual inquiries do not stop the sweep. They are reported with
+        status `UNKNOWN` when the data source type is not supported, otherwise `FATAL`.
+        """
+        if datasources is None:
+            datasources = self.list_datasources()
+        datasources = list(datasources)
+        timeouts = timeouts or {}
+        concurrency = concurrency or self.client.session_pool_size
+
+        def inquire(datasource: Dict) -> DatasourceHealthResponse:
+            with request_timeout(timeouts.get(datasource["type"], timeout)):
+                return self.health_inquiry(datasource_uid=datasource["uid"], datasource=datasource)
+
+        for result in map_bounded(((inquire, datasource) for datasource in datasources), concurrency):
+            if result.ok:
+                yield result.value
+            else:
+                yield sweep_failure(datasources[result.index], result.error)
+
     @staticmethod
     def parse_health_response_results(response: Dict) -> Tuple[bool, str]:
         success = False
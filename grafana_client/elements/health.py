@@ -1,17 +1,71 @@
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional
+
+from ..client import GrafanaClientError, GrafanaServerError
 from .base import Base
 
+# Fields provided by the `/api/health` endpoint.
+HEALTH_FIELDS = frozenset(["commit", "database", "version"])
+
 
 class Health(Base):
     def __init__(self, client):
         super(Health, self).__init__(client)
         self.client = client
+        # Read-only, and only ever replaced as a whole, so concurrent checks can share it without a lock.
+        self.build_info: Optional[Mapping[str, Any]] = None
+
+    def frontend_settings(self):
+        """
+        Return the frontend settings document, including build information and feature toggles.
+        """
+        path = "/frontend/settings"
+        return self.client.GET(path)
+
+    def health(self):
+        """
+        Return the database status, version, and commit of the Grafana instance.
 
-    def check(self):
+        The `/api/health` endpoint responds with a small document, and does not need
+        authentication, so it is suitable for liveness probes. When the database is
+        not available, it responds with `503 Service Unavailable`.
+        """
+        path = "/health"
+        return self.client.GET(path)
+
+    def check(self, fields: Optional[Iterable[str]] = None):
         """
         Return Grafana build information, compatible with Grafana, and Amazon Managed Grafana (AMG).
 
+        Probes the lightweight `/api/health` endpoint, and merges its `version`, `commit`,
+        and `database` fields into the build information of `/frontend/settings`. The
+        large settings document is only fetched on first use, and when the version
+        changes, or when `/api/health` is not available.
+
+        When all `fields` are provided by `/api/health`, like `fields=["version"]`,
+        `/frontend/settings` is not fetched at all. Fields like `edition` need it.
+
         :return:
         """
-        path = "/frontend/settings"
-        response = self.client.GET(path)
-        return response.get("buildInfo")
+        try:
+            health = self.health()
+        except (GrafanaClientError, GrafanaServerError):
+            # Not available, like on `404 Not Found`, or on `503 Service Unavailable` when the database is down.
+            health = None
+
+        build_info = self.build_info
+        if health is None:
+            health = {}
+            build_info = None
+        health = {name: value for name, value in health.items() if name in HEALTH_FIELDS}
+
+        if build_info is not None and health.get("version", build_info.get("version")) != build_info.get("version"):
+            build_info = None
+        if build_info is None and (fields is None or not set(fields) <= health.keys()):
+            response = self.frontend_settings()
+            build_info = MappingProxyType(dict(response.get("buildInfo") or {}))
+            self.build_info = build_info
+
+        info = dict(build_info or {})
+        info.update(health)
+        return info
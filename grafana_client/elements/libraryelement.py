@@ -1,5 +1,6 @@
 from verlib2 import Version
 
+from ..pagination import iter_pages
 from .base import Base
 
 VERSION_8_2 = Version("8.2")
@@ -160,25 +161,89 @@ class LibraryElement(Base):
         :return:
         """
         list_elements_path = "/library-elements"
-        params = []
+        params = {}
 
         if search_string is not None:
-            params.append("searchString=%s" % search_string)
+            params["searchString"] = search_string
         if kind is not None:
-            params.append("kind=%d" % kind)
+            params["kind"] = kind
         if sort_direction is not None:
-            params.append("sortDirection=%s" % sort_direction)
+            params["sortDirection"] = sort_direction
         if type_filter is not None:
-            params.append("typeFilter=%s" % type_filter)
+            params["typeFilter"] = type_filter
         if exclude_uid is not None:
-            params.append("excludeUid=%s" % exclude_uid)
+            params["excludeUid"] = exclude_uid
         if folder_filter is not None:
-            params.append("folderFilter=%s" % folder_filter)
+            params["folderFilter"] = folder_filter
         if per_page is not None:
-            params.append("perPage=%d" % per_page)
+            params["perPage"] = per_page
         if page is not None:
-            params.append("page=%d" % page)
+            params["page"] = page
 
-        list_elements_path += "?"
-        list_elements_path += "&".join(params)
-        return self.client.GET(list_elements_path)
+        return self.client.GET(list_elements_path, params=params)
+
+    def iter_library_elements(
+        self,
+        search_string: str = None,
+        kind: int = None,
+        sort_direction: str = None,
+        type_filter: str = None,
+        exclude_uid: str = None,
+        folder_filter: str = None,
+        per_page: int = 100,
+        concurrency: int = None,
+        connections: bool = False,
+    ):
+        """
+        List library elements, paging automatically, and yield them lazily, in page order.
+
+        The number of pages is derived from `result.totalCount` and `result.perPage` of the
+        first page, and the remaining pages are fetched concurrently, with at most
+        `concurrency` of them in flight, defaulting to the session pool size.
+
+        With `connections`, yield `(element, connections)` tuples instead. The connections
+        of the elements of each page are fetched as soon as the page arrived, sharing the
+        `concurrency` bound with the page fetches.
+
+        :param search_string:
+        :param kind:
+        :param sort_direction:
+        :param type_filter:
+        :param exclude_uid:
+        :param folder_filter:
+        :param per_page:
+        :param concurrency:
+        :param connections:
+
+        :return:
+        """
+        if concurrency is None:
+            concurrency = self.client.session_pool_size
+
+        def fetch(page):
+            response = self.list_library_elements(
+                search_string=search_string,
+                kind=kind,
+                sort_direction=sort_direction,
+                type_filter=type_filter,
+                exclude_uid=exclude_uid,
+                folder_filter=folder_filter,
+                per_page=per_page,
+                page=page,
+            )
+            return response["result"]
+
+        if not connections:
+            for result in iter_pages(fetch, key="elements", perpage=per_page, concurrency=concurrency):
+                for element in result.get("elements") or []:
+                    yield element
+            return
+
+        def _connections(result):
+            return [(self.get_library_element_connections, element["uid"]) for element in result.get("elements") or []]
+
+        for result, element_connections in iter_pages(
+            fetch, key="elements", perpage=per_page, concurrency=concurrency, expand=_connections
+        ):
+            for element, connections_of_element in zip(result.get("elements") or [], element_connections):
+                yield element, connections_of_element
@@ -11,12 +11,14 @@ class Plugin(Base):
         self.client = client
         self.logger = logging.getLogger(__name__)
 
-    def list(self):
+    def list(self, stream=False):
         """
         Return list of all installed plugins.
+
+        With `stream`, the response is decoded incrementally, and an iterator over the plugins is returned.
         """
         path = "/plugins?embedded=0"
-        return self.client.GET(path)
+        return self.client.GET(path, stream=stream)
 
     def by_id(self, plugin_id):
         """
@@ -1,13 +1,12 @@
+import functools
 import typing as t
 import warnings
 
-from verlib2 import Version
-
 from ..model import PersonalPreferences
+from ..pagination import iter_pages
+from ..records import Interner, TeamRecord
 from .base import Base
 
-VERSION_10_2_0 = Version("10.2.0")
-
 
 class Teams(Base):
     def __init__(self, client, api):
@@ -15,44 +14,59 @@ class Teams(Base):
         self.client = client
         self.api = api
 
-    def search_teams(self, query=None, page=None, perpage=None):
+    def search_teams(self, query=None, page=None, perpage=None, concurrency=1, records=False):
         """
+        Search teams. Without `page`, all pages are fetched, see `iter_teams`.
 
+        :param query:
+        :param page:
+        :param perpage:
+        :param concurrency: Maximum number of pages in flight. Pages are fetched one after another by default.
+        :param records: Return compact `TeamRecord` records instead of dictionaries.
         :return:
         """
-        list_of_teams = []
-        search_teams_path = "/teams/search"
-        params = []
-
-        if query:
-            params.append("query=%s" % query)
+        return [
+            team
+            for team in self.iter_teams(
+                query=query, page=page, perpage=perpage, concurrency=concurrency, records=records
+            )
+        ]
 
-        if page:
-            iterate = False
-            params.append("page=%s" % page)
-        else:
-            iterate = True
-            params.append("page=%s")
-            page = 1
+    def search_teams_page(self, query=None, page=1, perpage=None):
+        """
+        Fetch a single page of teams, including `totalCount`, `page`, and `perPage`.
 
+        :param query:
+        :param page:
+        :param perpage:
+        :return:
+        """
+        params = {"page": page}
+        if query:
+            params["query"] = query
         if perpage:
-            params.append("perpage=%s" % perpage)
-
-        search_teams_path += "?"
-        search_teams_path += "&".join(params)
-
-        if iterate:
-            while True:
-                teams_on_page = self.client.GET(search_teams_path % page)
-                list_of_teams += teams_on_page["teams"]
-                if len(teams_on_page["teams"]) < teams_on_page["perPage"]:
-                    break
-                page += 1
-        else:
-            teams_on_page = self.client.GET(search_teams_path)
-            list_of_teams += teams_on_page["teams"]
+            params["perpage"] = perpage
+        return self.client.GET("/teams/search", params=params)
 
-        return list_of_teams
+    def iter_teams(self, query=None, page=None, perpage=None, concurrency=1, records=False):
+        """
+        Search teams, and yield them in page order. Without `page`, the number of pages is
+        derived from `totalCount` of the first page. With `concurrency` above 1, the remaining
+        pages are fetched concurrently, with at most `concurrency` of them in flight, otherwise
+        one after another. With `records`, compact `TeamRecord` records are yielded.
+        """
+        interner = Interner() if records else None
+        if page:
+            teams_on_page = self.search_teams_page(query=query, page=page, perpage=perpage)
+            for team in teams_on_page["teams"]:
+                yield TeamRecord.from_dict(team, interner) if records else team
+            return
+        fetch = functools.partial(self.search_teams_page, query, perpage=perpage)
+        for teams_on_page in iter_pages(
+            fetch, key="teams", perpage=perpage, concurrency=concurrency if concurrency > 1 else 0
+        ):
+            for team in teams_on_page["teams"]:
+                yield TeamRecord.from_dict(team, interner) if records else team
 
     def get_team_by_name(self, team_name):
         """
@@ -211,7 +225,7 @@ class Teams(Base):
         :param group_id:
         :return:
         """
-        if Version(self.api.version) < VERSION_10_2_0:
+        if not self.api.capabilities.supports("team_external_groups_by_query"):
             team_group_path = "/teams/%s/groups/%s" % (team_id, group_id)
         else:
             team_group_path = "/teams/%s/groups?groupId=%s" % (team_id, group_id)
@@ -0,0 +1,272 @@
+"""
+About
+=====
+Decode Grafana data frames, as returned by `/ds/query` within
+`results[refId].frames`, into NumPy arrays, or pyarrow tables.
+
+Data frames are columnar already: `schema.fields` describes each field, and
+`data.values` holds one array of values per field. The decoder converts each
+array as a whole, without iterating over individual values in Python.
+
+- Time fields, in epoch milliseconds, become `datetime64[ns]` arrays. The
+  `data.nanos` side channel adds sub-millisecond precision.
+- Numeric and boolean fields use the type announced by `typeInfo.frame`, like
+  `int64`, or `float32`, falling back to `float64` for `number` fields.
+- `null` values are masked, using `numpy.ma.MaskedArray`, or Arrow validity
+  bitmaps. Arrays without `null` values are plain `numpy.ndarray` instances.
+- The `data.entities` side channel restores `NaN`, `+Inf`, and `-Inf` values,
+  which JSON can not represent, and which are encoded as `null` values.
+
+NumPy is required, pyarrow is required for decoding into Arrow tables. Install
+them using `pip install grafana-client[numpy]`, or `pip install grafana-client[arrow]`::
+
+    response = grafana.datasource.smartquery(datasource, "up")
+    frames = decode_results(response)
+    frames["A"][0]["Time"]
+
+    tables = decode_results(response, backend="arrow")
+"""
+
+import dataclasses
+import json
+import typing as t
+
+# Map `typeInfo.frame` to NumPy data types. Other types are kept as Python objects.
+NUMPY_TYPES: t.Dict[str, str] = {
+    "int8": "int8",
+    "int16": "int16",
+    "int32": "int32",
+    "int64": "int64",
+    "uint8": "uint8",
+    "uint16": "uint16",
+    "uint32": "uint32",
+    "uint64": "uint64",
+    "float32": "float32",
+    "float64": "float64",
+    "bool": "bool",
+    "enum": "uint16",
+}
+
+# Map field types to NumPy data types, when `typeInfo` is missing.
+FIELD_TYPES: t.Dict[str, str] = {
+    "number": "float64",
+    "boolean": "bool",
+}
+
+# Values of the `data.entities` side channel.
+ENTITIES: t.Dict[str, float] = {
+    "NaN": float("nan"),
+    "Inf": float("inf"),
+    "NegInf": float("-inf"),
+}
+
+BACKENDS = ["numpy", "arrow"]
+
+
+@dataclasses.dataclass
+class FrameField:
+    """
+    A decoded field of a data frame.
+
+    `values` is a `numpy.ndarray`, or a `numpy.ma.MaskedArray`, when the field has `null` values.
+    `type` is the field type of the schema, like `time`, `number`, `string`, or `boolean`.
+    """
+
+    name: str
+    type: str
+    values: t.Any
+    labels: t.Dict[str, str] = dataclasses.field(default_factory=dict)
+    config: t.Dict[str, t.Any] = dataclasses.field(default_factory=dict)
+    type_info: t.Dict[str, t.Any] = dataclasses.field(default_factory=dict)
+
+
+@dataclasses.dataclass
+class Frame:
+    """
+    A decoded data frame, holding one NumPy array per field.
+    """
+
+    name: t.Optional[str] = None
+    ref_id: t.Optional[str] = None
+    meta: t.Dict[str, t.Any] = dataclasses.field(default_factory=dict)
+    fields: t.List[FrameField] = dataclasses.field(default_factory=list)
+
+    def __len__(self):
+        return len(self.fields[0].values) if self.fields else 0
+
+    def __getitem__(self, name: str):
+        return self.field(name).values
+
+    def field(self, name: str) -> FrameField:
+        """
+        Return the first field with the given name.
+        """
+        for field in self.fields:
+            if field.name == name:
+                return field
+        raise KeyError(f"Unknown field: {name}. Fields: {', '.join(field.name for field in self.fields)}")
+
+    @property
+    def names(self) -> t.List[str]:
+        return [field.name for field in self.fields]
+
+    def to_arrow(self):
+        """
+        Convert the frame to a `pyarrow.Table`.
+
+        Labels, config, and type information of fields, and name, `refId`, and
+        meta information of the frame, are stored as JSON encoded metadata.
+        """
+        import pyarrow as pa
+
+        arrays = []
+        fields = []
+        for field in self.fields:
+            array = arrow_array(pa, field)
+            metadata = {
+                key: json.dumps(value)
+                for key, value in [("labels", field.labels), ("config", field.config), ("typeInfo", field.type_info)]
+                if value
+            }
+            arrays.append(array)
+            fields.append(pa.field(field.name, array.type, metadata=metadata or None))
+        metadata = {key: value for key, value in [("name", self.name), ("refId", self.ref_id)] if value}
+        if self.meta:
+            metadata["meta"] = json.dumps(self.meta)
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields, metadata=metadata or None))
+
+
+def decode_frame(frame: t.Dict[str, t.Any]) -> Frame:
+    """
+    Decode a single data frame in JSON format into a `Frame` of NumPy arrays.
+    """
+    import numpy as np
+
+    schema = frame.get("schema") or {}
+    data = frame.get("data") or {}
+    values = data.get("values") or []
+    entities = data.get("entities") or []
+    nanos = data.get("nanos") or []
+    fields = []
+    for index, item in enumerate(schema.get("fields") or []):
+        field_values = values[index] if index < len(values) else []
+        field_entities = entities[index] if index < len(entities) else None
+        field_nanos = nanos[index] if index < len(nanos) else None
+        type_info = item.get("typeInfo") or {}
+        fields.append(
+            FrameField(
+                name=item.get("name", ""),
+                type=item.get("type", "other"),
+                values=decode_values(np, item, field_values, field_entities, field_nanos),
+                labels=item.get("labels") or {},
+                config=item.get("config") or {},
+                type_info=type_info,
+            )
+        )
+    return Frame(name=schema.get("name"), ref_id=schema.get("refId"), meta=schema.get("meta") or {}, fields=fields)
+
+
+def decode_frames(value: t.Union[t.Dict[str, t.Any], t.List[t.Dict[str, t.Any]]], backend: str = "numpy") -> t.List:
+    """
+    Decode the data frames of a single query result, `{"frames": [...]}`, or a list of frames.
+
+    Return a list of `Frame` instances, or of `pyarrow.Table` instances, when `backend` is `arrow`.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Available backends: {', '.join(BACKENDS)}")
+    frames = (value.get("frames") or []) if isinstance(value, dict) else value
+    decoded = [decode_frame(frame) for frame in frames]
+    if backend == "arrow":
+        return [frame.to_arrow() for frame in decoded]
+    return decoded
+
+
+def decode_results(response: t.Dict[str, t.Any], backend: str = "numpy") -> t.Dict[str, t.List]:
+    """
+    Decode the data frames of a `/ds/query` response, or of `smartquery_many` results, by `refId`.
+    """
+    results = response.get("results", response)
+    return {ref_id: decode_frames(result or {}, backend=backend) for ref_id, result in results.items()}
+
+
+def field_dtype(field: t.Dict[str, t.Any]) -> t.Optional[str]:
+    """
+    Return the NumPy data type of a field, `datetime64[ns]` for time fields, or `None` for Python objects.
+    """
+    type_info = field.get("typeInfo") or {}
+    frame_type = type_info.get("frame")
+    if frame_type == "time.Time" or (frame_type is None and field.get("type") == "time"):
+        return "datetime64[ns]"
+    if frame_type is not None:
+        return NUMPY_TYPES.get(frame_type)
+    return FIELD_TYPES.get(field.get("type", "other"))
+
+
+def decode_values(np, field: t.Dict[str, t.Any], values: t.List, entities=None, nanos=None):
+    """
+    Convert the values of a field to a NumPy array, masking `null` values, and applying side channels.
+    """
+    dtype = field_dtype(field)
+    if dtype is None:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        mask = np.equal(array, None) if None in values else None
+    elif dtype == "datetime64[ns]":
+        array, mask = to_array(np, values, "int64")
+        array *= 1_000_000
+        if nanos is not None:
+            array += np.asarray(nanos, dtype="int64")
+        array = array.view("datetime64[ns]")
+        if mask is not None:
+            array[mask] = np.datetime64("NaT")
+    elif np.dtype(dtype).kind == "f":
+        # `None` converts to `NaN`, and JSON can not contain other `NaN` values.
+        array = np.asarray(values, dtype=dtype)
+        mask = np.isnan(array)
+        if not mask.any():
+            mask = None
+    else:
+        array, mask = to_array(np, values, dtype)
+
+    if entities and mask is not None and array.dtype.kind == "f":
+        for name, value in ENTITIES.items():
+            indexes = entities.get(name)
+            if indexes:
+                array[indexes] = value
+                mask[indexes] = False
+    if mask is not None and mask.any():
+        return np.ma.MaskedArray(array, mask=mask)
+    return array
+
+
+def to_array(np, values: t.List, dtype: str):
+    """
+    Convert values to a NumPy array of the given type, returning it together with the mask of `null` values.
+    """
+    if None not in values:
+        return np.asarray(values, dtype=dtype), None
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    mask = np.equal(array, None)
+    array[mask] = 0
+    return array.astype(dtype), mask
+
+
+def arrow_array(pa, field: FrameField):
+    """
+    Convert the values of a decoded field to a `pyarrow.Array`.
+    """
+    import numpy as np
+
+    values = field.values
+    mask = np.ma.getmaskarray(values) if np.ma.isMaskedArray(values) else None
+    data = np.ma.getdata(values)
+    if data.dtype.kind == "M":
+        return pa.array(data.view("int64"), type=pa.timestamp("ns", tz="UTC"), mask=mask)
+    if data.dtype == object:
+        if field.type == "string" or (field.type_info or {}).get("frame") == "string":
+            return pa.array(data, type=pa.string(), mask=mask)
+        # Fields of other types, like `json.RawMessage`, are stored as JSON strings.
+        encoded = np.array([None if item is None else json.dumps(item) for item in data], dtype=object)
+        return pa.array(encoded, type=pa.string())
+    return pa.array(data, mask=mask)
@@ -0,0 +1,114 @@
+"""
+About
+=====
+An optional in-memory index of data sources, for resolving data sources by
+id, uid, or name without a request per lookup.
+
+The index is built from a single `list_datasources()` call, and is kept for
+`ttl` seconds. A lookup missing the index triggers at most one refresh per
+identifier, so looking up unknown data sources repeatedly does not cause a
+refresh each time. Creating, updating, or deleting data sources through the
+`Datasource` element invalidates the index.
+
+Enable it on the `Datasource` element::
+
+    grafana.datasource.index = DatasourceIndex(ttl=60)
+
+Note that items of the data source list lack a few attributes returned when
+fetching individual data sources, like `secureJsonFields`, and `version`.
+"""
+
+import copy
+import threading
+import time
+import typing as t
+
+from .model import DatasourceIdentifier
+
+
+class DatasourceIndex:
+    """
+    Map data source ids, uids, and names to data source items, expiring after `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = 60.0, clock: t.Callable[[], float] = time.monotonic):
+        if ttl < 0:
+            raise ValueError("Time-to-live must not be negative")
+        self.ttl = ttl
+        self.clock = clock
+        self.refreshes = 0
+        self.by_id: t.Dict[str, t.Dict] = {}
+        self.by_uid: t.Dict[str, t.Dict] = {}
+        self.by_name: t.Dict[str, t.Dict] = {}
+        self.misses: t.Set[t.Tuple[str, str]] = set()
+        self.expires: t.Optional[float] = None
+        self.lock = threading.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self.expires is None or self.clock() >= self.expires
+
+    @staticmethod
+    def key(dsident: DatasourceIdentifier) -> t.Tuple[str, str]:
+        if dsident.id:
+            return "id", str(dsident.id)
+        if dsident.uid:
+            return "uid", dsident.uid
+        if dsident.name:
+            return "name", dsident.name
+        raise KeyError("Data source must be identified by one of id, uid, or name")
+
+    def update(self, datasources: t.Iterable[t.Dict]):
+        """
+        Replace the index by the given data source items.
+        """
+        by_id, by_uid, by_name = {}, {}, {}
+        for datasource in datasources:
+            if "id" in datasource:
+                by_id[str(datasource["id"])] = datasource
+            if "uid" in datasource:
+                by_uid[datasource["uid"]] = datasource
+            if "name" in datasource:
+                by_name[datasource["name"]] = datasource
+        with self.lock:
+            self.by_id, self.by_uid, self.by_name = by_id, by_uid, by_name
+            self.expires = self.clock() + self.ttl
+            self.refreshes += 1
+
+    def lookup(self, dsident: DatasourceIdentifier) -> t.Optional[t.Dict]:
+        """
+        Return a copy of the data source item, or `None` when it is unknown, or the index is stale.
+
+        Callers may modify the returned item, without affecting the index.
+        """
+        kind, value = self.key(dsident)
+        if self.stale:
+            return None
+        datasource = getattr(self, f"by_{kind}").get(value)
+        if datasource is None:
+            return None
+        return copy.deepcopy(datasource)
+
+    def should_refresh(self, dsident: DatasourceIdentifier) -> bool:
+        """
+        Decide whether a lookup which missed the index should refresh it.
+
+        That is the case when the index is stale, or when the identifier has not
+        missed since the index expired the last time. Further misses of the same
+        identifier do not refresh the index again.
+        """
+        key = self.key(dsident)
+        with self.lock:
+            if self.expires is None or self.clock() >= self.expires:
+                self.misses = {key}
+                return True
+            if key in self.misses:
+                return False
+            self.misses.add(key)
+            return True
+
+    def invalidate(self):
+        with self.lock:
+            self.by_id, self.by_uid, self.by_name = {}, {}, {}
+            self.misses = set()
+            self.expires = None
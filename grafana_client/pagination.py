@@ -0,0 +1,308 @@
+"""
+About
+=====
+Lazily walk the pages of paginated Grafana API endpoints, like
+`/serviceaccounts/search`, `/users/search`, or `/teams/search`, which respond
+with `totalCount`, `page`, and `perPage` attributes next to the items of the
+requested page.
+
+- The first page is fetched right away, and yielded after a single round trip.
+  Subsequent pages are fetched as the consumer reaches them, so only the pages
+  in flight, and the current one, are held in memory.
+- When the first page carries `totalCount`, and `perPage` is known, the number
+  of pages is computed upfront, and no request is spent on an empty
+  terminating page. Otherwise, pages are walked until a short, or empty one.
+- With `concurrency`, up to that many of the following pages are fetched in
+  the background, while the consumer processes the current one. Pages are
+  always yielded in page order. Without known number of pages, pages are
+  fetched speculatively, and pages after the first short one are discarded.
+- With `expand`, a function returning tasks for a page, like lookups of
+  details for each of its items, pages are yielded as `(document, values)`
+  tuples. The tasks of a page start as soon as it arrived, and share the
+  `concurrency` bound with the page fetches, so at most `concurrency`
+  requests are in flight overall.
+
+`iter_pages` fetches pages on a thread pool, `aiter_pages` fetches them as
+tasks, using an asynchronous `fetch` function::
+
+    fetch = functools.partial(grafana.serviceaccount.search_page, "serv", perpage=100)
+    for page in iter_pages(fetch, key="serviceAccounts", perpage=100, concurrency=1):
+        ...
+"""
+
+import asyncio
+import collections
+import itertools
+import math
+import threading
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .concurrency import TaskSpec, submit, task_callable
+
+
+def page_items(document: t.Any, key: t.Optional[str]) -> t.List:
+    """
+    Return the items of a page, either the page itself, or its `key` attribute.
+    """
+    if key is None:
+        return document or []
+    return (document or {}).get(key) or []
+
+
+def page_count(document: t.Any, perpage: t.Optional[int] = None) -> t.Optional[int]:
+    """
+    Compute the number of pages from `totalCount` and `perPage` of the first page, or return `None`.
+    """
+    if not isinstance(document, dict) or document.get("totalCount") is None:
+        return None
+    perpage = document.get("perPage") or perpage
+    if not perpage:
+        return None
+    return max(math.ceil(document["totalCount"] / perpage), 1)
+
+
+def last_page(document: t.Any, key: t.Optional[str], perpage: t.Optional[int]) -> bool:
+    """
+    Whether a page ends a walk without known number of pages, because it is short, or empty.
+    """
+    items = page_items(document, key)
+    perpage = (document.get("perPage") if isinstance(document, dict) else None) or perpage
+    return not items or (perpage is not None and len(items) < perpage)
+
+
+def ramp_sizes(limit: int, initial: t.Optional[int] = None) -> t.List[int]:
+    """
+    Return growing page sizes for walking an endpoint by `page` and `limit`, starting
+    at `initial`, and doubling up to `limit`.
+
+    The sizes are `limit` halved repeatedly, so, after fetching page 1 using the
+    first size, page 2 using each size continues exactly where the previous
+    page ended, and page 2 using `limit` follows the last of them.
+    """
+    sizes = [limit]
+    while initial is not None and sizes[-1] % 2 == 0 and sizes[-1] // 2 >= initial:
+        sizes.append(sizes[-1] // 2)
+    return sizes[::-1]
+
+
+def check_concurrency(concurrency: int):
+    if concurrency < 0:
+        raise ValueError("Concurrency must not be negative")
+
+
+def iter_pages(
+    fetch: t.Callable[[int], t.Any],
+    key: t.Optional[str] = None,
+    perpage: t.Optional[int] = None,
+    start: int = 1,
+    concurrency: int = 0,
+    expand: t.Optional[t.Callable[[t.Any], t.Iterable[TaskSpec]]] = None,
+) -> t.Iterator[t.Any]:
+    """
+    Fetch pages using `fetch(page)`, starting at page `start`, and yield them in page order.
+
+    `concurrency` is the number of pages fetched in the background ahead of the consumer.
+
+    With `expand`, yield `(document, values)` tuples, where `values` are the values of
+    the tasks returned by `expand(document)`, in order.
+    """
+    check_concurrency(concurrency)
+    if expand is not None:
+        yield from _iter_expanded_pages(fetch, expand, key, perpage, start, concurrency)
+        return
+    document = fetch(start)
+    count = page_count(document, perpage)
+    if count is None and last_page(document, key, perpage):
+        yield document
+        return
+    pages = iter(range(start + 1, start + count)) if count is not None else itertools.count(start + 1)
+    if not concurrency:
+        yield document
+        for page in pages:
+            document = fetch(page)
+            yield document
+            if count is None and last_page(document, key, perpage):
+                return
+        return
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="grafana-client")
+    pending = collections.deque(submit(executor, fetch, page) for page in itertools.islice(pages, concurrency))
+    try:
+        yield document
+        while pending:
+            document = pending.popleft().result()
+            if count is None and last_page(document, key, perpage):
+                yield document
+                return
+            pending.extend(submit(executor, fetch, page) for page in itertools.islice(pages, 1))
+            yield document
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+async def aiter_pages(
+    fetch: t.Callable[[int], t.Awaitable[t.Any]],
+    key: t.Optional[str] = None,
+    perpage: t.Optional[int] = None,
+    start: int = 1,
+    concurrency: int = 0,
+    expand: t.Optional[t.Callable[[t.Any], t.Iterable[TaskSpec]]] = None,
+) -> t.AsyncIterator[t.Any]:
+    """
+    Fetch pages using the coroutine function `fetch(page)`, starting at page `start`, and yield them in page order.
+
+    `concurrency` is the number of pages fetched in the background ahead of the consumer.
+
+    With `expand`, yield `(document, values)` tuples, where `values` are the values of
+    the awaitable tasks returned by `expand(document)`, in order.
+    """
+    check_concurrency(concurrency)
+    if expand is not None:
+        async for item in _aiter_expanded_pages(fetch, expand, key, perpage, start, concurrency):
+            yield item
+        return
+    document = await fetch(start)
+    count = page_count(document, perpage)
+    if count is None and last_page(document, key, perpage):
+        yield document
+        return
+    pages = iter(range(start + 1, start + count)) if count is not None else itertools.count(start + 1)
+    if not concurrency:
+        yield document
+        for page in pages:
+            document = await fetch(page)
+            yield document
+            if count is None and last_page(document, key, perpage):
+                return
+        return
+
+    pending = collections.deque(asyncio.ensure_future(fetch(page)) for page in itertools.islice(pages, concurrency))
+    try:
+        yield document
+        while pending:
+            document = await pending.popleft()
+            if count is None and last_page(document, key, perpage):
+                yield document
+                return
+            pending.extend(asyncio.ensure_future(fetch(page)) for page in itertools.islice(pages, 1))
+            yield document
+    finally:
+        for future in pending:
+            future.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _iter_expanded_pages(
+    fetch: t.Callable[[int], t.Any],
+    expand: t.Callable[[t.Any], t.Iterable[TaskSpec]],
+    key: t.Optional[str],
+    perpage: t.Optional[int],
+    start: int,
+    concurrency: int,
+) -> t.Iterator[t.Tuple[t.Any, t.List[t.Any]]]:
+    """
+    Walk pages like `iter_pages`, running the tasks of each page on the same thread pool as the page fetches.
+    """
+    if not concurrency:
+        for document in iter_pages(fetch, key=key, perpage=perpage, start=start):
+            yield document, [task_callable(task)() for task in expand(document)]
+        return
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="grafana-client")
+    closed = threading.Event()
+
+    def fetch_expanded(page: int) -> t.Tuple[t.Any, t.List[Future]]:
+        document = fetch(page)
+        if closed.is_set():
+            return document, []
+        return document, [submit(executor, task_callable(task)) for task in expand(document)]
+
+    # Page futures ahead of the consumer, and the task futures of the current page.
+    pending: t.Deque[Future] = collections.deque()
+    futures: t.List[Future] = []
+    try:
+        document, futures = fetch_expanded(start)
+        count = page_count(document, perpage)
+        pages = iter(range(start + 1, start + count)) if count is not None else itertools.count(start + 1)
+        if count is not None or not last_page(document, key, perpage):
+            pending.extend(submit(executor, fetch_expanded, page) for page in itertools.islice(pages, concurrency))
+        while True:
+            yield document, [future.result() for future in futures]
+            if not pending:
+                return
+            document, futures = pending.popleft().result()
+            if count is None and last_page(document, key, perpage):
+                yield document, [future.result() for future in futures]
+                return
+            pending.extend(submit(executor, fetch_expanded, page) for page in itertools.islice(pages, 1))
+    finally:
+        closed.set()
+        for future in pending:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                futures.extend(future.result()[1])
+            future.cancel()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+async def _aiter_expanded_pages(
+    fetch: t.Callable[[int], t.Awaitable[t.Any]],
+    expand: t.Callable[[t.Any], t.Iterable[TaskSpec]],
+    key: t.Optional[str],
+    perpage: t.Optional[int],
+    start: int,
+    concurrency: int,
+) -> t.AsyncIterator[t.Tuple[t.Any, t.List[t.Any]]]:
+    """
+    Walk pages like `aiter_pages`, running the tasks of each page within the same concurrency bound as the page fetches.
+    """
+    if not concurrency:
+        async for document in aiter_pages(fetch, key=key, perpage=perpage, start=start):
+            yield document, [await task_callable(task)() for task in expand(document)]
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(function: t.Callable[[], t.Awaitable[t.Any]]) -> t.Any:
+        async with semaphore:
+            return await function()
+
+    async def fetch_expanded(page: int) -> t.Tuple[t.Any, t.List[asyncio.Future]]:
+        document = await bounded(lambda: fetch(page))
+        return document, [asyncio.ensure_future(bounded(task_callable(task))) for task in expand(document)]
+
+    async def values(futures: t.List[asyncio.Future]) -> t.List[t.Any]:
+        return [await future for future in futures]
+
+    # Page futures ahead of the consumer, and the task futures of the current page.
+    pending: t.Deque[asyncio.Future] = collections.deque()
+    futures: t.List[asyncio.Future] = []
+    try:
+        document, futures = await fetch_expanded(start)
+        count = page_count(document, perpage)
+        pages = iter(range(start + 1, start + count)) if count is not None else itertools.count(start + 1)
+        if count is not None or not last_page(document, key, perpage):
+            pending.extend(asyncio.ensure_future(fetch_expanded(page)) for page in itertools.islice(pages, concurrency))
+        while True:
+            yield document, await values(futures)
+            if not pending:
+                return
+            document, futures = await pending.popleft()
+            if count is None and last_page(document, key, perpage):
+                yield document, await values(futures)
+                return
+            pending.extend(asyncio.ensure_future(fetch_expanded(page)) for page in itertools.islice(pages, 1))
+    finally:
+        for future in pending:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                futures.extend(future.result()[1])
+            future.cancel()
+        for future in futures:
+            future.cancel()
+        if pending or futures:
+            await asyncio.gather(*pending, *futures, return_exceptions=True)
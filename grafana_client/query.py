@@ -0,0 +1,346 @@
+"""
+About
+=====
+Combine many data source queries into few requests to Grafana's generic
+`/ds/query` endpoint, which accepts multiple queries, each one identified by
+its `refId`, even addressing different data sources, within a single body.
+
+`QueryBatch` collects queries, builds their payloads using
+`knowledge.query_factory`, and groups them into request bodies sharing the
+same time range, respecting limits on the number of queries, and the size of
+each request body. `Datasource.smartquery_many` submits them, and splits the
+`results` of each response back per `refId`.
+
+Queries which can not be submitted to `/ds/query`, for example, InfluxQL or
+Graphite queries, which use the data source proxy, are submitted one by one.
+
+For long time ranges, `split_time_range` splits Prometheus `query_range`
+requests into shards aligned to their evaluation steps, and `MatrixMerger`
+merges the results of the shards per series.
+
+For long lists of series matchers, `chunk_tasks` splits Prometheus series,
+label names, and label values lookups into chunks, and `SeriesMerger` and
+`LabelMerger` merge and deduplicate their results.
+"""
+
+import dataclasses
+import datetime
+import json
+import re
+import time
+import typing as t
+
+from .knowledge import query_factory
+from .model import DatasourceIdentifier
+
+DEFAULT_MAX_QUERIES: int = 50
+DEFAULT_MAX_BYTES: int = 1024 * 1024
+
+
+@dataclasses.dataclass
+class BatchQuery:
+    """
+    A single query of a `QueryBatch`.
+    """
+
+    ref_id: str
+    datasource: t.Union[DatasourceIdentifier, t.Dict]
+    expression: t.Optional[str] = None
+    attrs: t.Optional[t.Dict] = None
+
+    def model(self, time_from: int, time_to: int) -> t.Dict:
+        """
+        Return the query model for `query_factory`, like `smartquery` does.
+        """
+        model = {"refId": self.ref_id, "time_from": time_from, "time_to": time_to}
+        if self.expression is not None and (self.attrs is None or "query" not in self.attrs):
+            model["query"] = self.expression
+        if self.attrs is not None:
+            model.update(self.attrs)
+        model["refId"] = self.ref_id
+        model.setdefault("requestId", self.ref_id)
+        return model
+
+
+class QueryBatch:
+    """
+    Collect queries to be submitted together using `Datasource.smartquery_many`.
+
+    All queries share the same time range, `time_from` and `time_to` in epoch
+    seconds, defaulting to the last five minutes. Individual queries can
+    override it using the `time_from` and `time_to` attributes.
+
+    Each request body contains at most `max_queries` queries, and at most
+    `max_bytes` bytes of encoded queries, unless a single query exceeds it.
+
+    Example::
+
+        batch = QueryBatch()
+        batch.add(prometheus, "up")
+        batch.add(postgres, "SELECT 1", attrs={"format": "table"}, ref_id="one")
+        results = grafana.datasource.smartquery_many(batch)
+        results["one"]
+    """
+
+    def __init__(
+        self,
+        time_from: t.Optional[int] = None,
+        time_to: t.Optional[int] = None,
+        max_queries: int = DEFAULT_MAX_QUERIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        if max_queries < 1:
+            raise ValueError("Maximum number of queries per request must be at least 1")
+        now = int(time.time())
+        self.time_to = time_to if time_to is not None else now
+        self.time_from = time_from if time_from is not None else self.time_to - 5 * 60
+        self.max_queries = max_queries
+        self.max_bytes = max_bytes
+        self.queries: t.List[BatchQuery] = []
+
+    def __len__(self):
+        return len(self.queries)
+
+    @classmethod
+    def from_value(cls, value: t.Union["QueryBatch", t.Iterable[t.Tuple]]) -> "QueryBatch":
+        """
+        Accept a `QueryBatch` instance, or an iterable of `(datasource, expression)`,
+        or `(datasource, expression, attrs)` tuples.
+        """
+        if isinstance(value, cls):
+            return value
+        batch = cls()
+        for item in value:
+            batch.add(*item)
+        return batch
+
+    def add(
+        self,
+        datasource: t.Union[DatasourceIdentifier, t.Dict],
+        expression: t.Optional[str] = None,
+        attrs: t.Optional[t.Dict] = None,
+        ref_id: t.Optional[str] = None,
+    ) -> str:
+        """
+        Add a query, and return its `refId`, which defaults to `q0`, `q1`, and so on.
+        """
+        if expression is None and (attrs is None or "query" not in attrs):
+            raise ValueError("expression must be given")
+        if ref_id is None:
+            ref_id = f"q{len(self.queries)}"
+        if any(query.ref_id == ref_id for query in self.queries):
+            raise ValueError(f"Duplicate refId: {ref_id}")
+        self.queries.append(BatchQuery(ref_id=ref_id, datasource=datasource, expression=expression, attrs=attrs))
+        return ref_id
+
+    def build(self, legacy: bool = False) -> t.Tuple[t.List[t.Dict], t.List[BatchQuery]]:
+        """
+        Build the request bodies for `/ds/query`, and return them together with the
+        queries which must be submitted individually.
+
+        With `legacy`, Prometheus and Loki queries are submitted individually, because
+        Grafana 7 and earlier do not support them on `/ds/query`.
+        """
+        groups: t.Dict[t.Tuple[str, str], t.List[t.Dict]] = {}
+        individual = []
+        for query in self.queries:
+            if isinstance(query.datasource, DatasourceIdentifier):
+                raise TypeError(f"Data source of query {query.ref_id} has not been resolved")
+            request = query_factory(query.datasource, query.model(self.time_from, self.time_to))
+            if not self.batchable(query.datasource, request, legacy):
+                individual.append(query)
+                continue
+            data = request["data"]
+            for item in data["queries"]:
+                groups.setdefault((data["from"], data["to"]), []).append(item)
+
+        payloads = []
+        for (time_from, time_to), items in groups.items():
+            for chunk in self.chunk(items):
+                payloads.append({"queries": chunk, "from": time_from, "to": time_to})
+        return payloads, individual
+
+    @staticmethod
+    def batchable(datasource: t.Dict, request: t.Dict, legacy: bool) -> bool:
+        data = request.get("data")
+        if not isinstance(data, dict) or "queries" not in data:
+            return False
+        if datasource.get("access") not in ["server", "proxy"]:
+            return False
+        if legacy and datasource["type"] in ("prometheus", "loki"):
+            return False
+        return True
+
+    def chunk(self, items: t.List[t.Dict]) -> t.Iterator[t.List[t.Dict]]:
+        chunk: t.List[t.Dict] = []
+        size = 0
+        for item in items:
+            item_size = len(json.dumps(item, separators=(",", ":")))
+            if chunk and (len(chunk) >= self.max_queries or size + item_size > self.max_bytes):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(item)
+            size += item_size
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def split(payload: t.Dict, response: t.Any) -> t.Dict[str, t.Any]:
+        """
+        Split the response to a request body into the results of its queries, by `refId`.
+        """
+        results = response.get("results", {}) if isinstance(response, dict) else {}
+        return {item["refId"]: results.get(item["refId"]) for item in payload["queries"]}
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+
+
+def parse_duration(value: t.Union[int, float, str]) -> float:
+    """
+    Convert a duration in seconds, or a Prometheus duration string like `30s`, or `1h30m`, to seconds.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        raise ValueError(f"Invalid duration: {value}")
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def to_timestamp(value: t.Union[int, float, str, datetime.datetime]) -> float:
+    """
+    Convert a Unix timestamp, or a `datetime`, to a Unix timestamp in seconds.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def split_time_range(start: float, end: float, step: float, shard_size: float) -> t.List[t.Tuple[float, float]]:
+    """
+    Split the range of a `query_range` request into shards of at most `shard_size` seconds.
+
+    Shard boundaries are aligned to the evaluation steps of the whole range, so the
+    shards evaluate exactly the same timestamps as the whole range would, and
+    adjacent shards do not overlap.
+    """
+    if step <= 0:
+        raise ValueError("Step must be positive")
+    if end < start:
+        raise ValueError("End of time range must not be before its start")
+    points_per_shard = max(int(shard_size // step), 1)
+    shards = []
+    shard_start = start
+    while shard_start <= end:
+        shard_end = min(shard_start + (points_per_shard - 1) * step, end)
+        shards.append((shard_start, shard_end))
+        shard_start = start + len(shards) * points_per_shard * step
+    return shards
+
+
+class MatrixMerger:
+    """
+    Merge the `matrix` results of Prometheus `query_range` responses per series,
+    keyed by their labels, ordering samples by timestamp, and removing duplicate
+    samples at shard boundaries.
+    """
+
+    def __init__(self):
+        self.series: t.Dict[t.Tuple, t.Tuple[t.Dict, t.Dict[float, t.Any]]] = {}
+        self.warnings: t.List[str] = []
+
+    def add(self, response: t.Dict):
+        data = response.get("data") or {}
+        result_type = data.get("resultType", "matrix")
+        if result_type != "matrix":
+            raise ValueError(f"Unable to merge results of type '{result_type}'")
+        self.warnings.extend(response.get("warnings", []))
+        for item in data.get("result", []):
+            metric = item.get("metric", {})
+            key = tuple(sorted(metric.items()))
+            if key not in self.series:
+                self.series[key] = (metric, {})
+            self.series[key][1].update((timestamp, value) for timestamp, value in item.get("values", []))
+
+    def result(self) -> t.Dict:
+        """
+        Return the merged response, in the format of a Prometheus `query_range` response.
+        """
+        result = [
+            {"metric": metric, "values": [[timestamp, values[timestamp]] for timestamp in sorted(values)]}
+            for metric, values in self.series.values()
+        ]
+        response = {"status": "success", "data": {"resultType": "matrix", "result": result}}
+        if self.warnings:
+            response["warnings"] = list(dict.fromkeys(self.warnings))
+        return response
+
+
+def chunk_tasks(
+    method: t.Callable, match: t.Union[str, t.Sequence[str], None], chunk_size: int, **kwargs
+) -> t.List[t.Tuple[t.Callable, t.Tuple, t.Dict[str, t.Any]]]:
+    """
+    Split a list of series matchers into chunks of at most `chunk_size` matchers, and
+    return tasks for `map_bounded`, invoking `method` once per chunk.
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1")
+    if match is None or isinstance(match, str):
+        chunks = [match]
+    else:
+        matchers = list(dict.fromkeys(match))
+        chunks = [matchers[index : index + chunk_size] for index in range(0, len(matchers), chunk_size)]
+    return [(method, (), dict(kwargs, match=chunk)) for chunk in chunks]
+
+
+class SeriesMerger:
+    """
+    Merge the results of Prometheus series lookups, removing duplicate label sets.
+    """
+
+    def __init__(self):
+        self.series: t.Dict[t.FrozenSet, t.Dict[str, str]] = {}
+        self.warnings: t.List[str] = []
+
+    def add(self, response: t.Dict):
+        self.warnings.extend(response.get("warnings", []))
+        for labels in response.get("data") or []:
+            self.series.setdefault(frozenset(labels.items()), labels)
+
+    def result(self) -> t.Dict:
+        """
+        Return the merged response, in the format of a Prometheus series response.
+        """
+        response = {"status": "success", "data": list(self.series.values())}
+        if self.warnings:
+            response["warnings"] = list(dict.fromkeys(self.warnings))
+        return response
+
+
+class LabelMerger:
+    """
+    Merge the results of Prometheus label names, or label values lookups, into a sorted list of unique items.
+    """
+
+    def __init__(self):
+        self.labels: t.Set[str] = set()
+        self.warnings: t.List[str] = []
+
+    def add(self, response: t.Dict):
+        self.warnings.extend(response.get("warnings", []))
+        self.labels.update(response.get("data") or [])
+
+    def result(self) -> t.Dict:
+        """
+        Return the merged response, in the format of a Prometheus labels response.
+        """
+        response = {"status": "success", "data": sorted(self.labels)}
+        if self.warnings:
+            response["warnings"] = list(dict.fromkeys(self.warnings))
+        return response
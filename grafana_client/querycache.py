@@ -0,0 +1,355 @@
+"""
+About
+=====
+An optional, incremental cache for the results of time series queries
+submitted through `Datasource.smartquery` to the `/ds/query` endpoint.
+
+Reporting workloads often run the same queries repeatedly over a sliding
+time window, like the last 24 hours, every minute. Instead of downloading the
+whole window each time, the cache keeps the data frames of previous results,
+and only fetches the missing tail of the time range.
+
+- Entries are keyed by data source uid, the normalized query model, and the
+  step, which is the `intervalMs` attribute of the query.
+- Time ranges are aligned to step buckets, so repeated requests evaluate the
+  same timestamps.
+- Data within the `mutable` window, counting back from the time it has been
+  fetched, is considered incomplete, and fetched again on the next request.
+- Cached and fetched frames are merged by series, and trimmed to the requested
+  time range.
+- Entries are evicted in least-recently-used order, when exceeding the maximum
+  number of bytes.
+
+Enable it on the `Datasource` element::
+
+    grafana.datasource.query_cache = QueryResultCache(mutable=300, max_bytes=256 * 1024 * 1024)
+
+Only results consisting of data frames with a time field are cached, instant
+queries, and queries without an `intervalMs` attribute are not. Neither are
+relative time ranges, like `now-24h`, and time ranges spanning more than
+`maxDataPoints` steps, because Grafana computes a coarser step for them from
+the time range, which would not match the step of a shorter tail request.
+"""
+
+import bisect
+import collections
+import copy
+import dataclasses
+import json
+import threading
+import time
+import typing as t
+
+# Query attributes which do not change the result of a query.
+IGNORED_ATTRIBUTES = ("refId", "requestId", "datasourceId")
+
+# The number of data points Grafana assumes for queries without `maxDataPoints`.
+DEFAULT_MAX_DATA_POINTS = 100
+
+
+def align(timestamp: int, step: int) -> int:
+    """
+    Align a timestamp down to the start of its step bucket.
+    """
+    return timestamp - timestamp % step
+
+
+def epoch_millis(value: t.Any) -> t.Optional[int]:
+    """
+    Return a timestamp in epoch milliseconds, or `None` for relative times like `now-24h`.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def time_field_index(frame: t.Dict[str, t.Any]) -> t.Optional[int]:
+    for index, field in enumerate((frame.get("schema") or {}).get("fields") or []):
+        if field.get("type") == "time":
+            return index
+    return None
+
+
+def frame_key(frame: t.Dict[str, t.Any]) -> str:
+    """
+    Identify the series of a data frame by its name, and the names, types, and labels of its fields.
+    """
+    schema = frame.get("schema") or {}
+    fields = [(field.get("name"), field.get("type"), field.get("labels")) for field in schema.get("fields") or []]
+    return json.dumps([schema.get("name"), fields], sort_keys=True)
+
+
+def frame_length(frame: t.Dict[str, t.Any]) -> int:
+    values = (frame.get("data") or {}).get("values") or []
+    return len(values[0]) if values else 0
+
+
+def slice_frame(
+    frame: t.Dict[str, t.Any], lower: t.Optional[int] = None, upper: t.Optional[int] = None
+) -> t.Dict[str, t.Any]:
+    """
+    Return a copy of a data frame, restricted to rows with timestamps `lower <= timestamp < upper`.
+
+    The rows are expected to be ordered by time, like Grafana returns them.
+    """
+    data = frame.get("data") or {}
+    values = data.get("values") or []
+    times = values[time_field_index(frame)] if values else []
+    start = 0 if lower is None else bisect.bisect_left(times, lower)
+    end = len(times) if upper is None else bisect.bisect_left(times, upper)
+    sliced = {"values": [field_values[start:end] for field_values in values]}
+    if data.get("nanos"):
+        sliced["nanos"] = [nanos[start:end] if nanos else nanos for nanos in data["nanos"]]
+    if data.get("entities"):
+        sliced["entities"] = [
+            {name: [index - start for index in indexes if start <= index < end] for name, indexes in entities.items()}
+            if entities
+            else entities
+            for entities in data["entities"]
+        ]
+    return {"schema": copy.deepcopy(frame.get("schema")), "data": sliced}
+
+
+def concat_frames(head: t.Dict[str, t.Any], tail: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+    """
+    Concatenate the rows of two data frames of the same series, using the schema of the second one.
+    """
+    head_data, tail_data = head["data"], tail["data"]
+    offset, length = frame_length(head), frame_length(tail)
+    values = [before + after for before, after in zip(head_data["values"], tail_data["values"])]
+    data: t.Dict[str, t.Any] = {"values": values}
+    if head_data.get("nanos") or tail_data.get("nanos"):
+        head_nanos = head_data.get("nanos") or [None] * len(values)
+        tail_nanos = tail_data.get("nanos") or [None] * len(values)
+        data["nanos"] = [
+            (before or [0] * offset) + (after or [0] * length) if before or after else None
+            for before, after in zip(head_nanos, tail_nanos)
+        ]
+    if head_data.get("entities") or tail_data.get("entities"):
+        head_entities = head_data.get("entities") or [None] * len(values)
+        tail_entities = tail_data.get("entities") or [None] * len(values)
+        data["entities"] = []
+        for before, after in zip(head_entities, tail_entities):
+            if not before and not after:
+                data["entities"].append(None)
+                continue
+            merged = {name: list(indexes) for name, indexes in (before or {}).items()}
+            for name, indexes in (after or {}).items():
+                merged.setdefault(name, []).extend(index + offset for index in indexes)
+            data["entities"].append(merged)
+    return {"schema": tail["schema"], "data": data}
+
+
+def mergeable(result: t.Any) -> bool:
+    """
+    Whether a query result consists of data frames with time fields only.
+    """
+    if not isinstance(result, dict) or result.get("error") or result.get("status", 200) != 200:
+        return False
+    frames = result.get("frames")
+    if not isinstance(frames, list):
+        return False
+    return all(time_field_index(frame) is not None for frame in frames)
+
+
+@dataclasses.dataclass
+class QueryCacheEntry:
+    """
+    The cached result of a query, covering the time range `start` to `end`, in epoch milliseconds.
+    Data before `stable_until` is considered complete.
+    """
+
+    result: t.Dict[str, t.Any]
+    start: int
+    end: int
+    stable_until: int
+    size: int
+
+
+@dataclasses.dataclass
+class QueryCacheLookup:
+    """
+    The outcome of looking up a query in the cache.
+
+    `payload` is the request body to submit to `/ds/query`, covering the time range
+    from `fetch_from` to `time_to`, or `None`, when the cache has the whole result.
+    """
+
+    key: t.Tuple[str, str, int]
+    ref_id: str
+    step: int
+    time_from: int
+    time_to: int
+    fetch_from: int
+    payload: t.Optional[t.Dict[str, t.Any]] = None
+    entry: t.Optional[QueryCacheEntry] = None
+
+    def response(self) -> t.Dict[str, t.Any]:
+        """
+        Return the response to the query, answered from the cache.
+        """
+        frames = [slice_frame(frame, self.time_from, self.time_to + 1) for frame in self.entry.result["frames"]]
+        result = {name: copy.deepcopy(value) for name, value in self.entry.result.items() if name != "frames"}
+        return {"results": {self.ref_id: dict(result, frames=frames)}}
+
+
+@dataclasses.dataclass
+class QueryCacheStatistics:
+    """
+    Counters about query result cache usage.
+
+    - `hits` counts queries answered from the cache, without a request.
+    - `partial_hits` counts queries answered by fetching only the tail of their time range.
+    - `misses` counts cacheable queries which needed their whole time range to be fetched.
+    - `evictions` counts entries removed to make room for new ones.
+    """
+
+    hits: int = 0
+    partial_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.partial_hits + self.misses
+        return (self.hits + self.partial_hits) / total if total else 0.0
+
+    def asdict(self):
+        return dataclasses.asdict(self)
+
+
+class QueryResultCache:
+    """
+    A thread-safe, incremental cache for time series query results, bounded by bytes.
+
+    `mutable` is the duration in seconds, counting back from the time of a request,
+    within which data is fetched again on the next request.
+    """
+
+    def __init__(
+        self,
+        mutable: float = 300.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: t.Callable[[], float] = time.time,
+    ):
+        if mutable < 0:
+            raise ValueError("Mutable window must not be negative")
+        self.mutable = mutable
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.entries: "collections.OrderedDict[t.Tuple[str, str, int], QueryCacheEntry]" = collections.OrderedDict()
+        self.size = 0
+        self.stats = QueryCacheStatistics()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(datasource: t.Dict[str, t.Any], query: t.Dict[str, t.Any], step: int) -> t.Tuple[str, str, int]:
+        model = {name: value for name, value in query.items() if name not in IGNORED_ATTRIBUTES}
+        return str(datasource.get("uid") or datasource.get("id")), json.dumps(model, sort_keys=True), step
+
+    def lookup(self, datasource: t.Dict[str, t.Any], payload: t.Dict[str, t.Any]) -> t.Optional[QueryCacheLookup]:
+        """
+        Look up the request body of a `/ds/query` request. Return `None` when the query is not cacheable.
+        """
+        queries = payload.get("queries") or []
+        if len(queries) != 1 or not isinstance(queries[0], dict):
+            return None
+        query = queries[0]
+        step = int(query.get("intervalMs") or 0)
+        if step <= 0 or query.get("instant"):
+            return None
+        time_from = epoch_millis(payload.get("from"))
+        time_to = epoch_millis(payload.get("to"))
+        if time_from is None or time_to is None:
+            return None
+        # Grafana only uses `intervalMs` as step while the time range spans less than `maxDataPoints` steps.
+        max_data_points = int(query.get("maxDataPoints") or DEFAULT_MAX_DATA_POINTS)
+        if time_to - time_from >= step * max_data_points:
+            return None
+        time_from = align(time_from, step)
+        time_to = align(time_to, step)
+        key = self.make_key(datasource, query, step)
+        lookup = QueryCacheLookup(
+            key=key,
+            ref_id=query.get("refId", "A"),
+            step=step,
+            time_from=time_from,
+            time_to=time_to,
+            fetch_from=time_from,
+        )
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.start <= time_from < entry.stable_until:
+                self.entries.move_to_end(key)
+                lookup.entry = entry
+                if time_to < entry.stable_until:
+                    self.stats.hits += 1
+                    return lookup
+                self.stats.partial_hits += 1
+                lookup.fetch_from = entry.stable_until
+            else:
+                self.stats.misses += 1
+        lookup.payload = dict(payload, **{"from": str(lookup.fetch_from), "to": str(time_to)})
+        return lookup
+
+    def update(self, lookup: QueryCacheLookup, response: t.Any) -> t.Any:
+        """
+        Merge the response to a looked up request with the cached result, store it, and return the whole response.
+
+        Responses which can not be merged are returned unmodified, and invalidate the entry.
+        """
+        results = response.get("results") if isinstance(response, dict) else None
+        result = results.get(lookup.ref_id) if isinstance(results, dict) else None
+        if not mergeable(result) or (lookup.entry is not None and not mergeable(lookup.entry.result)):
+            self.remove(lookup.key)
+            return response
+
+        cached = {}
+        if lookup.entry is not None:
+            for frame in lookup.entry.result["frames"]:
+                cached[frame_key(frame)] = slice_frame(frame, lookup.time_from, lookup.fetch_from)
+        frames = []
+        for frame in result["frames"]:
+            tail = slice_frame(frame, lookup.fetch_from, lookup.time_to + 1)
+            key = frame_key(frame)
+            frames.append(concat_frames(cached.pop(key), tail) if key in cached else tail)
+        # Keep series which ended before the fetched time range.
+        frames.extend(frame for frame in cached.values() if frame_length(frame))
+        merged = dict(result, frames=frames)
+
+        stable_until = min(align(int((self.clock() - self.mutable) * 1000), lookup.step), lookup.time_to + lookup.step)
+        self.store(lookup.key, merged, lookup.time_from, lookup.time_to, max(stable_until, lookup.time_from))
+        result = dict(merged, frames=[slice_frame(frame) for frame in frames])
+        return dict(response, results=dict(results, **{lookup.ref_id: result}))
+
+    def store(self, key, result: t.Dict[str, t.Any], start: int, end: int, stable_until: int):
+        size = len(json.dumps(result["frames"], separators=(",", ":")))
+        if size > self.max_bytes:
+            self.remove(key)
+            return
+        entry = QueryCacheEntry(result=result, start=start, end=end, stable_until=stable_until, size=size)
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = entry
+            self.size += size
+            while self.size > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
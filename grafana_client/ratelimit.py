@@ -0,0 +1,233 @@
+"""
+About
+=====
+Client-side rate limiting for the Grafana HTTP API.
+
+A `RateLimiter` is composed of one or many `RateLimit` rules. Each rule can be
+scoped to a set of HTTP verbs, and to a path prefix, like `/ds/query`, or
+`/search`. All rules matching a request are enforced.
+
+- `rate` and `burst` configure a token bucket, which permits `rate` requests
+  per second on average, and bursts of up to `burst` requests.
+- `max_in_flight` limits the number of concurrent requests.
+
+The token buckets are thread-safe and can be shared between synchronous and
+asynchronous clients. The concurrency limit is enforced separately for threads,
+and for each event loop.
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import threading
+import time
+import typing as t
+import weakref
+
+
+@dataclasses.dataclass
+class RateLimit:
+    """
+    A single rate limiting rule.
+
+    - `rate` is the number of requests per second, `None` means unlimited.
+    - `burst` is the capacity of the token bucket, defaulting to `max(1, rate)`.
+    - `max_in_flight` is the maximum number of concurrent requests, `None` means unlimited.
+    - `methods` restricts the rule to specific HTTP verbs, `None` means all verbs.
+    - `path_prefix` restricts the rule to API paths starting with the prefix, like `/ds/query`.
+    """
+
+    rate: t.Optional[float] = None
+    burst: t.Optional[int] = None
+    max_in_flight: t.Optional[int] = None
+    methods: t.Optional[t.Collection[str]] = None
+    path_prefix: str = ""
+
+    def __post_init__(self):
+        if self.rate is not None and self.rate <= 0:
+            raise ValueError("Rate must be a positive number")
+        if self.max_in_flight is not None and self.max_in_flight < 1:
+            raise ValueError("Maximum number of requests in flight must be at least 1")
+        if self.methods is not None:
+            self.methods = frozenset(method.lower() for method in self.methods)
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.methods is None or method in self.methods) and path.startswith(self.path_prefix)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket, which hands out reservations.
+
+    A reservation always succeeds, and returns the time in seconds the caller
+    needs to wait before submitting the request. This way, waiting callers are
+    served in order, without polling.
+    """
+
+    def __init__(self, rate: float, burst: t.Optional[int] = None, clock: t.Callable[[], float] = time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, self.rate))
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1.0
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class _Rule:
+    """
+    Runtime state of a `RateLimit` rule.
+    """
+
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self.bucket = TokenBucket(limit.rate, limit.burst) if limit.rate is not None else None
+        self.semaphore = threading.BoundedSemaphore(limit.max_in_flight) if limit.max_in_flight else None
+        self.async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self.async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self.async_semaphores[loop] = asyncio.Semaphore(self.limit.max_in_flight)
+        return semaphore
+
+
+@dataclasses.dataclass
+class RateLimiterStatistics:
+    """
+    Counters about throttled requests.
+
+    - `requests` is the total number of requests passing the rate limiter.
+    - `throttled` counts requests which had to wait for a token.
+    - `wait_time` is the accumulated waiting time in seconds.
+    """
+
+    requests: int = 0
+    throttled: int = 0
+    wait_time: float = 0.0
+
+    def asdict(self):
+        return dataclasses.asdict(self)
+
+
+class NullLimit:
+    """
+    A no-op synchronous and asynchronous context manager, used when rate limiting is turned off.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+NULL_LIMIT = NullLimit()
+
+
+class RateLimiter:
+    """
+    Enforce a set of `RateLimit` rules before submitting requests.
+
+    Example::
+
+        RateLimiter([
+            RateLimit(rate=50, burst=100, max_in_flight=20),
+            RateLimit(rate=5, max_in_flight=4, path_prefix="/ds/query"),
+            RateLimit(rate=10, methods=["post", "put", "patch", "delete"]),
+        ])
+    """
+
+    def __init__(self, limits: t.Iterable[RateLimit]):
+        self.rules = [_Rule(limit) for limit in limits]
+        self.stats = RateLimiterStatistics()
+        self.stats_lock = threading.Lock()
+
+    @classmethod
+    def from_value(
+        cls, value: t.Union["RateLimiter", RateLimit, t.Iterable[RateLimit], None]
+    ) -> t.Optional["RateLimiter"]:
+        """
+        Accept a `RateLimiter` instance, a single `RateLimit` rule, or a list of rules.
+        """
+        if value is None:
+            return None
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, RateLimit):
+            return cls([value])
+        return cls(value)
+
+    def match(self, method: str, path: str) -> t.List[_Rule]:
+        return [rule for rule in self.rules if rule.limit.matches(method, path)]
+
+    def reserve(self, rules: t.List[_Rule]) -> float:
+        """
+        Reserve a token from all matching buckets, and return the longest waiting time.
+        """
+        delay = 0.0
+        for rule in rules:
+            if rule.bucket is not None:
+                delay = max(delay, rule.bucket.reserve())
+        with self.stats_lock:
+            self.stats.requests += 1
+            if delay > 0:
+                self.stats.throttled += 1
+                self.stats.wait_time += delay
+        return delay
+
+    @contextlib.contextmanager
+    def limit(self, method: str, path: str):
+        """
+        Block the current thread until the request may be submitted.
+        """
+        rules = self.match(method, path)
+        semaphores = [rule.semaphore for rule in rules if rule.semaphore is not None]
+        for semaphore in semaphores:
+            semaphore.acquire()
+        try:
+            delay = self.reserve(rules)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+
+    @contextlib.asynccontextmanager
+    async def limit_async(self, method: str, path: str):
+        """
+        Suspend the current task until the request may be submitted.
+        """
+        rules = self.match(method, path)
+        semaphores = [rule.async_semaphore() for rule in rules if rule.limit.max_in_flight]
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+            delay = self.reserve(rules)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
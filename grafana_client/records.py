@@ -0,0 +1,233 @@
+"""
+About
+=====
+Compact, typed records for bulk search and listing results, as an opt-in
+alternative to plain dictionaries.
+
+Decoded into dictionaries, each item of a `/search`, `/users/search`,
+`/teams/search`, or `/datasources` response carries its own hash table of
+10 to 15 keys, and its own copies of values repeating across items, like
+folder titles, tag names, and types.
+
+- Records are dataclasses using `__slots__`, without a per-instance dictionary.
+- Strings are interned per decoding run, so each distinct folder title, tag
+  name, or type is held once. Lists of strings, like tags, become tuples, and
+  equal tuples are shared, too.
+- Attributes unknown to a record type are kept within its `extra` attribute.
+
+Request records using the `records` option of the listing methods::
+
+    hits = grafana.search.search_dashboards(records=True)
+    hits[0].folderTitle
+    hits[0].asdict()
+"""
+
+import dataclasses
+import typing as t
+
+R = t.TypeVar("R", bound="Record")
+
+
+class Interner:
+    """
+    Share equal strings, and equal tuples of strings, instead of holding a copy per item.
+    """
+
+    def __init__(self):
+        self.values: t.Dict[t.Any, t.Any] = {}
+
+    def __call__(self, value: t.Any) -> t.Any:
+        if isinstance(value, str):
+            return self.values.setdefault(value, value)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            value = tuple(self.values.setdefault(item, item) for item in value)
+            return self.values.setdefault(value, value)
+        return value
+
+
+class Record:
+    """
+    Base class of compact result records.
+
+    Subclasses are dataclasses, declaring their fields in `__slots__`, in the same
+    order, ending with `extra`. Values of the fields in `interned` are interned.
+    """
+
+    __slots__ = ()
+    interned: t.ClassVar[t.FrozenSet[str]] = frozenset()
+    known: t.ClassVar[t.FrozenSet[str]] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.known = frozenset(cls.__slots__)
+
+    @classmethod
+    def from_dict(cls: t.Type[R], item: t.Dict[str, t.Any], interner: t.Optional[Interner] = None) -> R:
+        if interner is None:
+            interner = Interner()
+        values = [interner(item.get(name)) if name in cls.interned else item.get(name) for name in cls.__slots__[:-1]]
+        extra = {name: value for name, value in item.items() if name not in cls.known} or None
+        return cls(*values, extra)
+
+    def asdict(self) -> t.Dict[str, t.Any]:
+        """
+        Return the record as a dictionary, like the original item, including its extra attributes.
+        """
+        data = {}
+        for name in self.__slots__[:-1]:
+            value = getattr(self, name)
+            data[name] = list(value) if isinstance(value, tuple) else value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+@dataclasses.dataclass
+class SearchHit(Record):
+    """
+    A dashboard, or folder, found by `/search`.
+    """
+
+    __slots__ = (
+        "id",
+        "uid",
+        "title",
+        "uri",
+        "url",
+        "slug",
+        "type",
+        "tags",
+        "isStarred",
+        "folderId",
+        "folderUid",
+        "folderTitle",
+        "folderUrl",
+        "extra",
+    )
+    interned: t.ClassVar[t.FrozenSet[str]] = frozenset(["type", "tags", "folderUid", "folderTitle", "folderUrl"])
+
+    id: t.Optional[int]
+    uid: t.Optional[str]
+    title: t.Optional[str]
+    uri: t.Optional[str]
+    url: t.Optional[str]
+    slug: t.Optional[str]
+    type: t.Optional[str]
+    tags: t.Optional[t.Tuple[str, ...]]
+    isStarred: t.Optional[bool]
+    folderId: t.Optional[int]
+    folderUid: t.Optional[str]
+    folderTitle: t.Optional[str]
+    folderUrl: t.Optional[str]
+    extra: t.Optional[t.Dict[str, t.Any]]
+
+
+@dataclasses.dataclass
+class UserRecord(Record):
+    """
+    A user, found by `/users/search`.
+    """
+
+    __slots__ = (
+        "id",
+        "uid",
+        "login",
+        "email",
+        "name",
+        "avatarUrl",
+        "isAdmin",
+        "isDisabled",
+        "lastSeenAt",
+        "lastSeenAtAge",
+        "authLabels",
+        "extra",
+    )
+    interned: t.ClassVar[t.FrozenSet[str]] = frozenset(["lastSeenAtAge", "authLabels"])
+
+    id: t.Optional[int]
+    uid: t.Optional[str]
+    login: t.Optional[str]
+    email: t.Optional[str]
+    name: t.Optional[str]
+    avatarUrl: t.Optional[str]
+    isAdmin: t.Optional[bool]
+    isDisabled: t.Optional[bool]
+    lastSeenAt: t.Optional[str]
+    lastSeenAtAge: t.Optional[str]
+    authLabels: t.Optional[t.Tuple[str, ...]]
+    extra: t.Optional[t.Dict[str, t.Any]]
+
+
+@dataclasses.dataclass
+class TeamRecord(Record):
+    """
+    A team, found by `/teams/search`.
+    """
+
+    __slots__ = ("id", "uid", "orgId", "name", "email", "avatarUrl", "memberCount", "permission", "extra")
+    interned: t.ClassVar[t.FrozenSet[str]] = frozenset(["email", "avatarUrl"])
+
+    id: t.Optional[int]
+    uid: t.Optional[str]
+    orgId: t.Optional[int]
+    name: t.Optional[str]
+    email: t.Optional[str]
+    avatarUrl: t.Optional[str]
+    memberCount: t.Optional[int]
+    permission: t.Optional[int]
+    extra: t.Optional[t.Dict[str, t.Any]]
+
+
+@dataclasses.dataclass
+class DatasourceRecord(Record):
+    """
+    A data source, listed by `/datasources`.
+    """
+
+    __slots__ = (
+        "id",
+        "uid",
+        "orgId",
+        "name",
+        "type",
+        "typeName",
+        "typeLogoUrl",
+        "access",
+        "url",
+        "user",
+        "database",
+        "basicAuth",
+        "isDefault",
+        "jsonData",
+        "readOnly",
+        "extra",
+    )
+    interned: t.ClassVar[t.FrozenSet[str]] = frozenset(["type", "typeName", "typeLogoUrl", "access", "url"])
+
+    id: t.Optional[int]
+    uid: t.Optional[str]
+    orgId: t.Optional[int]
+    name: t.Optional[str]
+    type: t.Optional[str]
+    typeName: t.Optional[str]
+    typeLogoUrl: t.Optional[str]
+    access: t.Optional[str]
+    url: t.Optional[str]
+    user: t.Optional[str]
+    database: t.Optional[str]
+    basicAuth: t.Optional[bool]
+    isDefault: t.Optional[bool]
+    jsonData: t.Optional[t.Dict[str, t.Any]]
+    readOnly: t.Optional[bool]
+    extra: t.Optional[t.Dict[str, t.Any]]
+
+
+def decode_records(
+    record_type: t.Type[R], items: t.Iterable[t.Dict[str, t.Any]], interner: t.Optional[Interner] = None
+) -> t.List[R]:
+    """
+    Decode items of a listing into records, sharing repeating values between them.
+    """
+    if interner is None:
+        interner = Interner()
+    return [record_type.from_dict(item, interner) for item in items]
@@ -0,0 +1,126 @@
+"""
+About
+=====
+Retry policy for transient errors of the Grafana HTTP API, like `429 Too Many
+Requests`, `502 Bad Gateway`, `503 Service Unavailable`, `504 Gateway Timeout`,
+or client-side timeouts.
+
+Delays between attempts grow exponentially, are capped, and use "full jitter"
+by default, so that many clients do not retry in lockstep.
+
+- https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+"""
+
+import dataclasses
+import random
+import typing as t
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+IDEMPOTENT_METHODS = frozenset(["get", "head", "options", "put", "delete"])
+
+
+@dataclasses.dataclass
+class RetryPolicy:
+    """
+    Describe when and how often to retry a request.
+
+    - `max_attempts` is the total number of attempts, including the first one.
+    - Delays are computed by `backoff_base * 2 ** retry`, capped to `backoff_cap`.
+    - With `jitter`, the actual delay is a random value between zero and the computed delay.
+    - With `respect_retry_after`, a `Retry-After` response header takes precedence,
+      still capped to `backoff_cap`.
+    - Only requests using one of `methods` will be retried. By default, those are the
+      idempotent HTTP verbs.
+    """
+
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_cap: float = 30.0
+    jitter: bool = True
+    respect_retry_after: bool = True
+    retry_on_timeout: bool = True
+    status_codes: t.FrozenSet[int] = DEFAULT_RETRY_STATUS_CODES
+    methods: t.FrozenSet[str] = IDEMPOTENT_METHODS
+
+    @classmethod
+    def from_value(cls, value: t.Union["RetryPolicy", int, bool, None]) -> t.Optional["RetryPolicy"]:
+        """
+        Accept a `RetryPolicy` instance, a number of maximum attempts, or a boolean.
+        """
+        if value is None or value is False:
+            return None
+        if value is True:
+            return cls()
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, int):
+            return cls(max_attempts=value)
+        raise TypeError(f"Unable to use value of type {type(value)} as retry policy")
+
+    def can_retry(self, method: str, attempt: int) -> bool:
+        """
+        Whether a request using `method` may be retried after its `attempt`-th attempt.
+        """
+        return attempt < self.max_attempts and method.lower() in self.methods
+
+    def compute_delay(self, retry: int, retry_after: t.Optional[float] = None) -> float:
+        """
+        Compute the delay in seconds before submitting the `retry`-th retry (zero-based).
+        """
+        if self.respect_retry_after and retry_after is not None:
+            return min(max(retry_after, 0.0), self.backoff_cap)
+        delay = min(self.backoff_cap, self.backoff_base * 2**retry)
+        if self.jitter:
+            delay = random.uniform(0, delay)  # noqa: S311
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value: t.Optional[str]) -> t.Optional[float]:
+        """
+        Decode the value of a `Retry-After` header, either in seconds, or as HTTP date.
+        """
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return (when - datetime.now(timezone.utc)).total_seconds()
+
+
+@dataclasses.dataclass
+class RetryStatistics:
+    """
+    Counters about retried requests.
+
+    - `retries` is the total number of retries.
+    - `recovered` counts requests which succeeded after at least one retry.
+    - `exhausted` counts requests which failed after using up all attempts.
+    - `reasons` counts retries by HTTP status code, or `timeout`.
+    """
+
+    retries: int = 0
+    recovered: int = 0
+    exhausted: int = 0
+    reasons: t.Dict[t.Union[int, str], int] = dataclasses.field(default_factory=dict)
+
+    def record_retry(self, reason: t.Union[int, str]):
+        self.retries += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def reset(self):
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+        self.reasons = {}
+
+    def asdict(self):
+        return dataclasses.asdict(self)
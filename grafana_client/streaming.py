@@ -0,0 +1,222 @@
+"""
+About
+=====
+Incremental decoding of JSON documents, for processing very large responses
+like `/search` results on big instances, without buffering the whole body.
+
+`JsonArrayParser` consumes a JSON document in chunks of bytes. When the
+top-level value is an array, it yields each array item as soon as it has
+been received completely, so peak memory is proportional to the size of
+one item instead of the whole payload. Any other top-level value is decoded
+as a whole, and yielded as a single item.
+"""
+
+import codecs
+import json
+import re
+import typing as t
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Content outside of strings not changing the nesting depth, including complete strings.
+_CONTENT = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+# Characters ending, or escaping, within strings.
+_STRING = re.compile(r'["\\]')
+# Numbers and literals end at a delimiter, at the end of the array, or at whitespace.
+_LITERAL = re.compile(r"[^,\] \t\n\r]*")
+
+# Parser states.
+_START, _FIRST_VALUE, _VALUE, _DELIMITER, _DONE, _CONTAINER, _SCALAR = range(7)
+
+
+class JsonArrayParser:
+    """
+    Parse a top-level JSON array incrementally, item by item.
+
+    Feed chunks of bytes using `feed`, which returns the list of items completed
+    by that chunk. Call `close` after the last chunk, to receive remaining items,
+    and to validate the document is complete.
+
+    Items within a chunk are decoded using `json.JSONDecoder.raw_decode`, directly
+    from the text. For an item continuing in the next chunk, the parser scans for
+    its end instead, tracking the nesting depth, and whether it is within a string,
+    across chunks. Its text is collected in parts, and decoded once it is complete,
+    so decoding is linear in the size of the document, also for large items.
+    """
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.parts: t.List[str] = []
+        self.state = _START
+        self.is_array: t.Optional[bool] = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: bytes) -> t.List[t.Any]:
+        text = self.text_decoder.decode(chunk)
+        if self.is_array is False:
+            self.parts.append(text)
+            return []
+        return self._scan(text)
+
+    def close(self) -> t.List[t.Any]:
+        text = self.text_decoder.decode(b"", final=True)
+        if self.is_array is False:
+            self.parts.append(text)
+            return [json.loads("".join(self.parts))]
+        items = self._scan(text)
+        if self.state == _SCALAR:
+            items.append(self._decode(""))
+            self.state = _DELIMITER
+        if self.is_array is None:
+            raise ValueError("Unable to decode empty JSON document")
+        if self.state != _DONE:
+            raise ValueError("Incomplete JSON array")
+        return items
+
+    def _decode(self, tail: str) -> t.Any:
+        """
+        Decode a complete item, from the collected parts, and the given tail.
+        """
+        if self.parts:
+            self.parts.append(tail)
+            tail = "".join(self.parts)
+            self.parts = []
+        return self.decoder.decode(tail)
+
+    def _scan(self, text: str) -> t.List[t.Any]:
+        items = []
+        length = len(text)
+        position = 0
+        # Start of the current item within the text.
+        start = 0
+        while position < length:
+            if self.state == _CONTAINER:
+                end = self._scan_container(text, position)
+                if end is None:
+                    break
+                items.append(self._decode(text[start:end]))
+                self.state = _DELIMITER
+                position = end
+                continue
+            if self.state == _SCALAR:
+                end = _LITERAL.match(text, position).end()
+                if end == length:
+                    # Numbers and literals at the end of the text may continue in the next chunk.
+                    break
+                items.append(self._decode(text[start:end]))
+                self.state = _DELIMITER
+                position = end
+                continue
+
+            position = _WHITESPACE.match(text, position).end()
+            if position == length:
+                break
+            char = text[position]
+            if self.state == _START:
+                self.is_array = char == "["
+                if not self.is_array:
+                    # Other documents are decoded as a whole.
+                    self.parts.append(text[position:])
+                    return items
+                self.state = _FIRST_VALUE
+                position += 1
+            elif self.state == _DELIMITER or (self.state == _FIRST_VALUE and char == "]"):
+                if char == ",":
+                    self.state = _VALUE
+                elif char == "]":
+                    self.state = _DONE
+                else:
+                    raise ValueError(f"Expecting ',' delimiter in JSON array: position {position}")
+                position += 1
+            elif self.state == _DONE:
+                raise ValueError(f"Unexpected data after end of JSON array: position {position}")
+            elif char in '[{"':
+                try:
+                    item, position = self.decoder.raw_decode(text, position)
+                except json.JSONDecodeError:
+                    # The item continues in the next chunk, so scan for its end.
+                    start = position
+                    self.state = _CONTAINER
+                    self.depth = 0 if char == '"' else 1
+                    self.in_string = char == '"'
+                    position += 1
+                else:
+                    items.append(item)
+                    self.state = _DELIMITER
+            else:
+                start = position
+                self.state = _SCALAR
+        if self.state in (_CONTAINER, _SCALAR):
+            self.parts.append(text[start:])
+        return items
+
+    def _scan_container(self, text: str, position: int) -> t.Optional[int]:
+        """
+        Scan for the end of the current object, array, or string item, starting at `position`.
+
+        Return the position after its end, or `None` when it continues in the next chunk.
+        """
+        length = len(text)
+        depth = self.depth
+        in_string = self.in_string
+        if self.escaped:
+            # Skip the character escaped at the end of the previous chunk.
+            self.escaped = False
+            position += 1
+        while True:
+            if in_string:
+                match = _STRING.search(text, position)
+                if match is None:
+                    break
+                position = match.end()
+                if text[position - 1] == "\\":
+                    if position == length:
+                        self.escaped = True
+                        break
+                    position += 1
+                    continue
+                in_string = False
+                if depth == 0:
+                    return position
+            else:
+                position = _CONTENT.match(text, position).end()
+                if position == length:
+                    break
+                char = text[position]
+                position += 1
+                if char == '"':
+                    # A string continuing in the next chunk.
+                    in_string = True
+                elif char in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return position
+        self.depth = depth
+        self.in_string = in_string
+        return None
+
+
+def iter_json_array(chunks: t.Iterable[bytes]) -> t.Iterator[t.Any]:
+    """
+    Decode a stream of byte chunks, yielding the items of a top-level JSON array.
+    """
+    parser = JsonArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_json_array(chunks: t.AsyncIterable[bytes]) -> t.AsyncIterator[t.Any]:
+    """
+    Decode an asynchronous stream of byte chunks, yielding the items of a top-level JSON array.
+    """
+    parser = JsonArrayParser()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
@@ -100,9 +100,31 @@ def process(source: Path, target: Path):
             module_dump = fp.read()
 
         # Adjust imports.
-        for relative_import in [".base", "..client", "..knowledge", "..model"]:
+        for relative_import in [
+            ".base",
+            "..breaker",
+            "..client",
+            "..concurrency",
+            "..index",
+            "..knowledge",
+            "..model",
+            "..pagination",
+            "..query",
+            "..records",
+        ]:
             module_dump = module_dump.replace(f"from {relative_import}", f"from .{relative_import}")
 
+        # Run concurrent tasks as coroutines.
+        module_dump = re.sub(r"\bmap_bounded\b", "amap_bounded", module_dump)
+        module_dump = re.sub(r"for (.+) in amap_bounded\(", r"async for \1 in amap_bounded(", module_dump)
+
+        # Fetch pages as coroutines.
+        module_dump = re.sub(r"\biter_pages\b", "aiter_pages", module_dump)
+        module_dump = re.sub(r"for (.+) in aiter_pages\(", r"async for \1 in aiter_pages(", module_dump)
+
+        # Consume generator methods, named `iter_*`, asynchronously.
+        module_dump = re.sub(r"for (.+) in self\.iter_", r"async for \1 in self.iter_", module_dump)
+
         # Modify function definitions.
         module_dump = re.sub(r"( {4}def )(?!_)", r"    async def ", module_dump)
 
@@ -114,6 +136,7 @@ def process(source: Path, target: Path):
 
         # Modify property accesses.
         module_dump = module_dump.replace("self.api.version", "await self.api.version")
+        module_dump = module_dump.replace("self.api.capabilities", "(await self.api.capabilities)")
 
         module_processed.append(module_path)
         target_path = Path(str(module_path).replace(str(source), str(target)))
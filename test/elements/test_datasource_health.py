@@ -1,10 +1,11 @@
 import sys
 import unittest
+from unittest.mock import AsyncMock
 
 import pytest
 from parameterized import parameterized
 
-from grafana_client import GrafanaApi
+from grafana_client import AsyncGrafanaApi, GrafanaApi
 from grafana_client.client import GrafanaClientError, GrafanaServerError
 from grafana_client.model import DatasourceHealthResponse, DatasourceIdentifier
 from test.elements.test_datasource_fixtures import (
@@ -32,6 +33,7 @@ from test.elements.test_datasource_fixtures import (
 )
 
 from ..compat import requests_mock
+from ..test_grafana_client import MockResponse
 
 if "pytest" in sys.argv[0]:
     pytest.skip("Skipping pytest, please use unittest", allow_module_level=True)
@@ -1390,3 +1392,92 @@ class DatasourceHealthInquiryTestCase(unittest.TestCase):
         self.assertRaises(
             GrafanaServerError, lambda: self.grafana.datasource.health_inquiry(datasource_uid="39mf288en")
         )
+
+
+class DatasourceHealthSweepTestCase(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(("admin", "admin"), host="localhost", url_path_prefix="", protocol="http")
+
+    @requests_mock.Mocker()
+    def test_health_sweep(self, m):
+        direct_datasource = dict(ZIPKIN_DATASOURCE, access="direct")
+        m.get(
+            "http://localhost/api/frontend/settings",
+            json={"buildInfo": {"commit": "14e988bd22", "version": "9.0.1"}},
+        )
+        m.get(
+            "http://localhost/api/datasources",
+            json=[PROMETHEUS_DATASOURCE, direct_datasource, TEMPO_DATASOURCE],
+        )
+        m.get(
+            "http://localhost/api/datasources/uid/h8KkCLt7z/health",
+            json={"status": "OK", "message": "Successfully queried the Prometheus API."},
+        )
+        m.get(
+            f"http://localhost/api/datasources/uid/{direct_datasource['uid']}/health",
+            json={"message": "Plugin health check not implemented"},
+            status_code=404,
+        )
+        m.get(
+            f"http://localhost/api/datasources/uid/{TEMPO_DATASOURCE['uid']}/health",
+            json={"status": "ERROR", "message": "Internal server error"},
+            status_code=500,
+        )
+
+        responses = {
+            response.uid: response for response in self.grafana.datasource.health_sweep(timeouts={"tempo": 1.5})
+        }
+
+        self.assertEqual(len(responses), 3)
+        self.assertEqual(responses["h8KkCLt7z"].status, "OK")
+        self.assertTrue(responses["h8KkCLt7z"].success)
+        self.assertEqual(responses[direct_datasource["uid"]].status, "UNKNOWN")
+        self.assertIn("NotImplementedError", responses[direct_datasource["uid"]].message)
+        self.assertEqual(responses[TEMPO_DATASOURCE["uid"]].status, "FATAL")
+
+        # Data sources are fetched once, and not again one by one.
+        paths = [request.path for request in m.request_history]
+        self.assertEqual(paths.count("/api/datasources"), 1)
+        self.assertFalse(any(path.startswith("/api/datasources/uid/") and path.count("/") == 4 for path in paths))
+
+        # Per-type timeouts are applied to the requests of the corresponding data sources.
+        # Note that `requests_mock` reports paths in lower case.
+        timeouts = {request.path: request.timeout for request in m.request_history}
+        self.assertEqual(timeouts["/api/datasources/uid/atk86s3nk/health"], 1.5)
+        self.assertEqual(timeouts["/api/datasources/uid/h8kkclt7z/health"], 5.0)
+
+    @requests_mock.Mocker()
+    def test_health_sweep_datasources(self, m):
+        m.get(
+            "http://localhost/api/frontend/settings",
+            json={"buildInfo": {"commit": "14e988bd22", "version": "9.0.1"}},
+        )
+        m.get(
+            "http://localhost/api/datasources/uid/h8KkCLt7z/health",
+            json={"status": "OK", "message": "Success"},
+        )
+        responses = list(self.grafana.datasource.health_sweep(datasources=[PROMETHEUS_DATASOURCE], concurrency=1))
+        self.assertEqual([response.uid for response in responses], ["h8KkCLt7z"])
+        self.assertNotIn("/api/datasources", [request.path for request in m.request_history])
+
+
+class AsyncDatasourceHealthSweepTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_health_sweep(self):
+        grafana = AsyncGrafanaApi(("admin", "admin"), host="localhost", url_path_prefix="", protocol="http")
+
+        async def request(method, url, **kwargs):  # noqa: ARG001
+            if url.endswith("/frontend/settings"):
+                return MockResponse(200, json_data={"buildInfo": {"version": "9.0.1"}})
+            if url.endswith("/datasources"):
+                return MockResponse(200, json_data=[PROMETHEUS_DATASOURCE, TEMPO_DATASOURCE])
+            if PROMETHEUS_DATASOURCE["uid"] in url:
+                return MockResponse(200, json_data={"status": "OK", "message": "Success"})
+            return MockResponse(500, json_data={"status": "ERROR", "message": "Internal server error"})
+
+        grafana.client.s.request = AsyncMock(side_effect=request)
+        responses = {response.uid: response async for response in grafana.datasource.health_sweep()}
+
+        self.assertEqual(responses[PROMETHEUS_DATASOURCE["uid"]].status, "OK")
+        self.assertEqual(responses[TEMPO_DATASOURCE["uid"]].status, "FATAL")
+        urls = [call.args[1] for call in grafana.client.s.request.call_args_list]
+        self.assertEqual(len(urls), 4)
@@ -0,0 +1,122 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+import niquests.exceptions
+
+from grafana_client import AsyncGrafanaApi, GrafanaApi
+from grafana_client.batch import BatchHandle
+from grafana_client.client import (
+    AsyncGrafanaClient,
+    GrafanaClientError,
+    GrafanaServerError,
+    GrafanaTimeoutError,
+    request_timeout,
+)
+from test.test_grafana_client import MockResponse
+
+
+def request(method, url, **kwargs):  # noqa: ARG001
+    uid = url.rsplit("/", 1)[-1]
+    if uid == "unknown":
+        return MockResponse(status_code=404, json_data={"message": "Dashboard not found"})
+    if uid == "broken":
+        return MockResponse(status_code=500, json_data={"message": "Internal Server Error"})
+    if uid == "unreachable":
+        raise niquests.exceptions.ConnectionError("Connection refused")
+    if uid == "slow":
+        raise niquests.exceptions.ReadTimeout("timed out")
+    return MockResponse(status_code=200, json_data={"dashboard": {"uid": uid}})
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(("admin", "admin"), host="localhost", organization_id=2)
+        self.session = Mock(name="session")
+        self.session.request.side_effect = request
+        self.grafana.client._batches.session = self.session
+        self.grafana.client.s.request = Mock(name="request", side_effect=request)
+
+    def test_batch(self):
+        with self.grafana.batch() as batch:
+            handles = [self.grafana.dashboard.get_dashboard(uid) for uid in ["foo", "bar"]]
+            self.assertIsInstance(handles[0], BatchHandle)
+            self.session.gather.assert_not_called()
+        self.session.gather.assert_called_once()
+        self.assertTrue(all(handle.done for handle in handles))
+        self.assertEqual([handle.result() for handle in handles], batch.results())
+        self.assertEqual(batch.results(), [{"dashboard": {"uid": "foo"}}, {"dashboard": {"uid": "bar"}}])
+        self.grafana.client.s.request.assert_not_called()
+
+        # Outside the batch, requests are submitted and resolved right away.
+        self.assertEqual(self.grafana.dashboard.get_dashboard("baz"), {"dashboard": {"uid": "baz"}})
+        self.grafana.client.s.request.assert_called_once()
+
+    def test_errors_per_handle(self):
+        with self.grafana.batch() as batch:
+            for uid in ["foo", "unknown", "broken", "unreachable", "slow"]:
+                self.grafana.dashboard.get_dashboard(uid)
+        handles = batch.handles
+        self.assertEqual([handle.ok for handle in handles], [True, False, False, False, False])
+        self.assertIsInstance(handles[1].error, GrafanaClientError)
+        self.assertIsInstance(handles[2].error, GrafanaServerError)
+        # Like outside of batches, connection errors are not mapped.
+        self.assertIsInstance(handles[3].error, niquests.exceptions.ConnectionError)
+        self.assertIsInstance(handles[4].error, GrafanaTimeoutError)
+        self.assertRaises(GrafanaClientError, handles[1].result)
+        self.assertIsInstance(batch.results()[1], GrafanaClientError)
+        self.assertRaises(GrafanaClientError, lambda: batch.results(return_exceptions=False))
+
+    def test_other_threads_not_batched(self):
+        results = []
+        with self.grafana.batch() as batch:
+            self.grafana.dashboard.get_dashboard("foo")
+            thread = threading.Thread(target=lambda: results.append(self.grafana.dashboard.get_dashboard("bar")))
+            thread.start()
+            thread.join()
+        self.assertEqual(len(batch.handles), 1)
+        self.assertEqual(results, [{"dashboard": {"uid": "bar"}}])
+
+    def test_nested(self):
+        with self.grafana.batch() as outer:
+            self.grafana.dashboard.get_dashboard("foo")
+            with self.grafana.batch() as inner:
+                self.grafana.dashboard.get_dashboard("bar")
+            self.grafana.dashboard.get_dashboard("baz")
+        self.assertEqual(len(outer.handles), 2)
+        self.assertEqual(len(inner.handles), 1)
+        self.assertIsNone(self.grafana.client._active_batch())
+
+    def test_multiplexed_session(self):
+        client = GrafanaApi(("admin", "admin"), host="localhost", organization_id=2, timeout=3).client
+        session = client._multiplexed_session()
+        self.assertIsNot(session, client.s)
+        self.assertIs(client._multiplexed_session(), session)
+        self.assertTrue(session.multiplexed)
+        self.assertEqual(session.headers["X-Grafana-Org-Id"], "2")
+        self.assertIs(session.auth, client.s.auth)
+        self.assertEqual(session.timeout, 3)
+
+        # Each thread uses its own session.
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(client._multiplexed_session()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], session)
+        self.assertTrue(sessions[0].multiplexed)
+
+        client = GrafanaApi(host="localhost", connection={"multiplexed": True}).client
+        self.assertIsNot(client._multiplexed_session(), client.s)
+
+    def test_request_timeout(self):
+        with self.grafana.batch():
+            self.grafana.dashboard.get_dashboard("foo")
+            with request_timeout(1.5):
+                self.grafana.dashboard.get_dashboard("bar")
+        timeouts = [call.kwargs["timeout"] for call in self.session.request.call_args_list]
+        self.assertEqual(timeouts, [None, 1.5])
+
+    def test_async_unsupported(self):
+        # Batches are only available on the synchronous API.
+        self.assertFalse(hasattr(AsyncGrafanaApi(host="localhost"), "batch"))
+        self.assertFalse(hasattr(AsyncGrafanaClient, "batch"))
@@ -0,0 +1,216 @@
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, CircuitBreaker, GrafanaApi
+from grafana_client.breaker import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, HealthHistory, probe
+from grafana_client.client import GrafanaClientError, GrafanaServerError
+from grafana_client.model import DatasourceHealthResponse
+from test.elements.test_datasource_fixtures import DATAFRAME_RESPONSE_HEALTH_PROMETHEUS, PROMETHEUS_DATASOURCE
+from test.test_grafana_client import MockResponse
+from test.test_ratelimit import FakeClock
+
+SETTINGS = {"buildInfo": {"version": "11.0.0"}}
+
+
+def health(success: bool, status: str = None) -> DatasourceHealthResponse:
+    status = status or ("OK" if success else "ERROR")
+    return DatasourceHealthResponse(
+        uid="h8KkCLt7z", type="prometheus", success=success, status=status, message="msg", duration=0.1
+    )
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(window=60, min_calls=4, failure_ratio=0.5, reset_timeout=30, clock=self.clock)
+
+    def test_open(self):
+        for ok in [True, True, False]:
+            self.breaker.before("a")
+            (self.breaker.record_success if ok else self.breaker.record_failure)("a")
+        self.assertEqual(self.breaker.state("a"), CLOSED)
+        self.breaker.record_failure("a")
+        self.assertEqual(self.breaker.state("a"), OPEN)
+        with self.assertRaises(CircuitOpenError) as ctx:
+            self.breaker.before("a")
+        self.assertEqual(ctx.exception.retry_after, 30)
+        self.assertEqual(ctx.exception.status_code, 503)
+        # Other data sources are not affected.
+        self.breaker.before("b")
+        self.assertEqual(self.breaker.states(), {"a": OPEN, "b": CLOSED})
+
+    def test_rolling_window(self):
+        for _ in range(3):
+            self.breaker.record_failure("a")
+        self.clock.now += 61
+        self.breaker.record_failure("a")
+        self.assertEqual(self.breaker.state("a"), CLOSED)
+
+    def test_half_open(self):
+        for _ in range(4):
+            self.breaker.record_failure("a")
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state("a"), HALF_OPEN)
+        # A single trial passes.
+        self.breaker.before("a")
+        self.assertRaises(CircuitOpenError, lambda: self.breaker.before("a"))
+        # A failed trial opens the circuit again.
+        self.breaker.record_failure("a")
+        self.assertEqual(self.breaker.state("a"), OPEN)
+        self.clock.now += 30
+        self.breaker.before("a")
+        self.breaker.record_success("a")
+        self.assertEqual(self.breaker.state("a"), CLOSED)
+
+    def test_guard(self):
+        for _ in range(4):
+            with self.assertRaises(GrafanaServerError), self.breaker.guard("a"):
+                raise GrafanaServerError(500, None, "Server Error")
+        self.assertEqual(self.breaker.state("a"), OPEN)
+        with self.assertRaises(CircuitOpenError), self.breaker.guard("a"):
+            pass
+        # Probes pass open circuits, without recording outcomes.
+        with probe(), self.breaker.guard("a"):
+            pass
+        self.assertEqual(self.breaker.state("a"), OPEN)
+
+    def test_guard_client_error(self):
+        for _ in range(4):
+            with self.assertRaises(GrafanaClientError), self.breaker.guard("a"):
+                raise GrafanaClientError(400, None, "Bad Request")
+        self.assertEqual(self.breaker.state("a"), CLOSED)
+
+    def test_record_health(self):
+        for _ in range(4):
+            self.breaker.record_health(health(False))
+        self.assertEqual(self.breaker.state("h8KkCLt7z"), OPEN)
+        self.breaker.record_health(health(True))
+        self.assertEqual(self.breaker.state("h8KkCLt7z"), CLOSED)
+        for _ in range(4):
+            self.breaker.record_health(health(False, status="UNKNOWN"))
+        self.assertEqual(self.breaker.state("h8KkCLt7z"), CLOSED)
+        self.assertEqual(len(self.breaker.history.get("h8KkCLt7z")), 9)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: CircuitBreaker(window=0))
+        self.assertRaises(ValueError, lambda: CircuitBreaker(failure_ratio=0))
+        self.assertRaises(ValueError, lambda: CircuitBreaker(min_calls=0))
+
+
+class TestHealthHistory(unittest.TestCase):
+    def test_ring_buffer(self):
+        clock = FakeClock()
+        history = HealthHistory(size=3, clock=clock)
+        for success in [True, False, True, True]:
+            clock.now += 1
+            history.record(health(success))
+        records = history.get("h8KkCLt7z")
+        self.assertEqual([record.timestamp for record in records], [2, 3, 4])
+        self.assertEqual(history.latest("h8KkCLt7z").success, True)
+        self.assertAlmostEqual(history.success_ratio("h8KkCLt7z"), 2 / 3)
+        self.assertIsNone(history.success_ratio("unknown"))
+        self.assertIsNone(history.latest("unknown"))
+        self.assertEqual(
+            history.export()["h8KkCLt7z"][0],
+            {"timestamp": 2, "status": "ERROR", "success": False, "duration": 0.1, "message": "msg"},
+        )
+        history.clear()
+        self.assertEqual(history.export(), {})
+
+
+class DatasourceDown:
+    def __init__(self):
+        self.down = True
+        self.queries = 0
+        self.lookups = 0
+
+    def __call__(self, method, url, **kwargs):  # noqa: ARG002
+        if url.endswith("/frontend/settings"):
+            return MockResponse(200, json_data=SETTINGS)
+        if url.endswith("/datasources/42"):
+            self.lookups += 1
+            return MockResponse(200, json_data=PROMETHEUS_DATASOURCE)
+        self.queries += 1
+        if self.down:
+            return MockResponse(502, json_data={"message": "Bad Gateway"})
+        if url.endswith("/ds/query"):
+            return MockResponse(200, json_data=DATAFRAME_RESPONSE_HEALTH_PROMETHEUS)
+        return MockResponse(200, json_data={"status": "success", "data": {"resultType": "matrix", "result": []}})
+
+
+class TestDatasourceCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.server = DatasourceDown()
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(side_effect=self.server)
+        self.grafana.datasource.breaker = CircuitBreaker(min_calls=2, clock=self.clock)
+
+    def test_fail_fast(self):
+        for _ in range(2):
+            self.assertRaises(
+                GrafanaServerError, lambda: self.grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "1+1")
+            )
+        self.assertRaises(CircuitOpenError, lambda: self.grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "1+1"))
+        self.assertRaises(
+            CircuitOpenError, lambda: self.grafana.datasource.query(datasource_uid="h8KkCLt7z", query="up")
+        )
+        self.assertRaises(
+            CircuitOpenError,
+            lambda: self.grafana.datasource.query_range(
+                datasource_uid="h8KkCLt7z", query="up", start=0, end=60, step=15
+            ),
+        )
+        self.assertEqual(self.server.queries, 2)
+
+        # Health checks pass the open circuit, and close it when successful.
+        self.server.down = False
+        response = self.grafana.datasource.health_check(PROMETHEUS_DATASOURCE)
+        self.assertTrue(response.success)
+        self.assertEqual(self.grafana.datasource.breaker.state("h8KkCLt7z"), CLOSED)
+        self.assertEqual(len(self.grafana.datasource.breaker.history.get("h8KkCLt7z")), 1)
+        self.grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "1+1")
+
+    def test_query_by_id(self):
+        for _ in range(2):
+            self.assertRaises(GrafanaServerError, lambda: self.grafana.datasource.query(datasource_id=42, query="up"))
+        self.assertEqual(self.grafana.datasource.breaker.states(), {"h8KkCLt7z": OPEN})
+        self.assertEqual(self.server.lookups, 1)
+
+    def test_query_by_id_and_uid(self):
+        # Failures by id and by uid count for the same circuit.
+        self.assertRaises(GrafanaServerError, lambda: self.grafana.datasource.query(datasource_id=42, query="up"))
+        self.assertRaises(
+            GrafanaServerError, lambda: self.grafana.datasource.query(datasource_uid="h8KkCLt7z", query="up")
+        )
+        self.assertEqual(self.grafana.datasource.breaker.states(), {"h8KkCLt7z": OPEN})
+        self.assertRaises(
+            CircuitOpenError,
+            lambda: self.grafana.datasource.query_range(datasource_id=42, query="up", start=0, end=60, step=15),
+        )
+        self.assertRaises(CircuitOpenError, lambda: self.grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "1+1"))
+        self.assertEqual(self.server.queries, 2)
+
+        # A health check by uid closes the circuit for queries by id.
+        self.server.down = False
+        self.assertTrue(self.grafana.datasource.health_check(PROMETHEUS_DATASOURCE).success)
+        self.grafana.datasource.query(datasource_id=42, query="up")
+        self.assertEqual(self.grafana.datasource.breaker.state("h8KkCLt7z"), CLOSED)
+
+
+class TestAsyncDatasourceCircuitBreaker(unittest.IsolatedAsyncioTestCase):
+    async def test_fail_fast(self):
+        server = DatasourceDown()
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        grafana.datasource.breaker = CircuitBreaker(min_calls=2, clock=FakeClock())
+        for _ in range(2):
+            with self.assertRaises(GrafanaServerError):
+                await grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "1+1")
+        with self.assertRaises(CircuitOpenError):
+            await grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "1+1")
+        server.down = False
+        response = await grafana.datasource.health_check(PROMETHEUS_DATASOURCE)
+        self.assertTrue(response.success)
+        self.assertEqual(grafana.datasource.breaker.state("h8KkCLt7z"), CLOSED)
+        self.assertEqual(server.queries, 3)
@@ -0,0 +1,280 @@
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, CacheRule, GrafanaApi, ResponseCache
+from grafana_client.client import GrafanaClientError
+from test.test_grafana_client import MockResponse
+from test.test_ratelimit import FakeClock
+
+JSON = {"Content-Type": "application/json"}
+
+
+class TestCacheRule(unittest.TestCase):
+    def test_invalidated_by(self):
+        rule = CacheRule("/dashboards/uid/")
+        self.assertEqual(rule.invalidated_by, ("/dashboards",))
+        self.assertTrue(rule.invalidated_by_write("/dashboards/db"))
+        self.assertFalse(rule.invalidated_by_write("/folders"))
+        rule = CacheRule("/search", invalidated_by=["/dashboards", "/folders"])
+        self.assertTrue(rule.invalidated_by_write("/folders/foo"))
+        self.assertFalse(rule.invalidated_by_write("/search"))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: CacheRule("/foo", ttl=-1))
+
+    def test_subpaths(self):
+        rule = CacheRule("/datasources/uid/", subpaths=False)
+        self.assertTrue(rule.matches("/datasources/uid/foo"))
+        self.assertTrue(rule.matches("/datasources/uid/foo?bar=baz/qux"))
+        self.assertFalse(rule.matches("/datasources/uid/foo/health"))
+        rule = CacheRule("/datasources", subpaths=False)
+        self.assertTrue(rule.matches("/datasources"))
+        self.assertTrue(rule.matches("/datasources/42"))
+        self.assertFalse(rule.matches("/datasources/proxy/42/api/v1/labels"))
+        self.assertTrue(CacheRule("/dashboards/uid/").matches("/dashboards/uid/foo/versions"))
+
+    def test_default_rules(self):
+        cache = ResponseCache()
+        for path in ["/datasources", "/datasources/uid/foo", "/datasources/name/foo", "/plugins", "/folders/foo"]:
+            self.assertIsNotNone(cache.lookup(path), path)
+        for path in [
+            "/frontend/settings",
+            "/datasources/uid/foo/health",
+            "/datasources/42/health",
+            "/datasources/proxy/42/api/v1/label/job/values",
+            "/datasources/proxy/uid/foo/api/v1/series",
+            "/plugins/foo/health",
+            "/plugins/foo/metrics",
+        ]:
+            self.assertIsNone(cache.lookup(path), path)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_from_value(self):
+        self.assertIsNone(ResponseCache.from_value(None))
+        self.assertIsNone(ResponseCache.from_value(False))
+        self.assertEqual(len(ResponseCache.from_value(True).rules), 7)
+        self.assertEqual(len(ResponseCache.from_value(CacheRule("/foo")).rules), 1)
+        cache = ResponseCache()
+        self.assertIs(ResponseCache.from_value(cache), cache)
+
+    def test_make_key(self):
+        self.assertEqual(ResponseCache.make_key("/search"), "/search")
+        self.assertEqual(ResponseCache.make_key("/search", {"tag": ["a", "b"]}), "/search?tag=a&tag=b")
+        self.assertEqual(ResponseCache.make_key("/search?query=x", {"limit": 5}), "/search?query=x&limit=5")
+
+    def test_not_cacheable(self):
+        cache = ResponseCache([CacheRule("/foo")])
+        self.assertIsNone(cache.lookup("/bar"))
+        self.assertIsNone(cache.lookup("/foo", headers={"X-Foo": "bar"}))
+
+    def test_ttl(self):
+        cache = ResponseCache([CacheRule("/foo", ttl=10)], clock=self.clock)
+        lookup = cache.lookup("/foo")
+        self.assertIsNone(lookup.entry)
+        cache.update(lookup, MockResponse(200, headers=JSON, json_data={"foo": "bar"}))
+        self.assertTrue(cache.lookup("/foo").fresh)
+        self.clock.now += 11
+        lookup = cache.lookup("/foo")
+        self.assertIsNone(lookup.entry)
+        self.assertEqual(
+            cache.stats.asdict(), {"hits": 1, "misses": 2, "revalidated": 0, "evictions": 0, "invalidations": 0}
+        )
+        self.assertAlmostEqual(cache.stats.hit_ratio, 1 / 3)
+
+    def test_revalidate(self):
+        cache = ResponseCache([CacheRule("/foo", ttl=10)], clock=self.clock)
+        cache.update(cache.lookup("/foo"), MockResponse(200, headers={**JSON, "ETag": '"v1"'}, json_data={}))
+        self.clock.now += 11
+        lookup = cache.lookup("/foo")
+        self.assertFalse(lookup.fresh)
+        self.assertEqual(lookup.request_headers(), {"If-None-Match": '"v1"'})
+        self.assertIs(cache.update(lookup, MockResponse(304, headers={})), lookup.entry)
+        self.assertTrue(cache.lookup("/foo").fresh)
+        self.assertEqual(cache.stats.revalidated, 1)
+
+        # A changed resource replaces the entry.
+        self.clock.now += 11
+        lookup = cache.lookup("/foo")
+        self.assertIsNone(cache.update(lookup, MockResponse(200, headers={**JSON, "ETag": '"v2"'}, json_data={})))
+        self.assertEqual(cache.entries["/foo"].etag, '"v2"')
+
+    def test_only_json_success(self):
+        cache = ResponseCache([CacheRule("/foo")], clock=self.clock)
+        cache.update(cache.lookup("/foo"), MockResponse(404, headers=JSON, json_data={"message": "Not found"}))
+        cache.update(cache.lookup("/foo"), MockResponse(200, headers={"Content-Type": "text/plain"}))
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_empty_not_cached(self):
+        cache = ResponseCache([CacheRule("/foo")], clock=self.clock)
+        cache.update(cache.lookup("/foo"), Mock(status_code=200, headers=JSON, content=b""))
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_lru_entries(self):
+        cache = ResponseCache([CacheRule("/")], max_entries=2, clock=self.clock)
+        for path in ["/a", "/b"]:
+            cache.store(path, cache.rules[0], b"{}")
+        cache.lookup("/a")
+        cache.store("/c", cache.rules[0], b"{}")
+        self.assertEqual(list(cache.entries), ["/a", "/c"])
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_lru_bytes(self):
+        cache = ResponseCache([CacheRule("/")], max_bytes=10, clock=self.clock)
+        cache.store("/a", cache.rules[0], b"[1,2,3]")
+        cache.store("/b", cache.rules[0], b"[1,2]")
+        self.assertEqual(list(cache.entries), ["/b"])
+        self.assertEqual(cache.size, 5)
+        cache.store("/c", cache.rules[0], b"[" + b"1," * 10 + b"1]")
+        self.assertNotIn("/c", cache.entries)
+
+    def test_invalidate(self):
+        cache = ResponseCache(clock=self.clock)
+        for path in ["/dashboards/uid/foo", "/folders", "/datasources"]:
+            cache.store(path, next(rule for rule in cache.rules if rule.matches(path)), b"{}")
+        self.assertEqual(cache.invalidate("/folders/bar"), 2)
+        self.assertEqual(list(cache.entries), ["/datasources"])
+        self.assertEqual(cache.stats.invalidations, 2)
+
+    def test_invalidated_in_flight(self):
+        cache = ResponseCache(clock=self.clock)
+        lookup = cache.lookup("/folders")
+        cache.invalidate("/folders/foo")
+        cache.update(lookup, MockResponse(200, headers=JSON, json_data=[]))
+        self.assertEqual(len(cache.entries), 0)
+        # Writes to unrelated paths don't discard responses.
+        lookup = cache.lookup("/folders")
+        cache.invalidate("/annotations")
+        cache.update(lookup, MockResponse(200, headers=JSON, json_data=[]))
+        self.assertEqual(list(cache.entries), ["/folders"])
+
+    def test_read_only_write(self):
+        cache = ResponseCache(clock=self.clock)
+        cache.store("/datasources", cache.rules[1], b"[]")
+        self.assertEqual(cache.invalidate("/datasources/proxy/42/api/v1/series"), 0)
+        self.assertEqual(cache.invalidate("/datasources/uid/foo/resources/labels"), 0)
+        self.assertEqual(cache.invalidate("/ds/query"), 0)
+        self.assertEqual(list(cache.entries), ["/datasources"])
+        self.assertEqual(cache.invalidate("/datasources/uid/foo"), 1)
+
+
+class TestClientCache(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost", cache=True)
+        self.request = self.grafana.client.s.request = Mock(name="request")
+
+    def test_hit(self):
+        self.request.return_value = MockResponse(200, headers=JSON, json_data={"dashboard": {"version": 1}})
+        self.assertEqual(self.grafana.dashboard.get_dashboard("foo"), {"dashboard": {"version": 1}})
+        result = self.grafana.dashboard.get_dashboard("foo")
+        self.assertEqual(result, {"dashboard": {"version": 1}})
+        self.assertEqual(self.request.call_count, 1)
+        # Callers receive independent copies.
+        result["dashboard"]["version"] = 2
+        self.assertEqual(self.grafana.dashboard.get_dashboard("foo"), {"dashboard": {"version": 1}})
+        self.assertEqual(self.grafana.client.cache.stats.hits, 2)
+
+    def test_frontend_settings_not_cached(self):
+        self.request.side_effect = [
+            MockResponse(200, headers=JSON, json_data={"buildInfo": {"version": "11.6.2"}}),
+            MockResponse(200, headers=JSON, json_data={"buildInfo": {"version": "12.0.0"}}),
+        ]
+        self.grafana.health.frontend_settings()
+        # An upgraded instance is recognized right away.
+        self.assertEqual(self.grafana.health.frontend_settings(), {"buildInfo": {"version": "12.0.0"}})
+        self.assertEqual(self.request.call_count, 2)
+
+    def test_empty_accepted(self):
+        self.request.return_value = Mock(status_code=200, headers=JSON, content=b"", text="")
+        for _ in range(2):
+            self.assertEqual(self.grafana.client.GET("/folders/foo", accept_empty_json=True), "")
+        self.assertEqual(self.request.call_count, 2)
+
+    def test_revalidate(self):
+        clock = self.grafana.client.cache.clock = FakeClock()
+        self.request.side_effect = [
+            MockResponse(200, headers={**JSON, "ETag": '"v1"'}, json_data={"uid": "foo"}),
+            MockResponse(304, headers={}),
+        ]
+        self.grafana.dashboard.get_dashboard("foo")
+        clock.now += 3600
+        self.assertEqual(self.grafana.dashboard.get_dashboard("foo"), {"uid": "foo"})
+        self.assertEqual(self.request.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+        self.assertEqual(self.grafana.client.cache.stats.revalidated, 1)
+
+    def test_write_invalidates(self):
+        self.request.return_value = MockResponse(200, headers=JSON, json_data={"uid": "foo"})
+        self.grafana.dashboard.get_dashboard("foo")
+        self.grafana.dashboard.update_dashboard({"dashboard": {"uid": "foo"}})
+        self.grafana.dashboard.get_dashboard("foo")
+        self.assertEqual(self.request.call_count, 3)
+
+    def test_concurrent_read_during_write(self):
+        stale = MockResponse(200, headers=JSON, json_data={"uid": "foo", "version": 1})
+        fresh = MockResponse(200, headers=JSON, json_data={"uid": "foo", "version": 2})
+
+        def request(method, url, **kwargs):  # noqa: ARG001
+            if method == "post":
+                # Another thread reads the dashboard while the write is in flight, before it is applied.
+                self.request.side_effect = [stale, fresh]
+                self.assertEqual(self.grafana.dashboard.get_dashboard("foo")["version"], 1)
+                return MockResponse(200, headers=JSON, json_data={"status": "success"})
+            raise AssertionError(f"Unexpected request: {method} {url}")
+
+        self.request.side_effect = request
+        self.grafana.dashboard.update_dashboard({"dashboard": {"uid": "foo"}})
+        self.assertEqual(self.grafana.dashboard.get_dashboard("foo")["version"], 2)
+        self.assertEqual(self.grafana.dashboard.get_dashboard("foo")["version"], 2)
+        self.assertEqual(self.request.call_count, 3)
+
+    def test_error_not_cached(self):
+        self.request.return_value = MockResponse(404, headers=JSON, json_data={"message": "Not found"})
+        self.assertRaises(GrafanaClientError, lambda: self.grafana.dashboard.get_dashboard("foo"))
+        self.assertRaises(GrafanaClientError, lambda: self.grafana.dashboard.get_dashboard("foo"))
+        self.assertEqual(self.request.call_count, 2)
+
+    def test_health_not_cached(self):
+        self.request.return_value = MockResponse(200, headers=JSON, json_data={"status": "OK"})
+        for _ in range(3):
+            self.grafana.datasource.health("foo")
+        self.assertEqual(self.request.call_count, 3)
+        self.assertEqual(self.grafana.client.cache.stats.hits, 0)
+
+    def test_uncached_path(self):
+        self.request.return_value = MockResponse(200, headers=JSON, json_data=[])
+        self.grafana.search.search_dashboards()
+        self.grafana.search.search_dashboards()
+        self.assertEqual(self.request.call_count, 2)
+
+    def test_disabled(self):
+        self.assertIsNone(GrafanaApi(host="localhost").client.cache)
+
+
+class TestAsyncClientCache(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_read_during_write(self):
+        grafana = AsyncGrafanaApi(host="localhost", cache=True)
+        stale = MockResponse(200, headers=JSON, json_data=[{"id": 1}])
+        fresh = MockResponse(200, headers=JSON, json_data=[{"id": 1}, {"id": 2}])
+
+        async def request(method, url, **kwargs):  # noqa: ARG001
+            if method == "post":
+                grafana.client.s.request.side_effect = [stale, fresh]
+                self.assertEqual(len(await grafana.datasource.list_datasources()), 1)
+                return MockResponse(200, headers=JSON, json_data={"id": 2})
+            raise AssertionError(f"Unexpected request: {method} {url}")
+
+        grafana.client.s.request = AsyncMock(side_effect=request)
+        await grafana.datasource.create_datasource({"name": "foo"})
+        self.assertEqual(len(await grafana.datasource.list_datasources()), 2)
+        self.assertEqual(len(await grafana.datasource.list_datasources()), 2)
+        self.assertEqual(grafana.client.s.request.await_count, 3)
+
+    async def test_hit(self):
+        grafana = AsyncGrafanaApi(host="localhost", cache=[CacheRule("/datasources")])
+        grafana.client.s.request = AsyncMock(return_value=MockResponse(200, headers=JSON, json_data=[{"id": 1}]))
+        self.assertEqual(await grafana.datasource.list_datasources(), [{"id": 1}])
+        self.assertEqual(await grafana.datasource.list_datasources(), [{"id": 1}])
+        self.assertEqual(grafana.client.s.request.await_count, 1)
@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from verlib2 import Version
+
+from grafana_client import AsyncGrafanaApi, Capabilities, GrafanaApi
+from grafana_client.capabilities import CapabilityRegistry
+from test.test_grafana_client import MockResponse
+from test.test_ratelimit import FakeClock
+
+SETTINGS = {
+    "buildInfo": {"version": "10.1.5-pre", "edition": "Enterprise", "commit": "abc"},
+    "featureToggles": {"publicDashboards": True, "nestedFolders": False},
+}
+
+
+class TestCapabilities(unittest.TestCase):
+    def test_from_settings(self):
+        capabilities = Capabilities.from_settings(SETTINGS)
+        self.assertEqual(capabilities.version, "10.1.5")
+        self.assertEqual(capabilities.version_info, Version("10.1.5"))
+        self.assertEqual(capabilities.edition, "Enterprise")
+        self.assertTrue(capabilities.has_feature("publicDashboards"))
+        self.assertFalse(capabilities.has_feature("nestedFolders"))
+        self.assertFalse(capabilities.has_feature("unknown"))
+        self.assertTrue(capabilities.supports("datasource_health"))
+        self.assertTrue(capabilities.supports("datasource_permissions"))
+        self.assertFalse(capabilities.supports("team_external_groups_by_query"))
+        self.assertRaises(KeyError, lambda: capabilities.supports("unknown"))
+
+    def test_version_comparison(self):
+        capabilities = Capabilities.from_settings(SETTINGS)
+        self.assertTrue(capabilities.at_least(Version("10")))
+        self.assertFalse(capabilities.at_least(Version("11")))
+        self.assertTrue(capabilities.at_most(Version("10.1.5")))
+        self.assertFalse(capabilities.at_most(Version("9")))
+
+    def test_unknown_version(self):
+        capabilities = Capabilities.from_settings({"buildInfo": {"version": "nightly"}})
+        self.assertEqual(capabilities.version, "nightly")
+        self.assertIsNone(capabilities.version_info)
+        self.assertTrue(capabilities.at_least(Version("11")))
+        self.assertFalse(capabilities.at_most(Version("7")))
+        self.assertTrue(capabilities.supports("datasource_health"))
+        self.assertFalse(capabilities.supports("datasource_permissions"))
+
+    def test_empty_settings(self):
+        capabilities = Capabilities.from_settings(None)
+        self.assertIsNone(capabilities.version)
+        self.assertEqual(capabilities.feature_toggles, {})
+
+
+class TestCapabilityRegistry(unittest.TestCase):
+    def test_ttl(self):
+        clock = FakeClock()
+        registry = CapabilityRegistry(ttl=10, clock=clock)
+        self.assertIsNone(registry.get())
+        registry.update(SETTINGS)
+        self.assertEqual(registry.get().version, "10.1.5")
+        clock.now = 9.9
+        self.assertIsNotNone(registry.get())
+        clock.now = 10
+        self.assertIsNone(registry.get())
+
+    def test_invalidate(self):
+        registry = CapabilityRegistry()
+        registry.update(SETTINGS)
+        registry.invalidate()
+        self.assertIsNone(registry.get())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: CapabilityRegistry(ttl=-1))
+
+
+class TestGrafanaApiCapabilities(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(return_value=MockResponse(200, json_data=SETTINGS))
+
+    def test_probed_once(self):
+        self.assertEqual(self.grafana.connect(), SETTINGS["buildInfo"])
+        for _ in range(3):
+            self.assertEqual(self.grafana.version, "10.1.5")
+            self.assertTrue(self.grafana.capabilities.has_feature("publicDashboards"))
+        self.assertEqual(self.grafana.client.s.request.call_count, 1)
+
+    def test_probed_on_first_use(self):
+        self.assertEqual(self.grafana.version, "10.1.5")
+        self.assertEqual(self.grafana.version, "10.1.5")
+        self.assertEqual(self.grafana.client.s.request.call_count, 1)
+
+    def test_refresh(self):
+        self.grafana.connect()
+        self.grafana.client.s.request.return_value = MockResponse(200, json_data={"buildInfo": {"version": "11.0.0"}})
+        self.assertEqual(self.grafana.refresh_capabilities().version, "11.0.0")
+        self.assertEqual(self.grafana.version, "11.0.0")
+        self.assertEqual(self.grafana.capability_registry.probes, 2)
+
+    def test_version_gating(self):
+        self.grafana.connect()
+        self.grafana.client.s.request.reset_mock()
+        self.grafana.client.s.request.return_value = MockResponse(200, json_data={})
+        self.grafana.teams.remove_team_external_group(1, "foo")
+        self.grafana.client.s.request.assert_called_once()
+        self.assertTrue(self.grafana.client.s.request.call_args.args[1].endswith("/teams/1/groups/foo"))
+
+
+class TestAsyncGrafanaApiCapabilities(unittest.IsolatedAsyncioTestCase):
+    async def test_probed_once(self):
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(return_value=MockResponse(200, json_data=SETTINGS))
+        self.assertEqual(await grafana.version, "10.1.5")
+        self.assertEqual(await grafana.version, "10.1.5")
+        self.assertTrue((await grafana.capabilities).supports("datasource_health"))
+        self.assertEqual(grafana.client.s.request.call_count, 1)
+        await grafana.refresh_capabilities()
+        self.assertEqual(grafana.client.s.request.call_count, 2)
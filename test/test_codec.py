@@ -0,0 +1,98 @@
+import importlib.util
+import json
+import unittest
+from unittest.mock import Mock
+
+import niquests
+
+from grafana_client import GrafanaApi, JsonCodec
+from grafana_client.codec import MsgspecCodec, OrjsonCodec, get_codec
+from test.test_grafana_client import MockResponse
+
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+HAS_MSGSPEC = importlib.util.find_spec("msgspec") is not None
+
+DOCUMENT = {"dashboard": {"uid": "foo", "title": "Fööbar", "panels": [{"id": 1, "targets": [], "ratio": 0.5}]}}
+
+
+class CountingCodec(JsonCodec):
+    def __init__(self):
+        self.encoded = 0
+        self.decoded = 0
+
+    def dumps(self, obj):
+        self.encoded += 1
+        return super().dumps(obj)
+
+    def loads(self, data):
+        self.decoded += 1
+        return super().loads(data)
+
+
+class TestCodec(unittest.TestCase):
+    def test_get_codec(self):
+        self.assertIs(type(get_codec("json")), JsonCodec)
+        codec = JsonCodec()
+        self.assertIs(get_codec(codec), codec)
+        self.assertRaises(ValueError, lambda: get_codec("foo"))
+
+    def test_get_codec_auto(self):
+        expected = "orjson" if HAS_ORJSON else "msgspec" if HAS_MSGSPEC else "json"
+        self.assertEqual(get_codec().name, expected)
+        self.assertEqual(get_codec("auto").name, expected)
+
+    @unittest.skipIf(HAS_MSGSPEC, "msgspec is installed")
+    def test_get_codec_missing(self):
+        self.assertRaises(ImportError, lambda: get_codec("msgspec"))
+
+    def test_roundtrip(self):
+        codecs = [JsonCodec()]
+        if HAS_ORJSON:
+            codecs.append(OrjsonCodec())
+        if HAS_MSGSPEC:
+            codecs.append(MsgspecCodec())
+        for codec in codecs:
+            data = codec.dumps(DOCUMENT)
+            self.assertIsInstance(data, bytes)
+            self.assertEqual(json.loads(data), DOCUMENT, codec.name)
+            self.assertEqual(codec.loads(data), DOCUMENT, codec.name)
+            self.assertEqual(codec.loads(data.decode("utf-8")), DOCUMENT, codec.name)
+            self.assertRaises(json.JSONDecodeError, lambda: codec.loads(b"{foo"))  # noqa: B023
+
+
+class TestClientCodec(unittest.TestCase):
+    def test_client_codec(self):
+        codec = CountingCodec()
+        grafana = GrafanaApi(host="localhost", json_codec=codec)
+        self.assertIs(grafana.client.json_codec, codec)
+        grafana.client.s.request = Mock(return_value=MockResponse(status_code=200, json_data=DOCUMENT))
+        self.assertEqual(grafana.dashboard.get_dashboard("foo"), DOCUMENT)
+        self.assertEqual(codec.decoded, 1)
+
+    def test_request_encoding(self):
+        codec = CountingCodec()
+        grafana = GrafanaApi(host="localhost", json_codec=codec)
+        request = grafana.client.s.prepare_request(niquests.Request("POST", "http://localhost/api/foo", json=DOCUMENT))
+        self.assertEqual(codec.encoded, 1)
+        self.assertEqual(json.loads(request.body), DOCUMENT)
+        self.assertTrue(request.headers["Content-Type"].startswith("application/json"))
+
+    def test_decode_error(self):
+        grafana = GrafanaApi(host="localhost")
+        response = Mock(status_code=200, headers={"Content-Type": "application/json"}, content=b"<html>", text="<html>")
+        grafana.client.s.request = Mock(return_value=response)
+        # Like `Response.json()`, invalid documents raise an error which is also a `RequestException`.
+        with self.assertRaises(niquests.exceptions.JSONDecodeError) as context:
+            grafana.dashboard.get_dashboard("foo")
+        self.assertIsInstance(context.exception, niquests.RequestException)
+        self.assertIsInstance(context.exception, json.JSONDecodeError)
+
+    def test_encode_error(self):
+        grafana = GrafanaApi(host="localhost", json_codec="json")
+        for payload in [{"value": float("nan")}, {"value": object()}]:
+            request = niquests.Request("POST", "http://localhost/api/foo", json=payload)
+            self.assertRaises(niquests.exceptions.InvalidJSONError, lambda: grafana.client.s.prepare_request(request))  # noqa: B023
+
+    def test_from_url(self):
+        grafana = GrafanaApi.from_url("http://localhost:3000", json_codec="json")
+        self.assertEqual(grafana.client.json_codec.name, "json")
@@ -0,0 +1,232 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, GrafanaApi
+from grafana_client.client import GrafanaClientError
+from grafana_client.concurrency import (
+    ParallelExecutionError,
+    ParallelExecutor,
+    TaskResult,
+    agather_bounded,
+    amap_bounded,
+    map_bounded,
+    task_callable,
+)
+from test.test_grafana_client import MockResponse
+
+
+class TestTaskSpec(unittest.TestCase):
+    def test_task_callable(self):
+        def method(*args, **kwargs):
+            return args, kwargs
+
+        self.assertEqual(task_callable(lambda: 42)(), 42)
+        self.assertEqual(task_callable((method, "foo"))(), (("foo",), {}))
+        self.assertEqual(task_callable((method, ["foo", "bar"]))(), (("foo", "bar"), {}))
+        self.assertEqual(task_callable((method, (), {"baz": 42}))(), ((), {"baz": 42}))
+        self.assertRaises(TypeError, lambda: task_callable(42))
+
+    def test_task_result(self):
+        self.assertEqual(TaskResult(index=0, value=42).result(), 42)
+        self.assertTrue(TaskResult(index=0, value=42).ok)
+        error = ValueError("foo")
+        self.assertFalse(TaskResult(index=0, error=error).ok)
+        self.assertRaises(ValueError, lambda: TaskResult(index=0, error=error).result())
+
+
+class TestBoundedThreads(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def work(self, value, delay=0.01):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        try:
+            time.sleep(delay)
+        finally:
+            with self.lock:
+                self.current -= 1
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def test_map_bounded(self):
+        results = list(map_bounded([(self.work, i) for i in range(20)], concurrency=3))
+        self.assertEqual(sorted(item.value for item in results), list(range(20)))
+        self.assertEqual(self.peak, 3)
+
+    def test_map_bounded_context(self):
+        variable = contextvars.ContextVar("variable", default=None)
+        token = variable.set("caller")
+        try:
+            results = list(map_bounded([variable.get] * 4, 2))
+        finally:
+            variable.reset(token)
+        self.assertEqual([result.value for result in results], ["caller"] * 4)
+
+    def test_map_bounded_completion_order(self):
+        tasks = [functools.partial(self.work, i, delay=0.2 - i * 0.05) for i in range(3)]
+        results = list(map_bounded(tasks, concurrency=3))
+        self.assertEqual([item.index for item in results], [2, 1, 0])
+
+    def test_executor_map(self):
+        with ParallelExecutor(max_workers=4) as pool:
+            self.assertEqual(pool.map(self.work, range(10)), list(range(10)))
+            self.assertEqual(pool.map(lambda a, b: a + b, [1, 2], [3, 4]), [4, 6])
+        self.assertLessEqual(self.peak, 4)
+
+    def test_executor_map_errors(self):
+        values = [1, ValueError("foo"), 3, KeyError("bar")]
+        with ParallelExecutor(max_workers=2) as pool:
+            with self.assertRaises(ParallelExecutionError) as ctx:
+                pool.map(self.work, values)
+            self.assertEqual([item.ok for item in ctx.exception.results], [True, False, True, False])
+            self.assertEqual([item.index for item in ctx.exception.errors], [1, 3])
+            self.assertIn("2 of 4 tasks failed", str(ctx.exception))
+
+            results = pool.map(self.work, values, return_exceptions=True)
+            self.assertEqual(results[0], 1)
+            self.assertIsInstance(results[1], ValueError)
+            self.assertIsInstance(results[3], KeyError)
+
+    def test_invalid_workers(self):
+        self.assertRaises(ValueError, lambda: ParallelExecutor(max_workers=0))
+        self.assertRaises(ValueError, lambda: list(map_bounded([], concurrency=0)))
+
+
+class TestGrafanaApiParallel(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost", session_pool_size=3)
+
+        def request(method, url, **kwargs):  # noqa: ARG001
+            uid = url.rsplit("/", 1)[-1]
+            if uid == "unknown":
+                return MockResponse(status_code=404, json_data={"message": "Dashboard not found"})
+            return MockResponse(status_code=200, json_data={"dashboard": {"uid": uid}})
+
+        self.grafana.client.s.request = Mock(side_effect=request)
+
+    def test_parallel(self):
+        with self.grafana.parallel() as pool:
+            self.assertEqual(pool.max_workers, 3)
+            dashboards = pool.map(self.grafana.dashboard.get_dashboard, ["foo", "bar"])
+        self.assertEqual(dashboards, [{"dashboard": {"uid": "foo"}}, {"dashboard": {"uid": "bar"}}])
+
+    def test_parallel_errors(self):
+        with self.grafana.parallel(max_workers=2) as pool:
+            with self.assertRaises(ParallelExecutionError) as ctx:
+                pool.map(self.grafana.dashboard.get_dashboard, ["foo", "unknown", "bar"])
+        self.assertEqual(len(ctx.exception.errors), 1)
+        self.assertIsInstance(ctx.exception.errors[0].error, GrafanaClientError)
+        self.assertEqual(ctx.exception.results[2].value, {"dashboard": {"uid": "bar"}})
+
+    def test_parallel_exceeds_pool_size(self):
+        with self.assertLogs("grafana_client.api", level="WARNING"):
+            self.grafana.parallel(max_workers=10).close()
+
+    def test_parallel_async_unsupported(self):
+        self.assertFalse(hasattr(AsyncGrafanaApi(host="localhost"), "parallel"))
+
+
+class TestBoundedAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.current = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def work(self, value, delay=0.01):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.current -= 1
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    async def test_completion_order_and_bound(self):
+        tasks = [functools.partial(self.work, i, delay=0.05 - i * 0.01) for i in range(5)]
+        results = [item async for item in amap_bounded(tasks, concurrency=5)]
+        self.assertEqual([item.index for item in results], [4, 3, 2, 1, 0])
+        self.assertEqual([item.value for item in results], [4, 3, 2, 1, 0])
+
+        self.peak = 0
+        results = [item async for item in amap_bounded([(self.work, i) for i in range(20)], concurrency=3)]
+        self.assertEqual(sorted(item.value for item in results), list(range(20)))
+        self.assertEqual(self.peak, 3)
+
+    async def test_collect_exceptions(self):
+        tasks = [(self.work, 1), (self.work, ValueError("foo")), (self.work, 3)]
+        results = sorted([item async for item in amap_bounded(tasks, concurrency=2)], key=lambda item: item.index)
+        self.assertEqual([item.ok for item in results], [True, False, True])
+        self.assertIsInstance(results[1].error, ValueError)
+
+    async def test_cancel_on_early_exit(self):
+        tasks = [(self.work, 0, {"delay": 0})] + [(self.work, i, {"delay": 10}) for i in range(1, 5)]
+        iterator = amap_bounded(tasks, concurrency=3)
+        async for item in iterator:
+            self.assertEqual(item.value, 0)
+            break
+        await iterator.aclose()
+        # The first item completed, the next task has not been scheduled yet.
+        self.assertEqual(self.cancelled, 2)
+        self.assertEqual(self.current, 0)
+
+    async def test_gather_bounded(self):
+        tasks = [(self.work, 1, {"delay": 0.03}), (self.work, ValueError("foo")), (self.work, 3)]
+        results = await agather_bounded(tasks, concurrency=2)
+        self.assertEqual(results[0], 1)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], 3)
+
+    async def test_gather_bounded_raise(self):
+        tasks = [(self.work, ValueError("foo"), {"delay": 0})] + [(self.work, i, {"delay": 10}) for i in range(3)]
+        with self.assertRaises(ValueError):
+            await agather_bounded(tasks, concurrency=4, return_exceptions=False)
+        self.assertEqual(self.cancelled, 3)
+
+    async def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            await agather_bounded([], concurrency=0)
+
+
+class TestAsyncGrafanaApiFanout(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.grafana = AsyncGrafanaApi(host="localhost", session_pool_size=4)
+
+        async def request(method, url, **kwargs):  # noqa: ARG001
+            uid = url.rsplit("/", 1)[-1]
+            if uid == "unknown":
+                return MockResponse(status_code=404, json_data={"message": "Dashboard not found"})
+            return MockResponse(status_code=200, json_data={"dashboard": {"uid": uid}})
+
+        self.grafana.client.s.request = AsyncMock(side_effect=request)
+
+    async def test_map(self):
+        uids = ["foo", "bar", "unknown"]
+        results = [item async for item in self.grafana.map((self.grafana.dashboard.get_dashboard, uid) for uid in uids)]
+        results = sorted(results, key=lambda item: item.index)
+        self.assertEqual(results[0].value, {"dashboard": {"uid": "foo"}})
+        self.assertEqual(results[1].value, {"dashboard": {"uid": "bar"}})
+        self.assertIsInstance(results[2].error, GrafanaClientError)
+
+    async def test_gather_bounded(self):
+        uids = ["foo", "bar", "unknown"]
+        results = await self.grafana.gather_bounded(
+            [functools.partial(self.grafana.dashboard.get_dashboard, uid) for uid in uids]
+        )
+        self.assertEqual(results[0]["dashboard"]["uid"], "foo")
+        self.assertEqual(results[1]["dashboard"]["uid"], "bar")
+        self.assertIsInstance(results[2], GrafanaClientError)
@@ -0,0 +1,54 @@
+import unittest
+
+from niquests.adapters import AsyncHTTPAdapter, HTTPAdapter
+
+from grafana_client import AsyncGrafanaApi, ConnectionOptions, GrafanaApi
+
+
+class TestConnectionOptions(unittest.TestCase):
+    def test_from_value(self):
+        self.assertEqual(ConnectionOptions.from_value(None), ConnectionOptions())
+        options = ConnectionOptions(http3=False)
+        self.assertIs(ConnectionOptions.from_value(options), options)
+        self.assertEqual(ConnectionOptions.from_value({"multiplexed": True}).multiplexed, True)
+        self.assertRaises(TypeError, lambda: ConnectionOptions.from_value("foo"))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: ConnectionOptions(http1=False, http2=False, http3=False))
+
+    def test_defaults(self):
+        grafana = GrafanaApi(host="localhost", session_pool_size=4)
+        adapter = grafana.client.s.adapters["https://"]
+        self.assertFalse(grafana.client.s.multiplexed)
+        self.assertFalse(adapter._pool_block)
+        self.assertEqual(adapter._pool_maxsize, 4)
+
+    def test_session(self):
+        grafana = GrafanaApi(
+            host="localhost",
+            session_pool_size=4,
+            connection=ConnectionOptions(
+                http1=False, http3=False, multiplexed=True, keepalive_delay=30, pool_block=True
+            ),
+        )
+        session = grafana.client.s
+        self.assertTrue(session.multiplexed)
+        for prefix in ("http://", "https://"):
+            adapter = session.adapters[prefix]
+            self.assertIsInstance(adapter, HTTPAdapter)
+            self.assertTrue(adapter._pool_block)
+            self.assertEqual(adapter._pool_maxsize, 4)
+            self.assertTrue(adapter._disable_http1)
+            self.assertFalse(adapter._disable_http2)
+            self.assertTrue(adapter._disable_http3)
+            self.assertEqual(adapter._keepalive_delay, 30)
+
+    def test_async_session(self):
+        grafana = AsyncGrafanaApi(host="localhost", connection={"multiplexed": True, "pool_block": True})
+        self.assertTrue(grafana.client.s.multiplexed)
+        self.assertIsInstance(grafana.client.s.adapters["https://"], AsyncHTTPAdapter)
+        self.assertTrue(grafana.client.s.adapters["https://"]._pool_block)
+
+    def test_from_url(self):
+        grafana = GrafanaApi.from_url("http://localhost:3000", connection={"http2": False})
+        self.assertFalse(grafana.client.connection.http2)
@@ -0,0 +1,142 @@
+import importlib.util
+import json
+import unittest
+
+from grafana_client.frames import Frame, decode_frame, decode_frames, decode_results
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+FRAME = {
+    "schema": {
+        "name": "up",
+        "refId": "A",
+        "meta": {"executedQueryString": "up"},
+        "fields": [
+            {"name": "Time", "type": "time", "typeInfo": {"frame": "time.Time"}},
+            {
+                "name": "Value",
+                "type": "number",
+                "typeInfo": {"frame": "float64", "nullable": True},
+                "labels": {"instance": "localhost:9090"},
+                "config": {"displayNameFromDS": "up"},
+            },
+            {"name": "Count", "type": "number", "typeInfo": {"frame": "int64", "nullable": True}},
+            {"name": "Ok", "type": "boolean"},
+            {"name": "Host", "type": "string", "typeInfo": {"frame": "string", "nullable": True}},
+            {"name": "Raw", "type": "other", "typeInfo": {"frame": "json.RawMessage"}},
+        ],
+    },
+    "data": {
+        "values": [
+            [1700000000000, 1700000015000, 1700000030000, 1700000045000, 1700000060000],
+            [1.5, None, None, None, None],
+            [1, 2, None, 4, 5],
+            [True, False, True, True, False],
+            ["a", "b", None, "d", "e"],
+            [{"a": 1}, [1, 2], "foo", None, 42],
+        ],
+        "entities": [None, {"NaN": [1], "Inf": [2], "NegInf": [3]}],
+        "nanos": [[0, 1, 2, 3, 999999], None],
+    },
+}
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+class TestFramesNumpy(unittest.TestCase):
+    def test_decode_frame(self):
+        import numpy as np
+
+        frame = decode_frame(FRAME)
+        self.assertIsInstance(frame, Frame)
+        self.assertEqual((frame.name, frame.ref_id, frame.meta), ("up", "A", {"executedQueryString": "up"}))
+        self.assertEqual(frame.names, ["Time", "Value", "Count", "Ok", "Host", "Raw"])
+        self.assertEqual(len(frame), 5)
+        self.assertEqual(frame.field("Value").labels, {"instance": "localhost:9090"})
+        self.assertRaises(KeyError, lambda: frame["foo"])
+
+        self.assertIs(type(frame["Time"]), np.ndarray)
+        self.assertEqual(frame["Time"].dtype, np.dtype("datetime64[ns]"))
+        self.assertEqual(frame["Time"][0], np.datetime64("2023-11-14T22:13:20", "ns"))
+        self.assertEqual(frame["Time"][4], np.datetime64("2023-11-14T22:14:20.000999999", "ns"))
+
+        self.assertEqual(frame["Count"].dtype, np.dtype("int64"))
+        self.assertEqual(frame["Count"].mask.tolist(), [False, False, True, False, False])
+        self.assertEqual(frame["Count"].compressed().tolist(), [1, 2, 4, 5])
+
+        self.assertEqual(frame["Ok"].dtype, np.dtype("bool"))
+        self.assertEqual(frame["Host"].tolist(), ["a", "b", None, "d", "e"])
+        self.assertEqual(frame["Raw"].tolist(), [{"a": 1}, [1, 2], "foo", None, 42])
+
+    def test_decode_entities(self):
+        values = decode_frame(FRAME)["Value"]
+        self.assertEqual(values.mask.tolist(), [False, False, False, False, True])
+        self.assertEqual(values[0], 1.5)
+        self.assertNotEqual(values[1], values[1])
+        self.assertEqual(values[2], float("inf"))
+        self.assertEqual(values[3], float("-inf"))
+
+    def test_decode_types(self):
+        frame = decode_frame(
+            {
+                "schema": {
+                    "fields": [
+                        {"name": "time", "type": "time"},
+                        {"name": "value", "type": "number"},
+                        {"name": "small", "type": "number", "typeInfo": {"frame": "float32"}},
+                        {"name": "state", "type": "enum", "typeInfo": {"frame": "enum"}},
+                    ]
+                },
+                "data": {"values": [[1000, None], [1, 2], [0.5, 1.5], [0, 1]]},
+            }
+        )
+        self.assertEqual(frame["time"].dtype.kind, "M")
+        self.assertTrue(frame["time"].mask[1])
+        self.assertEqual(frame["value"].dtype.name, "float64")
+        self.assertEqual(frame["small"].dtype.name, "float32")
+        self.assertEqual(frame["state"].dtype.name, "uint16")
+
+    def test_decode_empty(self):
+        frame = decode_frame({"schema": {"refId": "A", "fields": [{"name": "Time", "type": "time"}]}})
+        self.assertEqual(len(frame), 0)
+        self.assertEqual(len(decode_frame({})), 0)
+
+    def test_decode_results(self):
+        response = {"results": {"A": {"status": 200, "frames": [FRAME, FRAME]}, "B": {"status": 200}}}
+        frames = decode_results(response)
+        self.assertEqual(list(frames), ["A", "B"])
+        self.assertEqual(len(frames["A"]), 2)
+        self.assertEqual(frames["B"], [])
+        self.assertEqual(len(decode_results({"A": {"frames": [FRAME]}})["A"]), 1)
+        self.assertEqual(len(decode_frames([FRAME])), 1)
+        self.assertRaises(ValueError, lambda: decode_frames([FRAME], backend="foo"))
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+class TestFramesArrow(unittest.TestCase):
+    def test_decode_arrow(self):
+        import pyarrow as pa
+
+        (table,) = decode_frames({"frames": [FRAME]}, backend="arrow")
+        self.assertIsInstance(table, pa.Table)
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.schema.field("Time").type, pa.timestamp("ns", tz="UTC"))
+        self.assertEqual(table.column("Time")[4].value, 1700000060000999999)
+        self.assertEqual(table.column("Count").null_count, 1)
+        self.assertEqual(table.column("Count").type, pa.int64())
+        self.assertEqual(table.column("Ok").type, pa.bool_())
+        self.assertEqual(table.column("Host").to_pylist(), ["a", "b", None, "d", "e"])
+        self.assertEqual(table.column("Raw").to_pylist(), ['{"a": 1}', "[1, 2]", '"foo"', None, "42"])
+
+        values = table.column("Value").to_pylist()
+        self.assertEqual(values[0], 1.5)
+        self.assertNotEqual(values[1], values[1])
+        self.assertEqual(values[2:], [float("inf"), float("-inf"), None])
+
+    def test_arrow_metadata(self):
+        table = decode_frame(FRAME).to_arrow()
+        self.assertEqual(table.schema.metadata[b"refId"], b"A")
+        self.assertEqual(json.loads(table.schema.metadata[b"meta"]), {"executedQueryString": "up"})
+        metadata = table.schema.field("Value").metadata
+        self.assertEqual(json.loads(metadata[b"labels"]), {"instance": "localhost:9090"})
+        self.assertIsNone(table.schema.field("Ok").metadata)
@@ -4,7 +4,7 @@ from unittest import mock
 
 import niquests
 
-from grafana_client import GrafanaApi, HeaderAuth, TokenAuth
+from grafana_client import GrafanaApi, HeaderAuth, RetryPolicy, TokenAuth
 
 
 class TestGrafanaApiFactories(unittest.TestCase):
@@ -74,6 +74,19 @@ class TestGrafanaApiFactories(unittest.TestCase):
         grafana = GrafanaApi.from_url(timeout=(3.05, 27))
         self.assertEqual(grafana.client.timeout, (3.05, 27))
 
+    def test_from_url_with_retry_attempts(self):
+        grafana = GrafanaApi.from_url(retry=5)
+        self.assertEqual(grafana.client.retry, RetryPolicy(max_attempts=5))
+
+    def test_from_url_with_retry_policy(self):
+        policy = RetryPolicy(max_attempts=2, backoff_cap=1.0)
+        grafana = GrafanaApi.from_url(retry=policy)
+        self.assertIs(grafana.client.retry, policy)
+
+    def test_from_url_without_retry(self):
+        grafana = GrafanaApi.from_url()
+        self.assertIsNone(grafana.client.retry)
+
     def test_from_env_default(self):
         grafana = GrafanaApi.from_env()
         self.assertIsInstance(grafana.client.auth, niquests.auth.HTTPBasicAuth)
@@ -141,3 +154,18 @@ class TestGrafanaApiFactories(unittest.TestCase):
     def test_from_env_with_timeout_tuple(self):
         grafana = GrafanaApi.from_env(timeout=(3.05, 27))
         self.assertEqual(grafana.client.timeout, (3.05, 27))
+
+    @mock.patch.dict(os.environ, {"GRAFANA_RETRIES": "4"})
+    def test_from_env_with_retries_from_env_valid(self):
+        grafana = GrafanaApi.from_env()
+        self.assertEqual(grafana.client.retry.max_attempts, 4)
+
+    @mock.patch.dict(os.environ, {"GRAFANA_RETRIES": "foobar"})
+    def test_from_env_with_retries_from_env_invalid(self):
+        with self.assertRaises(ValueError) as ctx:
+            GrafanaApi.from_env()
+        self.assertEqual(
+            str(ctx.exception),
+            "Unable to parse invalid `int` value from `GRAFANA_RETRIES` "
+            "environment variable: invalid literal for int() with base 10: 'foobar'",
+        )
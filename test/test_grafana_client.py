@@ -1,3 +1,5 @@
+import json
+import os
 import sys
 import unittest
 from unittest.mock import Mock, patch
@@ -8,6 +10,8 @@ import pytest
 
 from grafana_client.api import GrafanaApi
 from grafana_client.client import (
+    AsyncGrafanaClient,
+    GrafanaClient,
     GrafanaClientError,
     GrafanaServerError,
     GrafanaTimeoutError,
@@ -23,10 +27,18 @@ class MockResponse:
         self.status_code = status_code
         self.headers = headers or {"Content-Type": "application/json"}
         self.json_data = json_data
+        self.closed = False
 
     def json(self):
         return self.json_data
 
+    @property
+    def content(self):
+        return json.dumps(self.json_data).encode("utf-8")
+
+    def close(self):
+        self.closed = True
+
 
 frontend_settings_buildinfo_payload = {
     "buildInfo": {
@@ -115,14 +127,17 @@ class TestGrafanaClient(unittest.TestCase):
         grafana.client.s.request.assert_called_once_with(
             "get",
             "https://localhost/api/users/lookup?loginOrEmail=test@example.org",
-            auth=basic_auth,
             headers=None,
             json=None,
             params=None,
             data=None,
+            stream=False,
             verify=False,
-            timeout=5.0,
+            timeout=None,
         )
+        self.assertEqual(grafana.client.s.auth, basic_auth)
+        self.assertEqual(grafana.client.s.verify, False)
+        self.assertEqual(grafana.client.s.timeout, 5.0)
 
     def test_grafana_client_basic_auth(self):
         grafana = GrafanaApi(("admin", "admin"), host="localhost", url_path_prefix="", protocol="https", port="3000")
@@ -193,6 +208,75 @@ class TestGrafanaClient(unittest.TestCase):
         self.assertIsNone(response)
 
 
+class TestGrafanaClientRequestRunners(unittest.TestCase):
+    def setUp(self):
+        self.client = GrafanaClient(("admin", "admin"), host="localhost", protocol="https", verify=False, timeout=3.0)
+        self.client.s.request = Mock(name="request")
+        self.client.s.request.return_value = MockResponse(status_code=200, json_data={"foo": "bar"})
+
+    def test_session_settings(self):
+        self.assertEqual(self.client.s.auth, niquests.auth.HTTPBasicAuth("admin", "admin"))
+        self.assertEqual(self.client.s.verify, False)
+        self.assertEqual(self.client.s.timeout, 3.0)
+
+        self.client.timeout = 42.42
+        self.assertEqual(self.client.timeout, 42.42)
+        self.assertEqual(self.client.s.timeout, 42.42)
+
+    def test_verb_methods(self):
+        for verb in ["get", "post", "put", "patch", "delete"]:
+            self.client.s.request.reset_mock()
+            response = getattr(self.client, verb)("/foo", json={"baz": 42})
+            self.assertEqual(response, {"foo": "bar"})
+            self.client.s.request.assert_called_once_with(
+                verb,
+                "https://localhost/api/foo",
+                json={"baz": 42},
+                data=None,
+                params=None,
+                headers=None,
+                stream=False,
+                verify=False,
+                timeout=None,
+            )
+
+    def test_verify_with_ca_bundle_environment(self):
+        # Session settings yield to `REQUESTS_CA_BUNDLE`, so TLS verification is passed per request.
+        client = GrafanaClient(("admin", "admin"), host="localhost", protocol="https", verify=False)
+        client.s.send = Mock(name="send", return_value=MockResponse(status_code=200, json_data={}))
+        with patch.dict(os.environ, {"REQUESTS_CA_BUNDLE": "/etc/ssl/certs/ca-certificates.crt"}):
+            client.get("/foo")
+        self.assertIs(client.s.send.call_args.kwargs["verify"], False)
+
+    def test_dynamic_runner_cached(self):
+        self.assertNotIn("GET", self.client.__dict__)
+        runner = self.client.GET
+        self.assertEqual(runner, self.client.get)
+        self.assertIs(self.client.__dict__["GET"], runner)
+        self.assertEqual(self.client.GET("/foo"), {"foo": "bar"})
+
+    def test_dynamic_runner_fallback(self):
+        self.assertEqual(self.client.OPTIONS("/foo"), {"foo": "bar"})
+        self.client.s.request.assert_called_once_with(
+            "options",
+            "https://localhost/api/foo",
+            json=None,
+            data=None,
+            params=None,
+            headers=None,
+            stream=False,
+            verify=False,
+            timeout=None,
+        )
+
+    def test_async_session_settings(self):
+        client = AsyncGrafanaClient("VerySecretToken", host="localhost", timeout=3.0, user_agent="foobar/3000")
+        self.assertIsInstance(client.s, niquests.AsyncSession)
+        self.assertIsInstance(client.s.auth, TokenAuth)
+        self.assertEqual(client.s.timeout, 3.0)
+        self.assertEqual(client.s.headers["User-Agent"], "foobar/3000")
+
+
 def test_grafana_client_timeout(docker_grafana):
     grafana = GrafanaApi.from_url(docker_grafana, timeout=0.0001)
     with pytest.raises(GrafanaTimeoutError) as excinfo:
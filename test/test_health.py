@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, GrafanaApi
+from test.test_grafana_client import MockResponse
+
+BUILD_INFO = {"version": "11.0.0", "commit": "abc", "edition": "Open Source", "env": "production"}
+
+
+class HealthServer:
+    def __init__(self, health_status: int = 200):
+        self.health_status = health_status
+        self.version = "11.0.0"
+        self.paths = []
+
+    def __call__(self, method, url, **kwargs):  # noqa: ARG002
+        path = url.replace("http://localhost/api", "")
+        self.paths.append(path)
+        if path == "/health":
+            if self.health_status != 200:
+                return MockResponse(self.health_status, json_data={"message": "Not found"})
+            return MockResponse(200, json_data={"commit": "abc", "database": "ok", "version": self.version})
+        return MockResponse(200, json_data={"buildInfo": dict(BUILD_INFO, version=self.version)})
+
+
+class TestHealthCheck(unittest.TestCase):
+    def setUp(self):
+        self.server = HealthServer()
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(side_effect=self.server)
+
+    def test_check(self):
+        expected = dict(BUILD_INFO, database="ok")
+        self.assertEqual(self.grafana.health.check(), expected)
+        self.assertEqual(self.grafana.health.check(), expected)
+        self.assertEqual(self.grafana.health.check(), expected)
+        # The build information is cached, subsequent checks only probe `/api/health`.
+        self.assertEqual(self.server.paths, ["/health", "/frontend/settings", "/health", "/health"])
+
+    def test_check_fields(self):
+        info = self.grafana.health.check(fields=["version"])
+        self.assertEqual(info, {"commit": "abc", "database": "ok", "version": "11.0.0"})
+        self.assertEqual(self.server.paths, ["/health"])
+        info = self.grafana.health.check(fields=["version", "edition"])
+        self.assertEqual(info["edition"], "Open Source")
+        self.assertEqual(self.server.paths, ["/health", "/health", "/frontend/settings"])
+
+    def test_check_upgrade(self):
+        self.grafana.health.check()
+        self.server.version = "12.0.0"
+        self.assertEqual(self.grafana.health.check()["version"], "12.0.0")
+        self.assertEqual(self.server.paths, ["/health", "/frontend/settings", "/health", "/frontend/settings"])
+        self.assertEqual(self.grafana.health.build_info["version"], "12.0.0")
+
+    def test_check_fallback(self):
+        self.server.health_status = 404
+        self.assertEqual(self.grafana.health.check(), BUILD_INFO)
+        self.assertEqual(self.server.paths, ["/health", "/frontend/settings"])
+
+    def test_check_database_down(self):
+        self.grafana.health.check()
+        # `/api/health` responds with `503 Service Unavailable` when the database is down.
+        self.server.health_status = 503
+        self.assertEqual(self.grafana.health.check(), BUILD_INFO)
+        self.assertEqual(self.server.paths, ["/health", "/frontend/settings", "/health", "/frontend/settings"])
+
+    def test_build_info_read_only(self):
+        self.grafana.health.check()
+        with self.assertRaises(TypeError):
+            self.grafana.health.build_info["version"] = "0.0.0"
+
+    def test_health(self):
+        self.assertEqual(self.grafana.health.health()["database"], "ok")
+
+
+class TestAsyncHealthCheck(unittest.IsolatedAsyncioTestCase):
+    async def test_check(self):
+        server = HealthServer()
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        self.assertEqual((await grafana.health.check())["edition"], "Open Source")
+        self.assertEqual((await grafana.health.check())["database"], "ok")
+        self.assertEqual(server.paths, ["/health", "/frontend/settings", "/health"])
@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, DatasourceIndex, GrafanaApi
+from grafana_client.client import GrafanaClientError
+from grafana_client.model import DatasourceIdentifier
+from test.elements.test_datasource_fixtures import ELASTICSEARCH_DATASOURCE, PROMETHEUS_DATASOURCE
+from test.test_grafana_client import MockResponse
+from test.test_ratelimit import FakeClock
+
+DATASOURCES = [PROMETHEUS_DATASOURCE, ELASTICSEARCH_DATASOURCE]
+
+
+def request(method, url, **kwargs):  # noqa: ARG001
+    if url.endswith("/datasources") and method == "get":
+        return MockResponse(200, json_data=DATASOURCES)
+    if method == "get":
+        return MockResponse(404, json_data={"message": "Data source not found"})
+    return MockResponse(200, json_data={"message": "Datasource updated"})
+
+
+class TestDatasourceIndex(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.index = DatasourceIndex(ttl=60, clock=self.clock)
+
+    def test_lookup(self):
+        self.assertIsNone(self.index.lookup(DatasourceIdentifier(uid="h8KkCLt7z")))
+        self.index.update(DATASOURCES)
+        self.assertEqual(self.index.lookup(DatasourceIdentifier(uid="h8KkCLt7z")), PROMETHEUS_DATASOURCE)
+        self.assertEqual(self.index.lookup(DatasourceIdentifier(id="42")), PROMETHEUS_DATASOURCE)
+        self.assertEqual(self.index.lookup(DatasourceIdentifier(id=42)), PROMETHEUS_DATASOURCE)
+        self.assertEqual(self.index.lookup(DatasourceIdentifier(name="Prometheus")), PROMETHEUS_DATASOURCE)
+        self.assertIsNone(self.index.lookup(DatasourceIdentifier(name="unknown")))
+        self.assertRaises(KeyError, lambda: self.index.lookup(DatasourceIdentifier()))
+
+    def test_lookup_copy(self):
+        self.index.update(DATASOURCES)
+        datasource = self.index.lookup(DatasourceIdentifier(uid="h8KkCLt7z"))
+        datasource["name"] = "changed"
+        datasource["jsonData"]["changed"] = True
+        self.assertEqual(self.index.lookup(DatasourceIdentifier(uid="h8KkCLt7z")), PROMETHEUS_DATASOURCE)
+        self.assertNotIn("changed", PROMETHEUS_DATASOURCE["jsonData"])
+
+    def test_ttl(self):
+        self.index.update(DATASOURCES)
+        self.clock.now = 60
+        self.assertTrue(self.index.stale)
+        self.assertIsNone(self.index.lookup(DatasourceIdentifier(uid="h8KkCLt7z")))
+
+    def test_should_refresh(self):
+        dsident = DatasourceIdentifier(uid="unknown")
+        self.assertTrue(self.index.should_refresh(dsident))
+        self.index.update(DATASOURCES)
+        self.assertFalse(self.index.should_refresh(dsident))
+        self.assertTrue(self.index.should_refresh(DatasourceIdentifier(uid="other")))
+        self.clock.now = 60
+        self.assertTrue(self.index.should_refresh(dsident))
+
+    def test_invalidate(self):
+        self.index.update(DATASOURCES)
+        self.index.invalidate()
+        self.assertTrue(self.index.stale)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: DatasourceIndex(ttl=-1))
+
+
+class TestDatasourceIndexLookup(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(side_effect=request)
+        self.grafana.datasource.index = DatasourceIndex(ttl=60)
+
+    @property
+    def urls(self):
+        return [call.args[1] for call in self.grafana.client.s.request.call_args_list]
+
+    def test_get(self):
+        for _ in range(3):
+            self.assertEqual(self.grafana.datasource.get(DatasourceIdentifier(uid="h8KkCLt7z"))["type"], "prometheus")
+            self.assertEqual(self.grafana.datasource.get(DatasourceIdentifier(name="Prometheus"))["id"], 42)
+        self.assertEqual(self.urls, ["http://localhost/api/datasources"])
+
+    def test_miss_refreshes_once(self):
+        self.grafana.datasource.get(DatasourceIdentifier(uid="h8KkCLt7z"))
+        for _ in range(3):
+            self.assertRaises(
+                GrafanaClientError, lambda: self.grafana.datasource.get(DatasourceIdentifier(uid="unknown"))
+            )
+        self.assertEqual(self.urls.count("http://localhost/api/datasources"), 2)
+        self.assertEqual(self.urls.count("http://localhost/api/datasources/uid/unknown"), 3)
+
+    def test_invalidate_on_write(self):
+        self.grafana.datasource.get(DatasourceIdentifier(uid="h8KkCLt7z"))
+        self.grafana.datasource.update_datasource_by_uid("h8KkCLt7z", PROMETHEUS_DATASOURCE)
+        self.assertTrue(self.grafana.datasource.index.stale)
+        self.grafana.datasource.get(DatasourceIdentifier(uid="h8KkCLt7z"))
+        self.assertEqual(self.urls.count("http://localhost/api/datasources"), 2)
+
+    def test_uid_by_id_invalidated_on_write(self):
+        self.assertEqual(self.grafana.datasource.get_datasource_uid_by_id(42), "h8KkCLt7z")
+        self.assertEqual(self.grafana.datasource._uids, {42: "h8KkCLt7z"})
+        self.grafana.datasource.delete_datasource_by_uid("h8KkCLt7z")
+        self.assertEqual(self.grafana.datasource._uids, {})
+
+
+class TestAsyncDatasourceIndexLookup(unittest.IsolatedAsyncioTestCase):
+    async def test_get(self):
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=request)
+        grafana.datasource.index = DatasourceIndex(ttl=60)
+        for _ in range(3):
+            datasource = await grafana.datasource.get(DatasourceIdentifier(id="42"))
+            self.assertEqual(datasource["uid"], "h8KkCLt7z")
+        await grafana.datasource.delete_datasource_by_uid("h8KkCLt7z")
+        self.assertTrue(grafana.datasource.index.stale)
+        self.assertEqual(grafana.client.s.request.call_count, 2)
@@ -0,0 +1,520 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, GrafanaApi
+from grafana_client.pagination import aiter_pages, iter_pages, page_count, ramp_sizes
+from test.test_grafana_client import MockResponse
+
+
+class PagedServer:
+    """
+    Respond to paginated search requests with pages of `total` items, like `/serviceaccounts/search`.
+    """
+
+    def __init__(self, total: int, perpage: int = 1000, with_total: bool = True, key: str = "serviceAccounts"):
+        self.total = total
+        self.key = key
+        self.perpage = perpage
+        self.with_total = with_total
+        self.pages = []
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def document(self, page: int, perpage: int):
+        items = [{"id": i, "name": f"sa-{i}"} for i in range((page - 1) * perpage, min(page * perpage, self.total))]
+        document = {self.key: items, "page": page, "perPage": perpage}
+        if self.with_total:
+            document["totalCount"] = self.total
+        return document
+
+    def fetch(self, page: int):
+        with self.lock:
+            self.pages.append(page)
+        return self.document(page, self.perpage)
+
+    async def afetch(self, page: int):
+        return self.fetch(page)
+
+    def __call__(self, method, url, params=None, **kwargs):  # noqa: ARG002
+        with self.lock:
+            self.urls.append(url)
+            self.pages.append(params["page"])
+        return MockResponse(200, json_data=self.document(params["page"], params.get("perpage", self.perpage)))
+
+
+class TestPagination(unittest.TestCase):
+    def test_page_count(self):
+        self.assertEqual(page_count({"totalCount": 10, "perPage": 5}), 2)
+        self.assertEqual(page_count({"totalCount": 11, "perPage": 5}), 3)
+        self.assertEqual(page_count({"totalCount": 0, "perPage": 5}), 1)
+        self.assertEqual(page_count({"totalCount": 11}, perpage=10), 2)
+        self.assertIsNone(page_count({"totalCount": 11}))
+        self.assertIsNone(page_count([{"id": 1}], perpage=10))
+
+    def test_total_count(self):
+        server = PagedServer(total=25, perpage=10)
+        pages = list(iter_pages(server.fetch, key="serviceAccounts"))
+        self.assertEqual([len(page["serviceAccounts"]) for page in pages], [10, 10, 5])
+        # No request is spent on an empty terminating page.
+        self.assertEqual(server.pages, [1, 2, 3])
+
+    def test_lazy(self):
+        server = PagedServer(total=25, perpage=10)
+        pages = iter_pages(server.fetch, key="serviceAccounts")
+        self.assertEqual(server.pages, [])
+        next(pages)
+        self.assertEqual(server.pages, [1])
+        next(pages)
+        self.assertEqual(server.pages, [1, 2])
+
+    def test_prefetch(self):
+        server = PagedServer(total=50, perpage=10)
+        pages = iter_pages(server.fetch, key="serviceAccounts", concurrency=1)
+        next(pages)
+        # The second page is fetched in the background, while the consumer processes the first one.
+        pages.close()
+        self.assertEqual(server.pages, [1, 2])
+
+    def test_concurrency_order(self):
+        server = PagedServer(total=95, perpage=10)
+        pages = list(iter_pages(server.fetch, key="serviceAccounts", concurrency=4))
+        self.assertEqual([page["page"] for page in pages], list(range(1, 11)))
+        self.assertEqual(sorted(server.pages), list(range(1, 11)))
+
+    def test_without_total_count(self):
+        server = PagedServer(total=20, perpage=10, with_total=False)
+        pages = list(iter_pages(server.fetch, key="serviceAccounts"))
+        self.assertEqual([len(page["serviceAccounts"]) for page in pages], [10, 10, 0])
+
+    def test_error(self):
+        def fetch(page):
+            if page == 3:
+                raise RuntimeError("Failed")
+            return {"totalCount": 50, "perPage": 10, "items": [page]}
+
+        pages = iter_pages(fetch, key="items", concurrency=2)
+        self.assertEqual(next(pages)["items"], [1])
+        self.assertEqual(next(pages)["items"], [2])
+        with self.assertRaises(RuntimeError):
+            next(pages)
+
+    def test_expand(self):
+        server = PagedServer(total=25, perpage=10)
+        for concurrency in [0, 2]:
+            pages = list(
+                iter_pages(
+                    server.fetch,
+                    key="serviceAccounts",
+                    concurrency=concurrency,
+                    expand=lambda page: [(str.upper, item["name"]) for item in page["serviceAccounts"]],
+                )
+            )
+            self.assertEqual([page["page"] for page, _ in pages], [1, 2, 3])
+            self.assertEqual([value for _, values in pages for value in values], [f"SA-{i}" for i in range(25)])
+
+    def test_expand_error(self):
+        def fail(name):
+            raise RuntimeError(name)
+
+        server = PagedServer(total=25, perpage=10)
+        pages = iter_pages(
+            server.fetch, key="serviceAccounts", concurrency=2, expand=lambda page: [(fail, page["page"])]
+        )
+        with self.assertRaises(RuntimeError):
+            next(pages)
+
+    def test_negative_concurrency(self):
+        with self.assertRaises(ValueError):
+            next(iter_pages(lambda _page: {}, concurrency=-1))
+
+
+class TestAsyncPagination(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_order(self):
+        server = PagedServer(total=95, perpage=10)
+        pages = [page async for page in aiter_pages(server.afetch, key="serviceAccounts", concurrency=3)]
+        self.assertEqual([page["page"] for page in pages], list(range(1, 11)))
+
+    async def test_expand(self):
+        async def upper(name):
+            return name.upper()
+
+        server = PagedServer(total=25, perpage=10, with_total=False)
+        pages = [
+            page
+            async for page in aiter_pages(
+                server.afetch,
+                key="serviceAccounts",
+                concurrency=2,
+                expand=lambda page: [(upper, item["name"]) for item in page["serviceAccounts"]],
+            )
+        ]
+        self.assertEqual([page["page"] for page, _ in pages], [1, 2, 3])
+        self.assertEqual([value for _, values in pages for value in values], [f"SA-{i}" for i in range(25)])
+
+    async def test_prefetch(self):
+        server = PagedServer(total=50, perpage=10)
+        pages = aiter_pages(server.afetch, key="serviceAccounts", concurrency=1)
+        await pages.__anext__()
+        await pages.aclose()
+        self.assertLessEqual(len(server.pages), 2)
+
+
+class TestServiceAccountSearch(unittest.TestCase):
+    def setUp(self):
+        self.server = PagedServer(total=2500)
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(side_effect=self.server)
+
+    def test_search_all(self):
+        accounts = self.grafana.serviceaccount.search_all("sa")
+        self.assertEqual(len(accounts), 2500)
+        self.assertEqual(self.server.pages, [1, 2, 3])
+
+    def test_search_streaming_lazy(self):
+        accounts = self.grafana.serviceaccount.search_streaming("sa", perpage=100)
+        self.assertEqual(next(accounts)["id"], 0)
+        self.assertEqual(self.server.pages, [1])
+
+    def test_search_streaming_prefetch(self):
+        accounts = list(self.grafana.serviceaccount.search_streaming("sa", perpage=100, prefetch=True))
+        self.assertEqual([account["id"] for account in accounts], list(range(2500)))
+
+    def test_search_page(self):
+        pages = self.grafana.serviceaccount.search("sa", page=2)
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0]["page"], 2)
+        self.assertEqual(self.server.pages, [2])
+
+    def test_search_one(self):
+        self.server.total = 1
+        self.assertEqual(self.grafana.serviceaccount.search_one("sa")["name"], "sa-0")
+
+
+class TestAsyncServiceAccountSearch(unittest.IsolatedAsyncioTestCase):
+    async def test_search_all(self):
+        server = PagedServer(total=2500)
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        accounts = await grafana.serviceaccount.search_all("sa", prefetch=True)
+        self.assertEqual([account["id"] for account in accounts], list(range(2500)))
+        self.assertEqual(sorted(server.pages), [1, 2, 3])
+
+    async def test_search_streaming(self):
+        server = PagedServer(total=2500)
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        accounts = grafana.serviceaccount.search_streaming("sa")
+        self.assertEqual((await accounts.__anext__())["id"], 0)
+        await accounts.aclose()
+        self.assertEqual(server.pages, [1])
+
+
+class TestUserTeamSearch(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+
+    def test_search_users(self):
+        server = PagedServer(total=2050, perpage=100, key="users")
+        self.grafana.client.s.request = Mock(side_effect=server)
+        users = self.grafana.users.search_users("user", perpage=100, concurrency=4)
+        self.assertEqual([user["id"] for user in users], list(range(2050)))
+        # No request is spent on an empty terminating page.
+        self.assertEqual(sorted(server.pages), list(range(1, 22)))
+        self.assertEqual(set(server.urls), {"http://localhost/api/users/search"})
+
+    def test_search_users_sequential(self):
+        server = PagedServer(total=250, perpage=100, key="users")
+        self.grafana.client.s.request = Mock(side_effect=server)
+        users = self.grafana.users.iter_users(perpage=100, concurrency=0)
+        self.assertEqual(next(users)["id"], 0)
+        self.assertEqual(server.pages, [1])
+        self.assertEqual(len(list(users)), 249)
+        self.assertEqual(server.pages, [1, 2, 3])
+
+    def test_search_users_default_sequential(self):
+        server = PagedServer(total=250, perpage=100, key="users")
+        self.grafana.client.s.request = Mock(side_effect=server)
+        users = self.grafana.users.iter_users(perpage=100)
+        self.assertEqual(next(users)["id"], 0)
+        # Without `concurrency`, no page is fetched ahead of the consumer.
+        self.assertEqual(server.pages, [1])
+        self.assertEqual(len(list(users)), 249)
+        self.assertEqual(server.pages, [1, 2, 3])
+
+    def test_search_users_params(self):
+        server = PagedServer(total=250, perpage=100, key="users")
+        self.grafana.client.s.request = Mock(side_effect=server)
+        self.grafana.users.search_users("user", perpage=100)
+        self.assertEqual(
+            [(call.args[:2], call.kwargs["params"]) for call in self.grafana.client.s.request.call_args_list],
+            [
+                (("get", "http://localhost/api/users/search"), {"page": page, "query": "user", "perpage": 100})
+                for page in [1, 2, 3]
+            ],
+        )
+
+    def test_search_users_order(self):
+        server = PagedServer(total=500, perpage=100, key="users")
+
+        def request(method, url, params=None, **kwargs):
+            # Earlier pages respond later, so pages complete out of order.
+            time.sleep(0.01 * (5 - params["page"]))
+            return server(method, url, params=params, **kwargs)
+
+        self.grafana.client.s.request = Mock(side_effect=request)
+        users = self.grafana.users.search_users(perpage=100, concurrency=4)
+        self.assertEqual([user["id"] for user in users], list(range(500)))
+        self.assertEqual(sorted(server.pages), [1, 2, 3, 4, 5])
+
+    def test_search_users_page(self):
+        server = PagedServer(total=250, perpage=100, key="users")
+        self.grafana.client.s.request = Mock(side_effect=server)
+        users = self.grafana.users.search_users(page=3, perpage=100)
+        self.assertEqual([user["id"] for user in users], list(range(200, 250)))
+        self.assertEqual(server.pages, [3])
+
+    def test_search_teams(self):
+        server = PagedServer(total=1234, perpage=10, key="teams")
+        self.grafana.client.s.request = Mock(side_effect=server)
+        teams = self.grafana.teams.search_teams("team", perpage=10)
+        self.assertEqual([team["id"] for team in teams], list(range(1234)))
+        self.assertEqual(sorted(server.pages), list(range(1, 125)))
+        self.assertEqual(set(server.urls), {"http://localhost/api/teams/search"})
+
+    def test_search_teams_params(self):
+        server = PagedServer(total=25, perpage=10, key="teams")
+        self.grafana.client.s.request = Mock(side_effect=server)
+        teams = self.grafana.teams.search_teams("team", page=2, perpage=10)
+        self.assertEqual([team["id"] for team in teams], list(range(10, 20)))
+        self.grafana.client.s.request.assert_called_once()
+        call = self.grafana.client.s.request.call_args
+        self.assertEqual(call.args[:2], ("get", "http://localhost/api/teams/search"))
+        self.assertEqual(call.kwargs["params"], {"page": 2, "query": "team", "perpage": 10})
+
+
+class TestAsyncUserTeamSearch(unittest.IsolatedAsyncioTestCase):
+    async def test_search_users(self):
+        server = PagedServer(total=2050, perpage=100, key="users")
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        users = await grafana.users.search_users(perpage=100, concurrency=4)
+        self.assertEqual([user["id"] for user in users], list(range(2050)))
+        self.assertEqual(sorted(server.pages), list(range(1, 22)))
+
+    async def test_iter_teams(self):
+        server = PagedServer(total=30, perpage=10, key="teams")
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        teams = [team async for team in grafana.teams.iter_teams(perpage=10)]
+        self.assertEqual([team["id"] for team in teams], list(range(30)))
+
+
+class SearchServer:
+    """
+    Respond to `/search` with pages of `total` dashboards, capping `limit` at 5000, like Grafana.
+    """
+
+    def __init__(self, total: int):
+        self.hits = [{"uid": f"uid-{i}", "title": f"Dashboard {i}", "type": "dash-db"} for i in range(total)]
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, params=None, **kwargs):  # noqa: ARG002
+        limit = min(params.get("limit", 1000), 5000)
+        page = params.get("page", 1)
+        with self.lock:
+            self.requests.append((page, limit))
+        return MockResponse(200, json_data=self.hits[(page - 1) * limit : page * limit])
+
+
+class TestSearchDashboards(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+
+    def test_ramp_sizes(self):
+        self.assertEqual(ramp_sizes(5000, 1000), [1250, 2500, 5000])
+        self.assertEqual(ramp_sizes(5000, 500), [625, 1250, 2500, 5000])
+        self.assertEqual(ramp_sizes(5000, None), [5000])
+        self.assertEqual(ramp_sizes(999, 100), [999])
+
+    def test_iter_dashboards(self):
+        server = SearchServer(total=12345)
+        self.grafana.client.s.request = Mock(side_effect=server)
+        hits = list(self.grafana.search.iter_dashboards())
+        self.assertEqual([hit["uid"] for hit in hits], [f"uid-{i}" for i in range(12345)])
+        self.assertEqual(server.requests, [(1, 1250), (2, 1250), (2, 2500), (2, 5000), (3, 5000)])
+
+    def test_iter_dashboards_small(self):
+        server = SearchServer(total=10)
+        self.grafana.client.s.request = Mock(side_effect=server)
+        self.assertEqual(len(list(self.grafana.search.iter_dashboards())), 10)
+        self.assertEqual(server.requests, [(1, 1250)])
+
+    def test_iter_dashboards_concurrency(self):
+        server = SearchServer(total=2500)
+        self.grafana.client.s.request = Mock(side_effect=server)
+        hits = list(self.grafana.search.iter_dashboards(limit=100, initial_limit=None, concurrency=4))
+        self.assertEqual([hit["uid"] for hit in hits], [f"uid-{i}" for i in range(2500)])
+        # Pages are fetched speculatively, at most `concurrency` pages beyond the last one.
+        self.assertLessEqual(len(server.requests), 26 + 4)
+
+    def test_iter_dashboards_limit(self):
+        server = SearchServer(total=7000)
+        self.grafana.client.s.request = Mock(side_effect=server)
+        hits = list(self.grafana.search.iter_dashboards(limit=10000, initial_limit=None))
+        self.assertEqual(len(hits), 7000)
+        self.assertEqual(server.requests, [(1, 5000), (2, 5000)])
+
+    def test_iter_dashboards_deduplicate(self):
+        server = SearchServer(total=250)
+        calls = []
+
+        def request(method, url, **kwargs):
+            # A dashboard is created after the first page, shifting all others back.
+            calls.append(url)
+            if len(calls) == 2:
+                server.hits.insert(0, {"uid": "new", "title": "New", "type": "dash-db"})
+            return server(method, url, **kwargs)
+
+        self.grafana.client.s.request = Mock(side_effect=request)
+        hits = list(self.grafana.search.iter_dashboards(limit=100, initial_limit=None))
+        uids = [hit["uid"] for hit in hits]
+        self.assertEqual(len(uids), len(set(uids)))
+        self.assertEqual(len(uids), 250)
+
+
+class TestAsyncSearchDashboards(unittest.IsolatedAsyncioTestCase):
+    async def test_iter_dashboards(self):
+        server = SearchServer(total=12345)
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        hits = [hit async for hit in grafana.search.iter_dashboards(concurrency=2)]
+        self.assertEqual([hit["uid"] for hit in hits], [f"uid-{i}" for i in range(12345)])
+
+
+class LibraryElementServer:
+    """
+    Respond to `/library-elements` with pages of `total` library panels, and to their connections.
+    """
+
+    def __init__(self, total: int, delay: float = 0):
+        self.total = total
+        self.delay = delay
+        self.pages = []
+        self.connections = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def delayed(self, method, url, params=None, **kwargs):
+        """
+        Respond after `delay` seconds, recording the peak number of requests in flight.
+        """
+        self.enter()
+        try:
+            time.sleep(self.delay)
+            return self(method, url, params=params, **kwargs)
+        finally:
+            self.leave()
+
+    async def adelayed(self, method, url, params=None, **kwargs):
+        self.enter()
+        try:
+            await asyncio.sleep(self.delay)
+            return self(method, url, params=params, **kwargs)
+        finally:
+            self.leave()
+
+    def __call__(self, method, url, params=None, **kwargs):  # noqa: ARG002
+        path = url.replace("http://localhost/api", "")
+        if path.endswith("/connections"):
+            uid = path.split("/")[2]
+            with self.lock:
+                self.connections.append(uid)
+            return MockResponse(200, json_data={"result": [{"kind": 1, "connectionUid": f"dashboard-{uid}"}]})
+        page, perpage = params["page"], params["perPage"]
+        with self.lock:
+            self.pages.append(page)
+        elements = [
+            {"uid": f"element-{i}", "name": f"Panel {i}", "kind": 1}
+            for i in range((page - 1) * perpage, min(page * perpage, self.total))
+        ]
+        result = {"totalCount": self.total, "elements": elements, "page": page, "perPage": perpage}
+        return MockResponse(200, json_data={"result": result})
+
+
+class TestLibraryElements(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+
+    def test_iter_library_elements(self):
+        server = LibraryElementServer(total=250)
+        self.grafana.client.s.request = Mock(side_effect=server)
+        elements = list(self.grafana.libraryelement.iter_library_elements(kind=1, concurrency=2))
+        self.assertEqual([element["uid"] for element in elements], [f"element-{i}" for i in range(250)])
+        self.assertEqual(sorted(server.pages), [1, 2, 3])
+
+    def test_iter_library_elements_lazy(self):
+        server = LibraryElementServer(total=250)
+        self.grafana.client.s.request = Mock(side_effect=server)
+        elements = self.grafana.libraryelement.iter_library_elements(concurrency=0)
+        self.assertEqual(next(elements)["uid"], "element-0")
+        self.assertEqual(server.pages, [1])
+
+    def test_iter_library_elements_connections(self):
+        server = LibraryElementServer(total=30)
+        self.grafana.client.s.request = Mock(side_effect=server)
+        items = list(self.grafana.libraryelement.iter_library_elements(per_page=10, connections=True))
+        self.assertEqual(len(items), 30)
+        for element, connections in items:
+            self.assertEqual(connections["result"][0]["connectionUid"], f"dashboard-{element['uid']}")
+        self.assertEqual(sorted(server.connections), sorted(f"element-{i}" for i in range(30)))
+
+    def test_iter_library_elements_connections_in_flight(self):
+        # Page fetches and connection lookups share the concurrency bound.
+        server = LibraryElementServer(total=100, delay=0.005)
+        self.grafana.client.s.request = Mock(side_effect=server.delayed)
+        items = list(self.grafana.libraryelement.iter_library_elements(per_page=10, concurrency=3, connections=True))
+        self.assertEqual([element["uid"] for element, _ in items], [f"element-{i}" for i in range(100)])
+        self.assertEqual(server.peak, 3)
+
+    def test_list_library_elements_params(self):
+        request = Mock(return_value=MockResponse(200, json_data={"result": {}}))
+        self.grafana.client.s.request = request
+        self.grafana.libraryelement.list_library_elements(search_string="cpu usage", kind=1, per_page=5, page=2)
+        self.assertEqual(
+            request.call_args[1]["params"], {"searchString": "cpu usage", "kind": 1, "perPage": 5, "page": 2}
+        )
+
+
+class TestAsyncLibraryElements(unittest.IsolatedAsyncioTestCase):
+    async def test_iter_library_elements_connections(self):
+        server = LibraryElementServer(total=250)
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        items = [item async for item in grafana.libraryelement.iter_library_elements(connections=True)]
+        self.assertEqual([element["uid"] for element, _ in items], [f"element-{i}" for i in range(250)])
+        self.assertEqual(len(server.connections), 250)
+
+    async def test_iter_library_elements_connections_in_flight(self):
+        server = LibraryElementServer(total=100, delay=0.005)
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server.adelayed)
+        items = [
+            item
+            async for item in grafana.libraryelement.iter_library_elements(per_page=10, concurrency=3, connections=True)
+        ]
+        self.assertEqual([element["uid"] for element, _ in items], [f"element-{i}" for i in range(100)])
+        self.assertEqual(server.peak, 3)
@@ -0,0 +1,309 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, GrafanaApi
+from grafana_client.client import request_timeout
+from grafana_client.model import DatasourceIdentifier
+from grafana_client.query import MatrixMerger, QueryBatch, chunk_tasks, parse_duration, split_time_range
+from test.elements.test_datasource_fixtures import (
+    INFLUXDB1_DATASOURCE,
+    LOKI_DATASOURCE,
+    POSTGRES_DATASOURCE,
+    PROMETHEUS_DATASOURCE,
+)
+from test.test_grafana_client import MockResponse
+
+SETTINGS = {"buildInfo": {"version": "11.0.0"}}
+
+
+def request(method, url, json=None, **kwargs):  # noqa: ARG001
+    if url.endswith("/frontend/settings"):
+        return MockResponse(200, json_data=SETTINGS)
+    if url.endswith("/ds/query"):
+        results = {}
+        for query in json["queries"]:
+            if query["refId"] == "broken":
+                results["broken"] = {"error": "parse error", "status": 400}
+            else:
+                results[query["refId"]] = {"frames": [], "status": 200}
+        status_code = 400 if "broken" in results else 200
+        return MockResponse(status_code, json_data={"message": "Query failed", "results": results})
+    if "/datasources/uid/" in url:
+        return MockResponse(200, json_data=PROMETHEUS_DATASOURCE)
+    return MockResponse(200, json_data={"results": [{"series": []}]})
+
+
+class TestQueryBatch(unittest.TestCase):
+    def test_build(self):
+        batch = QueryBatch(time_from=1000, time_to=1300)
+        self.assertEqual(batch.add(PROMETHEUS_DATASOURCE, "up"), "q0")
+        self.assertEqual(batch.add(POSTGRES_DATASOURCE, "SELECT 1", attrs={"format": "table"}, ref_id="sql"), "sql")
+        self.assertEqual(batch.add(INFLUXDB1_DATASOURCE, "SHOW DATABASES"), "q2")
+        payloads, individual = batch.build()
+
+        self.assertEqual(len(payloads), 1)
+        self.assertEqual(payloads[0]["from"], "1000000")
+        self.assertEqual(payloads[0]["to"], "1300000")
+        queries = payloads[0]["queries"]
+        self.assertEqual([query["refId"] for query in queries], ["q0", "sql"])
+        self.assertEqual(queries[0]["expr"], "up")
+        self.assertEqual(queries[0]["datasource"]["uid"], PROMETHEUS_DATASOURCE["uid"])
+        self.assertEqual(queries[1]["rawSql"], "SELECT 1")
+        self.assertEqual(queries[1]["format"], "table")
+        self.assertEqual([query.ref_id for query in individual], ["q2"])
+
+    def test_build_legacy(self):
+        batch = QueryBatch()
+        batch.add(PROMETHEUS_DATASOURCE, "up")
+        batch.add(LOKI_DATASOURCE, '{job="foo"}')
+        payloads, individual = batch.build(legacy=True)
+        self.assertEqual(payloads, [])
+        self.assertEqual(len(individual), 2)
+
+    def test_build_time_ranges(self):
+        batch = QueryBatch(time_from=1000, time_to=1300)
+        batch.add(PROMETHEUS_DATASOURCE, "up")
+        batch.add(PROMETHEUS_DATASOURCE, "up", attrs={"instant": True})
+        payloads, _ = batch.build()
+        self.assertEqual(
+            [(payload["from"], payload["to"]) for payload in payloads],
+            [("1000000", "1300000"), ("1300000", "1300000")],
+        )
+
+    def test_chunk_by_count(self):
+        batch = QueryBatch(max_queries=2)
+        for _ in range(5):
+            batch.add(PROMETHEUS_DATASOURCE, "up")
+        payloads, _ = batch.build()
+        self.assertEqual([len(payload["queries"]) for payload in payloads], [2, 2, 1])
+
+    def test_chunk_by_size(self):
+        batch = QueryBatch(max_bytes=1000)
+        for _ in range(4):
+            batch.add(PROMETHEUS_DATASOURCE, "x" * 400)
+        payloads, _ = batch.build()
+        self.assertEqual([len(payload["queries"]) for payload in payloads], [1, 1, 1, 1])
+        for payload in payloads:
+            self.assertLess(len(json.dumps(payload["queries"])), 1000)
+
+    def test_invalid(self):
+        batch = QueryBatch()
+        batch.add(PROMETHEUS_DATASOURCE, "up", ref_id="A")
+        self.assertRaises(ValueError, lambda: batch.add(PROMETHEUS_DATASOURCE, "up", ref_id="A"))
+        self.assertRaises(ValueError, lambda: batch.add(PROMETHEUS_DATASOURCE))
+        self.assertRaises(ValueError, lambda: QueryBatch(max_queries=0))
+        batch.add(DatasourceIdentifier(uid="foo"), "up")
+        self.assertRaises(TypeError, lambda: batch.build())
+
+    def test_split(self):
+        payload = {"queries": [{"refId": "A"}, {"refId": "B"}]}
+        self.assertEqual(
+            QueryBatch.split(payload, {"results": {"A": {"frames": []}}}),
+            {"A": {"frames": []}, "B": None},
+        )
+
+
+class TestSmartqueryMany(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(side_effect=request)
+
+    @property
+    def urls(self):
+        return [call.args[1] for call in self.grafana.client.s.request.call_args_list]
+
+    def test_smartquery_many(self):
+        queries = [(PROMETHEUS_DATASOURCE, f"up{{job='{number}'}}") for number in range(100)]
+        queries.append((INFLUXDB1_DATASOURCE, "SHOW DATABASES"))
+        results = self.grafana.datasource.smartquery_many(queries)
+        self.assertEqual(list(results), [f"q{number}" for number in range(101)])
+        self.assertEqual(results["q0"], {"frames": [], "status": 200})
+        self.assertEqual(results["q100"], {"results": [{"series": []}]})
+        self.assertEqual(self.urls.count("http://localhost/api/ds/query"), 2)
+        self.assertEqual(len(self.urls), 4)
+
+    def test_smartquery_many_errors(self):
+        batch = QueryBatch()
+        batch.add(DatasourceIdentifier(uid="h8KkCLt7z"), "up", ref_id="ok")
+        batch.add(DatasourceIdentifier(uid="h8KkCLt7z"), "up{", ref_id="broken")
+        results = self.grafana.datasource.smartquery_many(batch)
+        self.assertEqual(results["ok"]["status"], 200)
+        self.assertEqual(results["broken"]["error"], "parse error")
+        # The data source is resolved once.
+        self.assertEqual(self.urls.count("http://localhost/api/datasources/uid/h8KkCLt7z"), 1)
+
+
+class TestAsyncSmartqueryMany(unittest.IsolatedAsyncioTestCase):
+    async def test_smartquery_many(self):
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=request)
+        results = await grafana.datasource.smartquery_many([(PROMETHEUS_DATASOURCE, "up"), (LOKI_DATASOURCE, "{}")])
+        self.assertEqual(list(results), ["q0", "q1"])
+        self.assertEqual(grafana.client.s.request.call_count, 2)
+
+
+class TestTimeRangeSharding(unittest.TestCase):
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration(15), 15.0)
+        self.assertEqual(parse_duration("15"), 15.0)
+        self.assertEqual(parse_duration("1h30m"), 5400.0)
+        self.assertEqual(parse_duration("500ms"), 0.5)
+        self.assertEqual(parse_duration("1d"), 86400.0)
+        self.assertRaises(ValueError, lambda: parse_duration("1x"))
+        self.assertRaises(ValueError, lambda: parse_duration("h"))
+
+    def test_split_time_range(self):
+        self.assertEqual(split_time_range(0, 100, 10, 40), [(0, 30), (40, 70), (80, 100)])
+        self.assertEqual(split_time_range(0, 30, 10, 40), [(0, 30)])
+        self.assertEqual(split_time_range(0, 0, 10, 40), [(0, 0)])
+        # Shards are at least one step long.
+        self.assertEqual(split_time_range(0, 20, 10, 5), [(0, 0), (10, 10), (20, 20)])
+        self.assertRaises(ValueError, lambda: split_time_range(0, 10, 0, 10))
+        self.assertRaises(ValueError, lambda: split_time_range(10, 0, 1, 10))
+
+    def test_split_time_range_steps(self):
+        # Shards evaluate the same timestamps as the whole range.
+        start, end, step = 1000, 1000 + 86400 * 30, 60
+        timestamps = []
+        for shard_start, shard_end in split_time_range(start, end, step, 86400):
+            timestamps.extend(range(int(shard_start), int(shard_end) + 1, step))
+        self.assertEqual(timestamps, list(range(start, end + 1, step)))
+
+    def test_merge(self):
+        merger = MatrixMerger()
+        merger.add(matrix({"job": "b"}, [[20, "2"], [30, "3"]]))
+        merger.add(matrix({"job": "a"}, [[0, "0"], [10, "1"]], {"job": "b"}, [[0, "0"], [10, "1"], [20, "2"]]))
+        self.assertEqual(
+            merger.result(),
+            {
+                "status": "success",
+                "data": {
+                    "resultType": "matrix",
+                    "result": [
+                        {"metric": {"job": "b"}, "values": [[0, "0"], [10, "1"], [20, "2"], [30, "3"]]},
+                        {"metric": {"job": "a"}, "values": [[0, "0"], [10, "1"]]},
+                    ],
+                },
+            },
+        )
+
+    def test_merge_invalid(self):
+        response = {"status": "success", "data": {"resultType": "vector", "result": []}}
+        self.assertRaises(ValueError, lambda: MatrixMerger().add(response))
+
+
+def matrix(*items):
+    result = [{"metric": metric, "values": values} for metric, values in zip(items[::2], items[1::2])]
+    return {"status": "success", "data": {"resultType": "matrix", "result": result}}
+
+
+def query_range_request(method, url, data=None, **kwargs):  # noqa: ARG001
+    start, end = int(data["start"]), int(data["end"])
+    values = [[timestamp, str(timestamp)] for timestamp in range(start, end + 1, int(data["step"]))]
+    return MockResponse(200, json_data=matrix({"__name__": "up"}, values))
+
+
+class TestShardedQueryRange(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(side_effect=query_range_request)
+
+    def test_query_range_sharded(self):
+        response = self.grafana.datasource.query_range(
+            datasource_uid="h8KkCLt7z", query="up", start=0, end=3600, step="1m", shard_size="10m", concurrency=3
+        )
+        values = response["data"]["result"][0]["values"]
+        self.assertEqual([value[0] for value in values], list(range(0, 3601, 60)))
+        self.assertEqual(self.grafana.client.s.request.call_count, 7)
+
+    def test_query_range_sharded_request_timeout(self):
+        # The timeout of the caller applies to shards queried on worker threads, too.
+        with request_timeout(1.5):
+            self.grafana.datasource.query_range(
+                datasource_uid="h8KkCLt7z", query="up", start=0, end=3600, step=60, shard_size="10m", concurrency=3
+            )
+        timeouts = [call.kwargs["timeout"] for call in self.grafana.client.s.request.call_args_list]
+        self.assertEqual(timeouts, [1.5] * 7)
+
+    def test_iter_query_range(self):
+        shards = list(
+            self.grafana.datasource.iter_query_range(
+                datasource_id=42, query="up", start=0, end=3600, step=60, shard_size=1800
+            )
+        )
+        self.assertEqual(sorted((start, end) for start, end, _ in shards), [(0, 1740), (1800, 3540), (3600, 3600)])
+        url = self.grafana.client.s.request.call_args.args[1]
+        self.assertEqual(url, "http://localhost/api/datasources/proxy/42/api/v1/query_range")
+
+
+class TestAsyncShardedQueryRange(unittest.IsolatedAsyncioTestCase):
+    async def test_query_range_sharded(self):
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=query_range_request)
+        response = await grafana.datasource.query_range(
+            datasource_uid="h8KkCLt7z", query="up", start=0, end=3600, step=60, shard_size=600
+        )
+        values = response["data"]["result"][0]["values"]
+        self.assertEqual(len(values), 61)
+        self.assertEqual(grafana.client.s.request.call_count, 7)
+
+
+def series_request(method, url, data=None, params=None, **kwargs):  # noqa: ARG001
+    match = (data or params)["match[]"]
+    if url.endswith("/series"):
+        series = [{"__name__": name, "job": "app"} for name in match] + [{"__name__": "up", "job": "app"}]
+        return MockResponse(200, json_data={"status": "success", "data": series})
+    if url.endswith("/labels"):
+        return MockResponse(200, json_data={"status": "success", "data": ["job", "__name__"], "warnings": ["w"]})
+    return MockResponse(200, json_data={"status": "success", "data": [f"{name}-value" for name in match] + ["app"]})
+
+
+class TestBatchedSeries(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(side_effect=series_request)
+        self.matchers = [f"metric_{index}" for index in range(10)]
+
+    def test_chunk_tasks(self):
+        tasks = chunk_tasks(print, ["a", "b", "a", "c"], 2, start=1)
+        self.assertEqual([task[2] for task in tasks], [{"start": 1, "match": ["a", "b"]}, {"start": 1, "match": ["c"]}])
+        self.assertEqual(chunk_tasks(print, "up", 2)[0][2], {"match": "up"})
+        self.assertRaises(ValueError, lambda: chunk_tasks(print, [], 0))
+
+    def test_series(self):
+        response = self.grafana.datasource.series(
+            datasource_uid="h8KkCLt7z", match=self.matchers, start=0, end=60, chunk_size=3, concurrency=2
+        )
+        self.assertEqual(self.grafana.client.s.request.call_count, 4)
+        self.assertEqual(len(response["data"]), 11)
+        self.assertEqual(sorted(item["__name__"] for item in response["data"]), sorted([*self.matchers, "up"]))
+        url = self.grafana.client.s.request.call_args.args[1]
+        self.assertEqual(url, "http://localhost/api/datasources/proxy/uid/h8KkCLt7z/api/v1/series")
+
+    def test_label_names(self):
+        response = self.grafana.datasource.label_names(datasource_id=42, match=self.matchers, chunk_size=5)
+        self.assertEqual(response, {"status": "success", "data": ["__name__", "job"], "warnings": ["w"]})
+        self.assertEqual(self.grafana.client.s.request.call_count, 2)
+
+    def test_label_values(self):
+        response = self.grafana.datasource.label_values("job", datasource_id=42, match=self.matchers, chunk_size=4)
+        self.assertEqual(response["data"], sorted([f"{name}-value" for name in self.matchers] + ["app"]))
+        self.assertEqual(self.grafana.client.s.request.call_count, 3)
+        call = self.grafana.client.s.request.call_args
+        self.assertEqual(call.args[:2], ("get", "http://localhost/api/datasources/proxy/42/api/v1/label/job/values"))
+        self.assertEqual(call.kwargs["params"]["match[]"], ["metric_8", "metric_9"])
+
+    def test_unchunked(self):
+        self.grafana.datasource.label_values("job", datasource_id=42, match=["up"])
+        self.assertEqual(self.grafana.client.s.request.call_count, 1)
+        self.assertRaises(ValueError, lambda: self.grafana.datasource.label_names(match=["up"]))
+
+
+class TestAsyncBatchedSeries(unittest.IsolatedAsyncioTestCase):
+    async def test_series(self):
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=series_request)
+        response = await grafana.datasource.series(datasource_id=42, match=["a", "b", "c"], chunk_size=1)
+        self.assertEqual(grafana.client.s.request.call_count, 3)
+        self.assertEqual(len(response["data"]), 4)
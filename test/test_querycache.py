@@ -0,0 +1,207 @@
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, GrafanaApi, QueryResultCache
+from grafana_client.querycache import align, concat_frames, slice_frame
+from test.elements.test_datasource_fixtures import PROMETHEUS_DATASOURCE
+from test.test_grafana_client import MockResponse
+
+SETTINGS = {"buildInfo": {"version": "11.0.0"}}
+STEP = 60_000
+HOUR = 3600
+
+
+class WallClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_frame(instance, times, values, nanos=None, entities=None):
+    data = {"values": [times, values]}
+    if nanos is not None:
+        data["nanos"] = nanos
+    if entities is not None:
+        data["entities"] = entities
+    return {
+        "schema": {
+            "refId": "test",
+            "meta": {"executedQueryString": "up"},
+            "fields": [
+                {"name": "Time", "type": "time", "typeInfo": {"frame": "time.Time"}},
+                {"name": "Value", "type": "number", "labels": {"instance": instance}},
+            ],
+        },
+        "data": data,
+    }
+
+
+class QueryServer:
+    """
+    Respond to `/ds/query` requests with one point per step, valued by the request number.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, method, url, json=None, **kwargs):  # noqa: ARG002
+        if url.endswith("/frontend/settings"):
+            return MockResponse(200, json_data=SETTINGS)
+        if not json["from"].isdigit():
+            self.queries.append((json["from"], json["to"]))
+            return MockResponse(200, json_data={"results": {"test": {"status": 200, "frames": []}}})
+        self.queries.append((int(json["from"]), int(json["to"])))
+        step = json["queries"][0]["intervalMs"] or STEP
+        start = int(json["from"])
+        start += -start % step
+        times = list(range(start, int(json["to"]) + 1, step))
+        frame = make_frame("a", times, [len(self.queries)] * len(times))
+        return MockResponse(200, json_data={"results": {"test": {"status": 200, "frames": [frame]}}})
+
+
+class TestQueryResultCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = WallClock()
+        self.server = QueryServer()
+        self.cache = QueryResultCache(mutable=300, clock=self.clock)
+        self.grafana = GrafanaApi(host="localhost")
+        self.grafana.client.s.request = Mock(side_effect=self.server)
+        self.grafana.datasource.query_cache = self.cache
+
+    def query(self, hours=24, **attrs):
+        now = int(self.clock.now)
+        attrs = dict(
+            {"time_from": now - hours * HOUR, "time_to": now, "intervalMs": STEP, "maxDataPoints": 1441}, **attrs
+        )
+        response = self.grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "up", attrs=attrs)
+        return response["results"]["test"]["frames"]
+
+    def test_sliding_window(self):
+        frames = self.query()
+        now = int(self.clock.now * 1000)
+        self.assertEqual(self.server.queries, [(align(now - 24 * HOUR * 1000, STEP), align(now, STEP))])
+        self.assertEqual(len(frames[0]["data"]["values"][0]), 24 * 60 + 1)
+        self.assertEqual(self.cache.stats.asdict(), {"hits": 0, "partial_hits": 0, "misses": 1, "evictions": 0})
+
+        # One minute later, only the missing tail, and the mutable window are fetched.
+        self.clock.now += 60
+        frames = self.query()
+        now = int(self.clock.now * 1000)
+        self.assertEqual(self.server.queries[1], (align(now - 60_000 - 300_000, STEP), align(now, STEP)))
+        times, values = frames[0]["data"]["values"]
+        self.assertEqual(times, list(range(align(now - 24 * HOUR * 1000, STEP), align(now, STEP) + 1, STEP)))
+        self.assertEqual(values[0], 1)
+        self.assertEqual(values[-7:], [2] * 7)
+        self.assertEqual(frames[0]["schema"]["meta"], {"executedQueryString": "up"})
+        self.assertEqual(self.cache.stats.partial_hits, 1)
+        self.assertEqual(self.cache.stats.hit_ratio, 0.5)
+
+    def test_stable_range(self):
+        # Ranges entirely before the mutable window are answered from the cache.
+        self.query(time_to=int(self.clock.now) - 2 * HOUR)
+        frames = self.query(time_to=int(self.clock.now) - 2 * HOUR)
+        self.assertEqual(len(self.server.queries), 1)
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertEqual(len(frames[0]["data"]["values"][0]), 22 * 60 + 1)
+
+        # Subranges, too.
+        frames = self.query(hours=12, time_to=int(self.clock.now) - 6 * HOUR)
+        self.assertEqual(len(self.server.queries), 1)
+        self.assertEqual(len(frames[0]["data"]["values"][0]), 6 * 60 + 1)
+
+    def test_miss(self):
+        self.query(hours=1)
+        # Starting before the cached range.
+        self.query(hours=2)
+        # Different query model, and different step.
+        self.query(hours=2, legendFormat="{{instance}}")
+        self.query(hours=2, intervalMs=2 * STEP)
+        self.assertEqual(self.cache.stats.misses, 4)
+        self.assertEqual(len(self.cache.entries), 3)
+
+    def test_not_cacheable(self):
+        self.query(instant=True)
+        self.query(intervalMs=0)
+        self.assertEqual(len(self.server.queries), 2)
+        self.assertEqual(self.cache.stats.misses, 0)
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def test_relative_range(self):
+        request = {
+            "method": "POST",
+            "data": {
+                "queries": [{"refId": "test", "expr": "up", "intervalMs": STEP, "maxDataPoints": 1441}],
+                "from": "now-24h",
+                "to": "now",
+            },
+        }
+        for _ in range(2):
+            response = self.grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "up", request=request)
+            self.assertEqual(response["results"]["test"]["status"], 200)
+        self.assertEqual(len(self.server.queries), 2)
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def test_step_by_max_data_points(self):
+        # Grafana computes a coarser step than `intervalMs` for ranges spanning more than `maxDataPoints` steps.
+        self.query(hours=24, maxDataPoints=100)
+        self.query(hours=24, maxDataPoints=None)
+        self.query(hours=24, maxDataPoints=1440)
+        self.assertEqual(len(self.cache.entries), 0)
+        self.query(hours=1, maxDataPoints=None)
+        self.assertEqual(len(self.cache.entries), 1)
+
+    def test_error(self):
+        self.grafana.client.s.request = Mock(
+            return_value=MockResponse(200, json_data={"results": {"test": {"status": 500, "error": "failed"}}})
+        )
+        self.grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "up", attrs={"intervalMs": STEP})
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def test_eviction(self):
+        self.cache.max_bytes = 2000
+        self.query(hours=1)
+        self.query(hours=1, legendFormat="a")
+        self.assertEqual(len(self.cache.entries), 1)
+        self.assertEqual(self.cache.stats.evictions, 1)
+        self.assertLessEqual(self.cache.size, self.cache.max_bytes)
+        self.cache.clear()
+        self.assertEqual(self.cache.size, 0)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: QueryResultCache(mutable=-1))
+
+
+class TestFrameSlicing(unittest.TestCase):
+    def test_slice(self):
+        frame = make_frame("a", [0, 10, 20, 30], [None, 1, None, 3], nanos=[[1, 2, 3, 4], None])
+        frame["data"]["entities"] = [None, {"NaN": [0], "Inf": [2]}]
+        sliced = slice_frame(frame, 10, 30)
+        self.assertEqual(sliced["data"]["values"], [[10, 20], [1, None]])
+        self.assertEqual(sliced["data"]["nanos"], [[2, 3], None])
+        self.assertEqual(sliced["data"]["entities"], [None, {"NaN": [], "Inf": [1]}])
+        self.assertIsNot(sliced["schema"], frame["schema"])
+
+    def test_concat(self):
+        head = make_frame("a", [0, 10], [None, 1], entities=[None, {"NaN": [0]}])
+        tail = make_frame("a", [20, 30], [None, 3], nanos=[[5, 6], None], entities=[None, {"Inf": [0]}])
+        frame = concat_frames(head, tail)
+        self.assertEqual(frame["data"]["values"], [[0, 10, 20, 30], [None, 1, None, 3]])
+        self.assertEqual(frame["data"]["nanos"], [[0, 0, 5, 6], None])
+        self.assertEqual(frame["data"]["entities"], [None, {"NaN": [0], "Inf": [2]}])
+
+
+class TestAsyncQueryResultCache(unittest.IsolatedAsyncioTestCase):
+    async def test_sliding_window(self):
+        clock = WallClock()
+        server = QueryServer()
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=server)
+        grafana.datasource.query_cache = QueryResultCache(clock=clock)
+        attrs = {"time_from": int(clock.now) - HOUR, "time_to": int(clock.now), "intervalMs": STEP}
+        await grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "up", attrs=attrs)
+        response = await grafana.datasource.smartquery(PROMETHEUS_DATASOURCE, "up", attrs=attrs)
+        self.assertEqual(len(server.queries), 2)
+        self.assertEqual(len(response["results"]["test"]["frames"][0]["data"]["values"][0]), 61)
+        self.assertEqual(grafana.datasource.query_cache.stats.partial_hits, 1)
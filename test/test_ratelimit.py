@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from grafana_client import GrafanaApi
+from grafana_client.client import AsyncGrafanaClient, GrafanaClient
+from grafana_client.ratelimit import RateLimit, RateLimiter, TokenBucket
+from test.test_grafana_client import MockResponse
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_throttle(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertEqual(bucket.reserve(), 0.5)
+        self.assertEqual(bucket.reserve(), 1.0)
+
+    def test_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=1, clock=clock)
+        self.assertEqual(bucket.reserve(), 0.0)
+        clock.now += 0.1
+        self.assertEqual(bucket.reserve(), 0.0)
+        clock.now += 5
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1)
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_matches(self):
+        self.assertTrue(RateLimit(rate=1).matches("get", "/search"))
+        self.assertTrue(RateLimit(rate=1, path_prefix="/ds/query").matches("post", "/ds/query"))
+        self.assertFalse(RateLimit(rate=1, path_prefix="/ds/query").matches("get", "/search"))
+        self.assertTrue(RateLimit(rate=1, methods=["POST"]).matches("post", "/ds/query"))
+        self.assertFalse(RateLimit(rate=1, methods=["POST"]).matches("get", "/ds/query"))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: RateLimit(rate=0))
+        self.assertRaises(ValueError, lambda: RateLimit(max_in_flight=0))
+
+    def test_from_value(self):
+        self.assertIsNone(RateLimiter.from_value(None))
+        limiter = RateLimiter.from_value(RateLimit(rate=1))
+        self.assertEqual(len(limiter.rules), 1)
+        self.assertIs(RateLimiter.from_value(limiter), limiter)
+        self.assertEqual(len(RateLimiter.from_value([RateLimit(rate=1), RateLimit(rate=2)]).rules), 2)
+
+
+class TestRateLimiter(unittest.TestCase):
+    @patch("grafana_client.ratelimit.time.sleep")
+    def test_limit_sleeps(self, sleep):
+        limiter = RateLimiter([RateLimit(rate=1, burst=1, path_prefix="/ds/query")])
+        with limiter.limit("post", "/ds/query"):
+            pass
+        with limiter.limit("get", "/search"):
+            pass
+        sleep.assert_not_called()
+        with limiter.limit("post", "/ds/query"):
+            pass
+        sleep.assert_called_once()
+        self.assertEqual(limiter.stats.requests, 3)
+        self.assertEqual(limiter.stats.throttled, 1)
+
+    def test_max_in_flight_threads(self):
+        limiter = RateLimiter([RateLimit(max_in_flight=2)])
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+
+        def work():
+            with limiter.limit("get", "/search"):
+                with lock:
+                    state["current"] += 1
+                    state["peak"] = max(state["peak"], state["current"])
+                time.sleep(0.01)
+                with lock:
+                    state["current"] -= 1
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(state["peak"], 2)
+
+    def test_max_in_flight_async(self):
+        limiter = RateLimiter([RateLimit(max_in_flight=3)])
+        state = {"current": 0, "peak": 0}
+
+        async def work():
+            async with limiter.limit_async("get", "/search"):
+                state["current"] += 1
+                state["peak"] = max(state["peak"], state["current"])
+                await asyncio.sleep(0.01)
+                state["current"] -= 1
+
+        async def main():
+            await asyncio.gather(*[work() for _ in range(10)])
+
+        asyncio.run(main())
+        asyncio.run(main())
+        self.assertEqual(state["peak"], 3)
+        self.assertEqual(limiter.stats.requests, 20)
+
+
+class TestClientRateLimit(unittest.TestCase):
+    def test_api_rate_limit(self):
+        grafana = GrafanaApi.from_url(rate_limit=RateLimit(rate=10))
+        self.assertIsInstance(grafana.client.rate_limiter, RateLimiter)
+
+    @patch("grafana_client.ratelimit.time.sleep")
+    def test_client_enforces_limit(self, sleep):
+        client = GrafanaClient(None, host="localhost", rate_limit=RateLimit(rate=1, burst=1))
+        client.s.request = Mock(name="request", return_value=MockResponse(status_code=200, json_data={}))
+        client.GET("/search")
+        client.GET("/search")
+        self.assertEqual(client.s.request.call_count, 2)
+        sleep.assert_called_once()
+        self.assertEqual(client.rate_limiter.stats.throttled, 1)
+
+    def test_async_client_enforces_limit(self):
+        client = AsyncGrafanaClient(None, host="localhost", rate_limit=RateLimit(max_in_flight=1))
+
+        async def request(*args, **kwargs):  # noqa: ARG001
+            return MockResponse(status_code=200, json_data={})
+
+        client.s.request = request
+
+        async def main():
+            return await asyncio.gather(client.GET("/search"), client.GET("/search"))
+
+        self.assertEqual(asyncio.run(main()), [{}, {}])
+        self.assertEqual(client.rate_limiter.stats.requests, 2)
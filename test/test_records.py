@@ -0,0 +1,133 @@
+import sys
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+from grafana_client import AsyncGrafanaApi, GrafanaApi
+from grafana_client.records import DatasourceRecord, Interner, SearchHit, TeamRecord, UserRecord, decode_records
+from test.test_grafana_client import MockResponse
+from test.test_pagination import PagedServer, SearchServer
+
+HITS = [
+    {
+        "id": 1,
+        "uid": "cIBgcSjkk",
+        "title": "Production Overview",
+        "uri": "db/production-overview",
+        "url": "/d/cIBgcSjkk/production-overview",
+        "type": "dash-db",
+        "tags": ["production", "team-a"],
+        "isStarred": False,
+        "folderId": 2,
+        "folderUid": "folder",
+        "folderTitle": "Folder",
+        "sortMeta": 0,
+    },
+    {
+        "id": 3,
+        "uid": "vz7hNGl4k",
+        "title": "Staging Overview",
+        "type": "dash-db",
+        "tags": ["production", "team-a"],
+        "folderUid": "folder",
+        "folderTitle": "Folder",
+    },
+]
+
+
+class TestRecords(unittest.TestCase):
+    def test_search_hit(self):
+        hits = decode_records(SearchHit, [dict(hit) for hit in HITS])
+        self.assertEqual(hits[0].uid, "cIBgcSjkk")
+        self.assertEqual(hits[0].tags, ("production", "team-a"))
+        self.assertEqual(hits[0].extra, {"sortMeta": 0})
+        self.assertIsNone(hits[1].url)
+        self.assertIsNone(hits[1].extra)
+        self.assertFalse(hasattr(hits[0], "__dict__"))
+
+    def test_interned(self):
+        # Decode separate copies, like a JSON decoder returns them.
+        hits = decode_records(SearchHit, [dict(hit, folderTitle="".join(["Fol", "der"])) for hit in HITS])
+        self.assertIs(hits[0].folderTitle, hits[1].folderTitle)
+        self.assertIs(hits[0].tags, hits[1].tags)
+        self.assertIs(hits[0].type, hits[1].type)
+
+    def test_interner(self):
+        interner = Interner()
+        self.assertIs(interner("".join(["a", "b"])), interner("".join(["a", "b"])))
+        self.assertIs(interner(["x", "y"]), interner(["x", "y"]))
+        self.assertEqual(interner([{"a": 1}]), [{"a": 1}])
+        self.assertEqual(interner(42), 42)
+
+    def test_asdict(self):
+        hit = SearchHit.from_dict(HITS[0])
+        data = hit.asdict()
+        self.assertEqual(data["tags"], ["production", "team-a"])
+        self.assertEqual(data["sortMeta"], 0)
+        self.assertEqual({key: value for key, value in data.items() if value is not None}, HITS[0])
+
+    def test_size(self):
+        hit = SearchHit.from_dict(HITS[0])
+        self.assertLess(sys.getsizeof(hit), sys.getsizeof(dict(HITS[0])))
+
+    def test_record_types(self):
+        user = UserRecord.from_dict({"id": 1, "login": "admin", "authLabels": ["OAuth"], "isGrafanaAdmin": True})
+        self.assertEqual(user.authLabels, ("OAuth",))
+        self.assertEqual(user.extra, {"isGrafanaAdmin": True})
+        team = TeamRecord.from_dict({"id": 1, "name": "ops", "memberCount": 3})
+        self.assertEqual(team.memberCount, 3)
+        datasource = DatasourceRecord.from_dict({"uid": "abc", "type": "prometheus", "jsonData": {"a": 1}})
+        self.assertEqual(datasource.jsonData, {"a": 1})
+
+
+class TestRecordsApi(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+
+    def test_search_dashboards(self):
+        self.grafana.client.s.request = Mock(return_value=MockResponse(200, json_data=HITS))
+        hits = self.grafana.search.search_dashboards(records=True)
+        self.assertIsInstance(hits[0], SearchHit)
+        self.assertEqual(hits[1].title, "Staging Overview")
+
+    def test_search_dashboards_stream(self):
+        with self.assertRaises(ValueError):
+            self.grafana.search.search_dashboards(records=True, stream=True)
+
+    def test_iter_dashboards(self):
+        self.grafana.client.s.request = Mock(side_effect=SearchServer(total=3000))
+        hits = list(self.grafana.search.iter_dashboards(records=True))
+        self.assertEqual(len(hits), 3000)
+        self.assertIsInstance(hits[-1], SearchHit)
+        self.assertIs(hits[0].type, hits[-1].type)
+
+    def test_search_users(self):
+        self.grafana.client.s.request = Mock(side_effect=PagedServer(total=25, perpage=10, key="users"))
+        users = self.grafana.users.search_users(records=True, perpage=10)
+        self.assertEqual([user.id for user in users], list(range(25)))
+        self.assertIsInstance(users[0], UserRecord)
+
+    def test_search_teams(self):
+        self.grafana.client.s.request = Mock(side_effect=PagedServer(total=5, key="teams"))
+        teams = self.grafana.teams.search_teams(page=1, records=True)
+        self.assertIsInstance(teams[0], TeamRecord)
+
+    def test_list_datasources(self):
+        datasources = [{"id": 1, "uid": "abc", "type": "prometheus"}, {"id": 2, "uid": "def", "type": "prometheus"}]
+        self.grafana.client.s.request = Mock(return_value=MockResponse(200, json_data=datasources))
+        records = self.grafana.datasource.list_datasources(records=True)
+        self.assertEqual([record.uid for record in records], ["abc", "def"])
+        self.assertIsInstance(records[0], DatasourceRecord)
+
+
+class TestAsyncRecordsApi(unittest.IsolatedAsyncioTestCase):
+    async def test_search_dashboards(self):
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(return_value=MockResponse(200, json_data=HITS))
+        hits = await grafana.search.search_dashboards(records=True)
+        self.assertIsInstance(hits[0], SearchHit)
+
+    async def test_search_users(self):
+        grafana = AsyncGrafanaApi(host="localhost")
+        grafana.client.s.request = AsyncMock(side_effect=PagedServer(total=25, perpage=10, key="users"))
+        users = await grafana.users.search_users(records=True, perpage=10)
+        self.assertIsInstance(users[0], UserRecord)
@@ -0,0 +1,165 @@
+import threading
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+import niquests.exceptions
+
+from grafana_client.client import AsyncGrafanaClient, GrafanaClient, GrafanaServerError, GrafanaTimeoutError
+from grafana_client.retry import RetryPolicy
+from test.test_grafana_client import MockResponse
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_from_value(self):
+        self.assertIsNone(RetryPolicy.from_value(None))
+        self.assertIsNone(RetryPolicy.from_value(False))
+        self.assertEqual(RetryPolicy.from_value(True), RetryPolicy())
+        self.assertEqual(RetryPolicy.from_value(7).max_attempts, 7)
+        self.assertRaises(TypeError, lambda: RetryPolicy.from_value("foo"))
+
+    def test_can_retry(self):
+        policy = RetryPolicy(max_attempts=3)
+        self.assertTrue(policy.can_retry("GET", 1))
+        self.assertTrue(policy.can_retry("get", 2))
+        self.assertFalse(policy.can_retry("get", 3))
+        self.assertFalse(policy.can_retry("post", 1))
+        self.assertFalse(policy.can_retry("patch", 1))
+
+    def test_compute_delay_exponential(self):
+        policy = RetryPolicy(backoff_base=0.5, backoff_cap=3.0, jitter=False)
+        self.assertEqual(
+            [policy.compute_delay(retry) for retry in range(5)],
+            [0.5, 1.0, 2.0, 3.0, 3.0],
+        )
+
+    def test_compute_delay_jitter(self):
+        policy = RetryPolicy(backoff_base=1.0, backoff_cap=4.0, jitter=True)
+        for retry in range(5):
+            self.assertTrue(0 <= policy.compute_delay(retry) <= min(4.0, 2**retry))
+
+    def test_compute_delay_retry_after(self):
+        policy = RetryPolicy(backoff_cap=10.0)
+        self.assertEqual(policy.compute_delay(0, retry_after=2.5), 2.5)
+        self.assertEqual(policy.compute_delay(0, retry_after=120), 10.0)
+        self.assertEqual(policy.compute_delay(0, retry_after=-1), 0.0)
+
+    def test_parse_retry_after(self):
+        self.assertIsNone(RetryPolicy.parse_retry_after(None))
+        self.assertIsNone(RetryPolicy.parse_retry_after("garbage"))
+        self.assertEqual(RetryPolicy.parse_retry_after("3"), 3.0)
+        self.assertLess(RetryPolicy.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+
+
+@patch("grafana_client.client.time.sleep")
+class TestGrafanaClientRetry(unittest.TestCase):
+    def setUp(self):
+        self.client = GrafanaClient(None, host="localhost", retry=RetryPolicy(max_attempts=3, jitter=False))
+        self.client.s.request = Mock(name="request")
+
+    def test_retry_recovered(self, sleep):
+        self.client.s.request.side_effect = [
+            MockResponse(status_code=503, json_data={"message": "Service Unavailable"}),
+            MockResponse(status_code=429, headers={"Retry-After": "2"}, json_data={"message": "Too Many Requests"}),
+            MockResponse(status_code=200, json_data={"foo": "bar"}),
+        ]
+        self.assertEqual(self.client.GET("/foo"), {"foo": "bar"})
+        self.assertEqual(self.client.s.request.call_count, 3)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.5, 2.0])
+        self.assertEqual(
+            self.client.retry_stats.asdict(),
+            {"retries": 2, "recovered": 1, "exhausted": 0, "reasons": {503: 1, 429: 1}},
+        )
+
+    def test_retry_exhausted(self, sleep):
+        self.client.s.request.return_value = MockResponse(status_code=502, json_data={"message": "Bad Gateway"})
+        with self.assertRaises(GrafanaServerError) as ctx:
+            self.client.GET("/foo")
+        self.assertEqual(ctx.exception.status_code, 502)
+        self.assertEqual(self.client.s.request.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(self.client.retry_stats.exhausted, 1)
+
+    def test_retry_timeout(self, sleep):
+        self.client.s.request.side_effect = [
+            niquests.exceptions.ReadTimeout("timed out"),
+            MockResponse(status_code=200, json_data={"foo": "bar"}),
+        ]
+        self.assertEqual(self.client.GET("/foo"), {"foo": "bar"})
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(self.client.retry_stats.reasons, {"timeout": 1})
+
+    def test_retry_timeout_exhausted(self, sleep):  # noqa: ARG002
+        self.client.s.request.side_effect = niquests.exceptions.ReadTimeout("timed out")
+        self.assertRaises(GrafanaTimeoutError, lambda: self.client.GET("/foo"))
+        self.assertEqual(self.client.s.request.call_count, 3)
+
+    def test_no_retry_non_idempotent(self, sleep):
+        self.client.s.request.return_value = MockResponse(status_code=503, json_data={"message": "Unavailable"})
+        self.assertRaises(GrafanaServerError, lambda: self.client.POST("/foo", json={}))
+        self.assertEqual(self.client.s.request.call_count, 1)
+        sleep.assert_not_called()
+        self.assertEqual(self.client.retry_stats.retries, 0)
+
+    def test_no_retry_other_status(self, sleep):
+        self.client.s.request.return_value = MockResponse(status_code=500, json_data={"message": "Internal"})
+        self.assertRaises(GrafanaServerError, lambda: self.client.GET("/foo"))
+        self.assertEqual(self.client.s.request.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_retry_closes_discarded_response(self, sleep):  # noqa: ARG002
+        responses = [
+            MockResponse(status_code=503, json_data={"message": "Service Unavailable"}),
+            MockResponse(status_code=200, json_data={"foo": "bar"}),
+        ]
+        self.client.s.request.side_effect = responses
+        self.assertIs(self.client._send("get", "/foo", stream=True), responses[1])
+        self.assertTrue(responses[0].closed)
+        self.assertFalse(responses[1].closed)
+
+    def test_retry_stats_threads(self, sleep):  # noqa: ARG002
+        self.client.s.request.return_value = MockResponse(status_code=502, json_data={"message": "Bad Gateway"})
+
+        def fetch():
+            for _ in range(50):
+                self.assertRaises(GrafanaServerError, lambda: self.client.GET("/foo"))
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.client.retry_stats.retries, 800)
+        self.assertEqual(self.client.retry_stats.exhausted, 400)
+        self.assertEqual(self.client.retry_stats.reasons, {502: 800})
+
+    def test_no_retry_policy(self, sleep):
+        client = GrafanaClient(None, host="localhost")
+        client.s.request = Mock(name="request")
+        client.s.request.return_value = MockResponse(status_code=503, json_data={"message": "Unavailable"})
+        self.assertRaises(GrafanaServerError, lambda: client.GET("/foo"))
+        self.assertEqual(client.s.request.call_count, 1)
+        sleep.assert_not_called()
+
+
+class TestAsyncGrafanaClientRetry(unittest.IsolatedAsyncioTestCase):
+    @patch("grafana_client.client.asyncio.sleep", new_callable=AsyncMock)
+    async def test_retry_recovered(self, sleep):
+        client = AsyncGrafanaClient(None, host="localhost", retry=RetryPolicy(max_attempts=2, jitter=False))
+        client.s.request = AsyncMock(name="request")
+        client.s.request.side_effect = [
+            MockResponse(status_code=504, json_data={"message": "Gateway Timeout"}),
+            MockResponse(status_code=200, json_data={"foo": "bar"}),
+        ]
+        self.assertEqual(await client.GET("/foo"), {"foo": "bar"})
+        sleep.assert_awaited_once_with(0.5)
+        self.assertEqual(client.retry_stats.retries, 1)
+        self.assertEqual(client.retry_stats.recovered, 1)
+
+    @patch("grafana_client.client.asyncio.sleep", new_callable=AsyncMock)
+    async def test_retry_closes_discarded_response(self, sleep):  # noqa: ARG002
+        client = AsyncGrafanaClient(None, host="localhost", retry=RetryPolicy(max_attempts=2, jitter=False))
+        discarded = Mock(status_code=503, headers={}, close=AsyncMock())
+        response = MockResponse(status_code=200, json_data={"foo": "bar"})
+        client.s.request = AsyncMock(side_effect=[discarded, response])
+        self.assertIs(await client._send("get", "/foo", stream=True), response)
+        discarded.close.assert_awaited_once()
@@ -0,0 +1,139 @@
+import io
+import json
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+import niquests
+from niquests.structures import CaseInsensitiveDict
+
+from grafana_client import AsyncGrafanaApi, GrafanaApi
+from grafana_client.client import GrafanaClientError
+from grafana_client.streaming import JsonArrayParser, aiter_json_array, iter_json_array
+
+DOCUMENT = [
+    {"uid": "foo", "title": 'Quotes " and \\ backslashes, brackets ] } and commas ,', "tags": ["a", "b"]},
+    {"nested": {"list": [1, [2, 3], {"x": None}]}, "empty": {}, "unicode": "äöü ☃"},
+    42,
+    "string",
+    None,
+    True,
+    [],
+]
+
+
+def chunked(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def make_response(status_code, payload: bytes) -> niquests.Response:
+    response = niquests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    response.raw = io.BytesIO(payload)
+    response.encoding = "utf-8"
+    return response
+
+
+class TestJsonArrayParser(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        data = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+        for size in [1, 2, 3, 7, 64, len(data)]:
+            self.assertEqual(list(iter_json_array(chunked(data, size))), DOCUMENT, f"Chunk size {size}")
+
+    def test_whitespace(self):
+        data = b' \n [ 1 , {"a" : [ 2 ] } ,\n"b" ] \n'
+        self.assertEqual(list(iter_json_array(chunked(data, 1))), [1, {"a": [2]}, "b"])
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array([b"[", b" ]"])), [])
+
+    def test_items_as_soon_as_complete(self):
+        parser = JsonArrayParser()
+        self.assertEqual(parser.feed(b'[{"a": 1}, {"b"'), [{"a": 1}])
+        self.assertEqual(parser.feed(b": 2}, 4"), [{"b": 2}])
+        self.assertEqual(parser.feed(b"2"), [])
+        self.assertEqual(parser.feed(b"]"), [42])
+        self.assertEqual(parser.close(), [])
+
+    def test_buffer_bounded(self):
+        parser = JsonArrayParser()
+        parser.feed(b"[")
+        for _ in range(1000):
+            parser.feed(b'{"uid": "foo"},')
+        self.assertEqual(parser.parts, [])
+
+    def test_large_items(self):
+        item = {
+            "panels": [{"id": i, "title": f'Panel "{i}" [{{}}]', "targets": [{"expr": "up\\"}]} for i in range(5000)]
+        }
+        data = json.dumps([item, '\\"', item, 1.5e3]).encode("utf-8")
+        for size in [7, 1024, 65536]:
+            self.assertEqual(list(iter_json_array(chunked(data, size))), [item, '\\"', item, 1.5e3])
+
+    def test_non_array(self):
+        self.assertEqual(list(iter_json_array([b'{"foo":', b' "bar"}'])), [{"foo": "bar"}])
+        self.assertEqual(list(iter_json_array([b"42"])), [42])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: list(iter_json_array([b'[{"foo": 1}'])))
+        self.assertRaises(ValueError, lambda: list(iter_json_array([b"[1, 2] 3"])))
+        self.assertRaises(ValueError, lambda: list(iter_json_array([b"[, 1]"])))
+        self.assertRaises(ValueError, lambda: list(iter_json_array([b"[1, {]"])))
+        self.assertRaises(ValueError, lambda: list(iter_json_array([b"  "])))
+        self.assertRaises(ValueError, lambda: list(iter_json_array([b"[1 2]"])))
+
+    def test_async(self):
+        async def chunks():
+            for chunk in chunked(json.dumps(DOCUMENT).encode("utf-8"), 5):
+                yield chunk
+
+        async def main():
+            return [item async for item in aiter_json_array(chunks())]
+
+        import asyncio
+
+        self.assertEqual(asyncio.run(main()), DOCUMENT)
+
+
+class TestClientStreaming(unittest.TestCase):
+    def setUp(self):
+        self.grafana = GrafanaApi(host="localhost")
+
+    def test_stream(self):
+        payload = json.dumps([{"uid": "foo"}, {"uid": "bar"}]).encode("utf-8")
+        self.grafana.client.s.request = Mock(return_value=make_response(200, payload))
+        results = self.grafana.search.search_dashboards(query="foo", stream=True)
+        self.assertNotIsInstance(results, list)
+        self.assertEqual(list(results), [{"uid": "foo"}, {"uid": "bar"}])
+        self.assertTrue(self.grafana.client.s.request.call_args.kwargs["stream"])
+
+    def test_stream_error(self):
+        payload = json.dumps({"message": "Not found"}).encode("utf-8")
+        self.grafana.client.s.request = Mock(return_value=make_response(404, payload))
+        with self.assertRaises(GrafanaClientError) as ctx:
+            self.grafana.datasource.list_datasources(stream=True)
+        self.assertEqual(ctx.exception.message, "Client Error 404: Not found")
+
+    def test_stream_no_content(self):
+        self.grafana.client.s.request = Mock(return_value=make_response(204, b""))
+        self.assertEqual(list(self.grafana.client.GET("/foo", stream=True)), [])
+
+
+class TestAsyncClientStreaming(unittest.IsolatedAsyncioTestCase):
+    async def test_stream(self):
+        grafana = AsyncGrafanaApi(host="localhost")
+        response = Mock(status_code=200)
+
+        async def iter_content(chunk_size):  # noqa: ARG001
+            async def generate():
+                yield b'[{"id": 1}, '
+                yield b'{"id": 2}]'
+
+            return generate()
+
+        response.iter_content = iter_content
+        response.close = AsyncMock()
+        grafana.client.s.request = AsyncMock(return_value=response)
+        results = await grafana.plugin.list(stream=True)
+        self.assertEqual([item async for item in results], [{"id": 1}, {"id": 2}])
+        response.close.assert_awaited_once()